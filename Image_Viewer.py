@@ -1,9 +1,11 @@
 import os
+import hashlib
 import mimetypes
 import sys
 import shutil
 import threading
 import configparser
+import json
 import time
 
 # Force Windows Console to handle UTF-8 emojis without crashing Eventlet threads
@@ -12,14 +14,26 @@ if hasattr(sys.stdout, 'reconfigure'):
 if hasattr(sys.stderr, 'reconfigure'):
     sys.stderr.reconfigure(encoding='utf-8')
 
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory, make_response, Response, redirect, url_for
+from datetime import datetime, timezone
+from flask import Flask, render_template, request, jsonify, send_file, make_response, Response, redirect, url_for
 from flask_paginate import Pagination, get_page_parameter
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit, join_room
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from werkzeug.security import safe_join
+from werkzeug.http import is_resource_modified
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from utils.metadata_extractor import extract_embedded_metadata
+from utils.metadata_extractor import extract_embedded_metadata, evict_metadata, set_cache_size, get_cache_stats
+from utils.media_index import MediaIndex, page_after
+from utils.media_record import MediaRecord, compact_metadata, memory_report, prune_text_pool
+from utils.index_store import open_store
+from utils.verdict_store import open_verdict_store
+from utils.scan_workers import ScanWorkerPool
+from utils.scan_queue import ScanDispatcher
+from utils.event_coalescer import FileEventCoalescer, REMOVE
+from utils.enrichment import EnrichmentService, PRIORITY_BACKLOG, PRIORITY_NEW, PRIORITY_VISIBLE
+from utils.thumbnail_cache import ThumbnailCache, parse_size
+from utils.media_response import media_etag, open_media, media_body
 import utils.content_scanner as content_scanner
 import logging
 import psutil
@@ -53,10 +67,16 @@ def load_config():
             'swimsuit', 'thick', 'thighs', 'thong', 'topless', 'underwear', 'wet', 'penis',
             'dancing', 'breast', 'dancing', 'bathing', 'swim', 'xxx', 'yoga'
         ],
+        # Match NSFW keywords as whole words only (false = anywhere in a word, e.g. 'ass' in 'glass')
+        'NSFW_KEYWORDS_WHOLE_WORDS': False,
         'NSFW_FOLDERS': [],
         'SAFE_FOLDERS': ['SAFE'],  # Folders that bypass content scanning
         'NUDITY_THRESHOLD': 0.5,
         'NSFW_LABELS': ['FEMALE_BREAST_EXPOSED', 'FEMALE_GENITALIA_EXPOSED', 'MALE_GENITALIA_EXPOSED', 'BUTTOCKS_EXPOSED', 'ANUS_EXPOSED'],
+        'NUDENET_BATCH_SIZE': 8,  # Images per NudeNet inference call during folder scans
+        'SCAN_PREFETCH_WORKERS': 4,  # Threads decoding images ahead of inference during folder scans
+        'SCAN_WORKERS': 2,  # Separate processes running content scans (0 = scan inside the server process)
+        'VIDEO_SCAN_FRAMES': 5,  # Frames sampled across each video by content scans
         'SAFE_MODE_DEFAULT': False,
         'CONTENT_SCAN_DEFAULT': False,
         'METADATA_EXTRACTION_DEFAULT': True,
@@ -90,7 +110,28 @@ def load_config():
         'TOGGLE_ARCHIVE_PASSPHRASE': '',
         'TOGGLE_SAFEMODE_PASSPHRASE': '',
         # Content scan settings
-        'CONTENT_SCAN_OFFSET': 0
+        'CONTENT_SCAN_OFFSET': 0,
+        'CONTENT_SCAN_QUEUE_SIZE': 10000,  # New files waiting for a live content scan (oldest dropped beyond this)
+        # Quiet period (ms) file events are collected over before being applied as one batch
+        'WATCHER_DEBOUNCE_MS': 250,
+        # Minutes between full directory syncs (0 = only at startup / on demand)
+        'DIRECTORY_SYNC_INTERVAL': 60,
+        # Folders listed in parallel by directory syncs and folder scans (helps most on network drives)
+        'DIRECTORY_WALK_WORKERS': 8,
+        # SQLite file the file index is persisted to (relative to the app folder, empty = off)
+        'INDEX_DB_FILE': 'file_index.db',
+        # SQLite file NudeNet results are cached in, by file content (relative to the app folder, empty = off)
+        'SCAN_CACHE_DB_FILE': 'scan_cache.db',
+        # Server-side thumbnails (cache folder relative to the app folder)
+        'THUMBNAIL_CACHE_DIR': 'thumbnail_cache',
+        'THUMBNAIL_CACHE_SIZE_MB': 1024,
+        # Seconds browsers may reuse original media without re-validating (0 = always re-validate via ETag)
+        'MEDIA_CACHE_MAX_AGE': 604800,
+        'THUMBNAIL_FORMAT': 'jpeg',
+        # Maximum number of files whose embedded metadata is kept in memory
+        'METADATA_CACHE_SIZE': 20000,
+        # Worker threads extracting embedded metadata in the background
+        'ENRICHMENT_WORKERS': 2
     }
     
     config_needs_saving = False
@@ -113,6 +154,7 @@ def load_config():
             nsfw_keywords_str = config.get('App', 'NSFW_KEYWORDS', fallback='')
             if nsfw_keywords_str:
                 default_config['NSFW_KEYWORDS'] = [kw.strip() for kw in nsfw_keywords_str.split(',')]
+            default_config['NSFW_KEYWORDS_WHOLE_WORDS'] = config.getboolean('App', 'NSFW_KEYWORDS_WHOLE_WORDS', fallback=False)
             
             # Parse NSFW folders
             nsfw_folders_str = config.get('App', 'NSFW_FOLDERS', fallback='')
@@ -132,6 +174,12 @@ def load_config():
             if nsfw_labels_str:
                 default_config['NSFW_LABELS'] = [label.strip() for label in nsfw_labels_str.split(',')]
             
+            # Parse folder scan pipeline settings
+            default_config['NUDENET_BATCH_SIZE'] = max(config.getint('App', 'NUDENET_BATCH_SIZE', fallback=default_config['NUDENET_BATCH_SIZE']), 1)
+            default_config['SCAN_PREFETCH_WORKERS'] = max(config.getint('App', 'SCAN_PREFETCH_WORKERS', fallback=default_config['SCAN_PREFETCH_WORKERS']), 1)
+            default_config['SCAN_WORKERS'] = max(config.getint('App', 'SCAN_WORKERS', fallback=default_config['SCAN_WORKERS']), 0)
+            default_config['VIDEO_SCAN_FRAMES'] = max(config.getint('App', 'VIDEO_SCAN_FRAMES', fallback=default_config['VIDEO_SCAN_FRAMES']), 1)
+            
             # Parse toggle defaults
             default_config['SAFE_MODE_DEFAULT'] = config.getboolean('App', 'SAFE_MODE_DEFAULT', fallback=False)
             default_config['CONTENT_SCAN_DEFAULT'] = config.getboolean('App', 'CONTENT_SCAN_DEFAULT', fallback=default_config['CONTENT_SCAN_DEFAULT'])
@@ -175,6 +223,22 @@ def load_config():
             
             # Parse content scan settings
             default_config['CONTENT_SCAN_OFFSET'] = config.getint('App', 'CONTENT_SCAN_OFFSET', fallback=0)
+            default_config['CONTENT_SCAN_QUEUE_SIZE'] = max(config.getint('App', 'CONTENT_SCAN_QUEUE_SIZE', fallback=default_config['CONTENT_SCAN_QUEUE_SIZE']), 1)
+            default_config['WATCHER_DEBOUNCE_MS'] = max(config.getint('App', 'WATCHER_DEBOUNCE_MS', fallback=default_config['WATCHER_DEBOUNCE_MS']), 0)
+            
+            # Parse file index settings
+            default_config['DIRECTORY_SYNC_INTERVAL'] = config.getint('App', 'DIRECTORY_SYNC_INTERVAL', fallback=default_config['DIRECTORY_SYNC_INTERVAL'])
+            default_config['DIRECTORY_WALK_WORKERS'] = max(config.getint('App', 'DIRECTORY_WALK_WORKERS', fallback=default_config['DIRECTORY_WALK_WORKERS']), 1)
+            default_config['INDEX_DB_FILE'] = config.get('App', 'INDEX_DB_FILE', fallback=default_config['INDEX_DB_FILE']).strip()
+            default_config['SCAN_CACHE_DB_FILE'] = config.get('App', 'SCAN_CACHE_DB_FILE', fallback=default_config['SCAN_CACHE_DB_FILE']).strip()
+            
+            # Parse thumbnail settings
+            default_config['THUMBNAIL_CACHE_DIR'] = config.get('App', 'THUMBNAIL_CACHE_DIR', fallback=default_config['THUMBNAIL_CACHE_DIR']).strip()
+            default_config['THUMBNAIL_CACHE_SIZE_MB'] = config.getint('App', 'THUMBNAIL_CACHE_SIZE_MB', fallback=default_config['THUMBNAIL_CACHE_SIZE_MB'])
+            default_config['MEDIA_CACHE_MAX_AGE'] = config.getint('App', 'MEDIA_CACHE_MAX_AGE', fallback=default_config['MEDIA_CACHE_MAX_AGE'])
+            default_config['THUMBNAIL_FORMAT'] = config.get('App', 'THUMBNAIL_FORMAT', fallback=default_config['THUMBNAIL_FORMAT']).strip().lower()
+            default_config['METADATA_CACHE_SIZE'] = config.getint('App', 'METADATA_CACHE_SIZE', fallback=default_config['METADATA_CACHE_SIZE'])
+            default_config['ENRICHMENT_WORKERS'] = config.getint('App', 'ENRICHMENT_WORKERS', fallback=default_config['ENRICHMENT_WORKERS'])
         
         print(f"[OK] Loaded configuration from {config_path}")
     else:
@@ -241,9 +305,15 @@ last_scan_time = 0  # Track last scan time for debouncing
 content_scan_enabled = CONFIG.get('CONTENT_SCAN_DEFAULT', False)  # Content Scan toggle state
 metadata_extraction_enabled = CONFIG.get('METADATA_EXTRACTION_DEFAULT', True)  # Metadata Extraction toggle state
 content_scan_progress = None  # Current scan progress for gallery scan
+_scan_worker_pool = None  # Content scan worker processes (created on first scan)
+_scan_worker_pool_lock = threading.Lock()
+
+# Lock for thread safety (re-entrant so index updates can nest inside route handlers)
+cache_lock = threading.RLock()
 
-# Lock for thread safety
-cache_lock = threading.Lock()
+# Supported file extensions
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.avi', '.mkv', '.m4v')
 
 # Make CONFIG available in all templates
 @app.context_processor
@@ -451,8 +521,12 @@ def can_access_settings() -> bool:
     return is_unlocked
 
 
-def get_image_metadata(image_path):
-    """Extract metadata from image filename"""
+def get_image_metadata(image_path, mod_time=None):
+    """
+    Extract metadata from image filename. mod_time (if the caller already
+    has it, e.g. from the directory listing) dates files whose name doesn't
+    carry a date, instead of another stat call.
+    """
     try:
         filename = os.path.basename(image_path)
         base_name = os.path.splitext(filename)[0]
@@ -499,8 +573,10 @@ def get_image_metadata(image_path):
         print(f"Error extracting metadata from {image_path}: {e}")
     
     # Return basic metadata if parsing fails
+    if mod_time is None:
+        mod_time = os.path.getmtime(image_path)
     return {
-        'date_time': datetime.fromtimestamp(os.path.getmtime(image_path)).strftime('%Y-%m-%d %H:%M:%S'),
+        'date_time': datetime.fromtimestamp(mod_time).strftime('%Y-%m-%d %H:%M:%S'),
         'seed': 'Unknown',
         'dimensions': 'Unknown',
         'model': 'Unknown',
@@ -517,12 +593,11 @@ def is_nsfw_content(metadata, subfolder=''):
     if not metadata or not metadata.get('prompt'):
         return False
     
-    prompt = metadata['prompt'].lower()
-    for keyword in CONFIG['NSFW_KEYWORDS']:
-        if keyword.lower() in prompt:
-            return True
-    
-    return False
+    # One pass over the prompt with the content scanner's keyword matcher (rebuilt by its set_config)
+    keyword = content_scanner.match_keyword(metadata['prompt'])
+    if keyword and CONFIG.get('LOGGING_LEVEL') == 'debug':
+        print(f"[DEBUG] NSFW keyword '{keyword}' in prompt")
+    return keyword is not None
 
 
 def is_content_locked_file(subfolder=''):
@@ -556,9 +631,261 @@ def is_archived_file(subfolder=''):
     return 'archive' in path_parts
 
 
-def scan_images():
-    """Scan all images and videos in the configured folder and subfolders recursively"""
-    global image_list, subfolders, latest_image, latest_image_timestamp, scan_in_progress, last_scan_time
+def build_media_info(file_path, mod_time=None, size=None):
+    """
+    Build the in-memory record for a single media file.
+    Returns None if the file is not a supported media type, sits directly in
+    the root of IMAGE_FOLDER, or has disappeared.
+    """
+    item_lower = file_path.lower()
+    is_image = item_lower.endswith(IMAGE_EXTENSIONS)
+    is_video = item_lower.endswith(VIDEO_EXTENSIONS)
+    
+    if not (is_image or is_video):
+        return None
+    
+    # Get relative folder path from the IMAGE_FOLDER
+    rel_path = os.path.relpath(os.path.dirname(file_path), CONFIG['IMAGE_FOLDER'])
+    
+    # Only media inside a top-level folder is listed (loose root files are not)
+    if rel_path == '.' or rel_path.startswith('..'):
+        return None
+    
+    if mod_time is None or size is None:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None  # Skip if file unsafe/removed
+        mod_time, size = stat.st_mtime, stat.st_size
+    
+    # Use forward slashes for web URLs
+    full_subfolder = rel_path.replace('\\', '/')
+    top_folder = full_subfolder.split('/', 1)[0]
+    
+    # Get metadata
+    metadata = get_image_metadata(file_path, mod_time)
+    
+    return MediaRecord(
+        file_path,
+        full_subfolder,  # Full path for file access
+        top_folder,      # Just the top-level folder for filtering
+        mod_time,
+        size,
+        metadata,
+        is_nsfw=is_nsfw_content(metadata, full_subfolder),
+        is_content_locked=is_content_locked_file(full_subfolder),
+        media_type='image' if is_image else 'video'  # 'image' or 'video'
+    )
+
+
+# In-memory file index (deltas from the watcher are applied directly to it)
+media_index = MediaIndex(build_media_info, lock=cache_lock)
+
+# media_type query values -> record media_type
+MEDIA_TYPE_FILTERS = {'photos': 'image', 'videos': 'video'}
+
+
+def encode_cursor(img):
+    """Pagination cursor for a record: its mod_time and path relative to IMAGE_FOLDER"""
+    return f"{img['mod_time']!r}|{img['subfolder']}/{img['filename']}"
+
+
+def decode_cursor(cursor):
+    """Turn a cursor from encode_cursor back into an index sort key (None if missing/invalid)"""
+    mod_time, sep, rel_path = cursor.partition('|')
+    if not sep:
+        return None
+    try:
+        mod_time = float(mod_time)
+    except ValueError:
+        return None
+    return mod_time, os.path.normpath(os.path.join(CONFIG['IMAGE_FOLDER'], rel_path))
+
+
+def _sync_from_index():
+    """Refresh the module-level views (image_list, latest_image) from the file index"""
+    global image_list, latest_image, latest_image_timestamp
+    
+    with cache_lock:
+        # Immutable snapshot list: readers can iterate it while the index changes
+        image_list = media_index.snapshot().items
+        if image_list:
+            latest_image = image_list[0]
+            latest_image_timestamp = latest_image['mod_time']
+        else:
+            latest_image = None
+            latest_image_timestamp = 0
+    
+    publish_latest()
+
+
+# ----------------------------------------
+# Live updates: the newest visible file per visibility class
+# ----------------------------------------
+
+# Visibility classes (safe_mode, content_lock, hide_archive, media_type) that clients subscribed to
+latest_subscriptions = set()
+# Last payload pushed per visibility class, so unchanged classes are not re-sent
+latest_published = {}
+# Snapshot version the last publish was computed from (older publishes are dropped)
+latest_published_version = 0
+# Wakes /api/latest long-polls whenever the index changes (generation counts the changes)
+latest_condition = threading.Condition()
+latest_generation = 0
+LATEST_MAX_WAIT = 60  # seconds
+
+
+def get_visibility_flags(use_defaults=True):
+    """
+    (safe_mode, content_lock, hide_archive) for the current request, from the
+    cookies, falling back to the config defaults for first visits. The frame
+    page only treats safe mode / content lock as on when the cookie says so
+    (use_defaults=False).
+    """
+    def flag(cookie_name, config_key, use_default):
+        value = request.cookies.get(cookie_name)
+        if value is not None:
+            return value == 'true'
+        return CONFIG.get(config_key, False) if use_default else False
+    
+    return (flag('safeMode', 'SAFE_MODE_DEFAULT', use_defaults),
+            flag('contentLock', 'CONTENT_LOCK_DEFAULT', use_defaults),
+            flag('hideArchive', 'HIDE_ARCHIVE_DEFAULT', True))
+
+
+def _latest_room(key):
+    return 'latest:' + ':'.join(str(part) for part in key)
+
+
+def latest_payload(key, snapshot=None):
+    """
+    Compact JSON description of the newest file visible to a visibility class
+    ({} if none), read from an index snapshot without taking the index lock.
+    """
+    safe_mode, content_lock, hide_archive, media_type = key
+    snapshot = snapshot if snapshot is not None else media_index.snapshot()
+    img = snapshot.latest_visible(media_type=media_type,
+                                  hide_nsfw=safe_mode,
+                                  hide_locked=content_lock,
+                                  hide_archived=hide_archive)
+    if img is None:
+        return {}
+    return {
+        'filename': img['filename'],
+        'subfolder': img['subfolder'],
+        'top_folder': img['top_folder'],
+        'media_type': img['media_type'],
+        'mod_time': img['mod_time']
+    }
+
+
+def publish_latest():
+    """
+    Push a latest_changed event to every subscribed visibility class whose
+    newest file changed, and wake any /api/latest long-polls.
+    """
+    global latest_generation, latest_published_version
+    
+    with latest_condition:
+        latest_generation += 1
+        latest_condition.notify_all()
+    
+    # Payloads come from one snapshot, outside the index lock (writers aren't held up)
+    snapshot = media_index.snapshot()
+    with cache_lock:
+        keys = list(latest_subscriptions)
+    payloads = [(key, latest_payload(key, snapshot)) for key in keys]
+    
+    with cache_lock:
+        if snapshot.version < latest_published_version:
+            return  # A publish from a newer snapshot already went out
+        latest_published_version = snapshot.version
+        changed = []
+        for key, payload in payloads:
+            if payload != latest_published.get(key):
+                latest_published[key] = payload
+                changed.append((key, payload))
+    
+    for key, payload in changed:
+        socketio.emit('latest_changed', payload, to=_latest_room(key))
+
+
+def _latest_etag(key, payload):
+    """Strong ETag for a visibility class's newest file (changes with its mod_time and path)"""
+    return hashlib.sha1(json.dumps([key, payload], sort_keys=True).encode('utf-8')).hexdigest()[:24]
+
+
+@app.route('/api/latest')
+def api_latest():
+    """
+    JSON description of the newest visible file (same payload as the
+    latest_changed event), for clients that can't hold a websocket.
+    Answers If-None-Match with 304. With ?wait=N (seconds, up to 60) an
+    unchanged request is held until a newer file arrives or the wait ends.
+    page=frame and media_type select the same filters as those pages.
+    """
+    media_type = MEDIA_TYPE_FILTERS.get(request.args.get('media_type', 'all'), 'all')
+    key = get_visibility_flags(use_defaults=request.args.get('page') != 'frame') + (media_type,)
+    wait = min(max(request.args.get('wait', type=float, default=0), 0), LATEST_MAX_WAIT)
+    deadline = time.time() + wait
+    
+    while True:
+        with latest_condition:
+            generation = latest_generation
+        payload = latest_payload(key)
+        etag = _latest_etag(key, payload)
+        
+        if not request.if_none_match.contains(etag):
+            break
+        
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        with latest_condition:
+            if latest_generation == generation:
+                latest_condition.wait(remaining)
+    
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@socketio.on('subscribe_latest')
+def handle_subscribe_latest(data=None):
+    """
+    Subscribe a client to latest_changed events for its visibility class
+    (taken from its cookies, like the page it is on). The current newest
+    file is sent right away so the client can catch up after a reconnect.
+    """
+    data = data or {}
+    use_defaults = data.get('page') != 'frame'
+    media_type = MEDIA_TYPE_FILTERS.get(data.get('media_type', 'all'), 'all')
+    key = get_visibility_flags(use_defaults) + (media_type,)
+    
+    payload = latest_payload(key)
+    with cache_lock:
+        latest_subscriptions.add(key)
+        latest_published.setdefault(key, payload)
+    
+    join_room(_latest_room(key))
+    emit('latest_changed', payload)
+
+
+def scan_images(incremental=False):
+    """
+    Full directory sync: walk all images and videos in the configured folder
+    and reconcile the file index against what is on disk.
+    Day-to-day changes are applied incrementally by the file watcher; this
+    runs at startup, on the DIRECTORY_SYNC_INTERVAL schedule and on demand.
+    With incremental=True, folders whose mtime is unchanged since the last
+    sync are not re-listed (used after loading the persisted index).
+    """
+    global subfolders, scan_in_progress, last_scan_time
     
     # Prevent concurrent scans
     if scan_in_progress:
@@ -567,7 +894,6 @@ def scan_images():
         return
     
     # Debounce: Don't scan more than once per second
-    import time
     current_time = time.time()
     if current_time - last_scan_time < 1.0:
         if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
@@ -581,105 +907,35 @@ def scan_images():
         if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
             print(f"🗂️ [FILE-INDEX] Starting directory sync of {CONFIG['IMAGE_FOLDER']}...")
         
-        # Supported file extensions
-        IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
-        VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.avi', '.mkv', '.m4v')
-        
-        # Build list locally first (atomic update pattern)
-        temp_image_list = []
-        temp_subfolders = []
-        
         # Get only top-level subfolders for navigation
+        temp_subfolders = []
         try:
-            for item in os.listdir(CONFIG['IMAGE_FOLDER']):
-                item_path = os.path.join(CONFIG['IMAGE_FOLDER'], item)
-                if os.path.isdir(item_path):
-                    temp_subfolders.append(item)
+            with os.scandir(CONFIG['IMAGE_FOLDER']) as entries:
+                temp_subfolders = [entry.name for entry in entries if entry.is_dir()]
         except Exception as e:
             print(f"🗂️ [FILE-INDEX] Error listing top folders: {e}")
         
-        # Recursive function to scan all media files in all subfolder levels
-        def scan_folder(folder_path, top_folder):
-            try:
-                for item in os.listdir(folder_path):
-                    item_path = os.path.join(folder_path, item)
-                    
-                    # If it's a directory, scan it recursively
-                    if os.path.isdir(item_path):
-                        scan_folder(item_path, top_folder)
-                    
-                    # Check if it's an image or video
-                    item_lower = item.lower()
-                    is_image = item_lower.endswith(IMAGE_EXTENSIONS)
-                    is_video = item_lower.endswith(VIDEO_EXTENSIONS)
-                    
-                    if is_image or is_video:
-                        # Get file modification time
-                        try:
-                            mod_time = os.path.getmtime(item_path)
-                        except OSError:
-                            continue # Skip if file unsafe/removed
-                        
-                        # Get metadata
-                        metadata = get_image_metadata(item_path)
-                        
-                        # Get relative path from the top folder
-                        rel_path = os.path.relpath(os.path.dirname(item_path), 
-                                                  os.path.join(CONFIG['IMAGE_FOLDER'], top_folder))
-                        
-                        # If it's in the root of the top folder, use empty string for subfolder_path
-                        subfolder_path = '' if rel_path == '.' else rel_path
-                        
-                        # Create full subfolder path for display and file access
-                        full_subfolder = top_folder
-                        if subfolder_path:
-                            # Use forward slashes for web URLs
-                            full_subfolder = f"{top_folder}/{subfolder_path}"
-                        
-                        # Determine media type
-                        media_type = 'image' if is_image else 'video'
-                        
-                        # Create media info
-                        media_info = {
-                            'path': item_path,
-                            'filename': item,
-                            'subfolder': full_subfolder,  # Full path for file access
-                            'top_folder': top_folder,     # Just the top-level folder for filtering
-                            'mod_time': mod_time,
-                            'metadata': metadata,
-                            'is_nsfw': is_nsfw_content(metadata, full_subfolder),
-                            'is_content_locked': is_content_locked_file(full_subfolder),
-                            'media_type': media_type  # 'image' or 'video'
-                        }
-                        
-                        temp_image_list.append(media_info)
-            except Exception as e:
-                print(f"🗂️ [FILE-INDEX] Error syncing folder {folder_path}: {e}")
-        
-        # Scan all top-level subfolders recursively
-        for subfolder in temp_subfolders:
-            subfolder_path = os.path.join(CONFIG['IMAGE_FOLDER'], subfolder)
-            scan_folder(subfolder_path, subfolder)
+        # Walk all top-level subfolders recursively (in parallel, see DIRECTORY_WALK_WORKERS)
+        seen_folders = {}
+        def walk_library():
+            return media_index.walk([os.path.join(CONFIG['IMAGE_FOLDER'], subfolder) for subfolder in temp_subfolders],
+                                    IMAGE_EXTENSIONS + VIDEO_EXTENSIONS, seen_folders,
+                                    incremental=incremental, workers=CONFIG.get('DIRECTORY_WALK_WORKERS', 8))
         
-        # Sort media by modification time (newest first)
-        temp_image_list.sort(key=lambda x: x['mod_time'], reverse=True)
+        stats = media_index.reconcile(walk_library, folders=seen_folders)
+        prune_text_pool(media_index.snapshot().items)
         
-        # ATOMIC SWAP: Update global lists under lock
         with cache_lock:
-            image_list = temp_image_list
             subfolders = temp_subfolders
-            
-            # Update latest media and timestamp
-            if image_list:
-                latest_image = image_list[0]
-                latest_image_timestamp = latest_image['mod_time']
-                
-            if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                print(f"🗂️ [FILE-INDEX] Complete! Found {len(image_list)} media files")
-            
-            # Start background enrichment to get detailed metadata (prompt, seed, model, loras)
-            # This does NOT perform any keyword filtering/tagging, just data gathering for display.
-            threading.Thread(target=_enrich_metadata_background_task, daemon=True).start()
+        _sync_from_index()
+        
+        if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+            print(f"🗂️ [FILE-INDEX] Complete! Found {len(image_list)} media files "
+                  f"(+{stats['added']} / ~{stats['updated']} / -{stats['removed']})")
+        
+        # Start background enrichment to get detailed metadata (prompt, seed, model, loras)
+        # This does NOT perform any keyword filtering/tagging, just data gathering for display.
+        start_metadata_enrichment()
     
     except Exception as e:
         print(f"🗂️ [FILE-INDEX] Fatal error during sync: {e}")
@@ -689,250 +945,405 @@ def scan_images():
         scan_in_progress = False
 
 
+def start_directory_sync_timer():
+    """Run a full directory sync every DIRECTORY_SYNC_INTERVAL minutes (0 disables)"""
+    interval = CONFIG.get('DIRECTORY_SYNC_INTERVAL', 60)
+    if interval <= 0:
+        return
+    
+    def run_timer():
+        while True:
+            time.sleep(interval * 60)
+            scan_images()
+    
+    threading.Thread(target=run_timer, daemon=True).start()
+    if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+        print(f"🗂️ [FILE-INDEX] Scheduled directory sync every {interval} minutes")
+
 
+def _classification_signature():
+    """Settings the stored is_nsfw / is_content_locked flags were derived from"""
+    return json.dumps([CONFIG.get('NSFW_KEYWORDS', []), CONFIG.get('NSFW_FOLDERS', []),
+                       CONFIG.get('NSFW_KEYWORDS_WHOLE_WORDS', False)])
 
-def _enrich_metadata_background_task():
+
+def reclassify_index():
+    """Re-derive is_nsfw / is_content_locked for every record after the keyword or folder settings change"""
+    with cache_lock:
+        records = list(media_index.items)
+    
+    for img in records:
+        # Keyword flags come from the filename metadata (not the enriched prompt), as when the record was built
+        metadata = get_image_metadata(img['path'], img['mod_time'])
+        is_nsfw = is_nsfw_content(metadata, img['subfolder'])
+        is_locked = is_content_locked_file(img['subfolder'])
+        with cache_lock:
+            if img.get('is_nsfw') != is_nsfw or img.get('is_content_locked') != is_locked:
+                img['is_nsfw'] = is_nsfw
+                img['is_content_locked'] = is_locked
+                media_index.mark_dirty(img['path'])
+    
+    if media_index.store is not None:
+        media_index.store.set_meta('classification', _classification_signature())
+    media_index.flush()
+    publish_latest()
+
+
+def _scan_cache_path():
+    """Absolute path of the content scan result cache ('' if SCAN_CACHE_DB_FILE is off)"""
+    db_file = CONFIG.get('SCAN_CACHE_DB_FILE', '')
+    if not db_file:
+        return ''
+    return db_file if os.path.isabs(db_file) else os.path.join(os.path.dirname(os.path.abspath(__file__)), db_file)
+
+
+def open_scan_cache():
+    """Open the content scan result cache (if SCAN_CACHE_DB_FILE is set) and hand it to the scanner"""
+    db_path = _scan_cache_path()
+    if not db_path:
+        return
+    
+    store = open_verdict_store(db_path)
+    if store is not None:
+        content_scanner.set_verdict_store(store)
+        # Files that leave the index (deleted, moved, archived) no longer need their stored hash
+        media_index.on_removed = store.forget
+        if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+            print(f"[ContentScan] Scan cache: {CONFIG['SCAN_CACHE_DB_FILE']} ({store.stats()['verdicts']} cached results)")
+
+
+def get_scan_worker_pool():
     """
-    Background task: extract embedded metadata (prompt, model, seed, loras) 
-    and attach it to the image objects for display purposes.
-    does NOT use this data for NSFW filtering/flagging.
+    Lazy-create the pool of content scan worker processes (None if SCAN_WORKERS
+    is 0 - scans then run in threads of this process)
+    """
+    global _scan_worker_pool
+    if CONFIG.get('SCAN_WORKERS', 0) <= 0:
+        return None
+    if _scan_worker_pool is None:
+        with _scan_worker_pool_lock:
+            if _scan_worker_pool is None:
+                _scan_worker_pool = ScanWorkerPool(CONFIG['SCAN_WORKERS'], _scan_cache_path(),
+                                                   CONFIG.get('SCAN_PREFETCH_WORKERS', 4))
+    return _scan_worker_pool
+
+
+def load_file_index():
+    """
+    Load the persisted file index (if INDEX_DB_FILE is set).
+    Returns True if records were loaded, so startup can reconcile in the
+    background instead of walking the library before serving requests.
+    """
+    global subfolders
+    
+    db_file = CONFIG.get('INDEX_DB_FILE', '')
+    if not db_file:
+        return False
+    
+    db_path = db_file if os.path.isabs(db_file) else os.path.join(os.path.dirname(os.path.abspath(__file__)), db_file)
+    media_index.store = open_store(db_path, CONFIG['IMAGE_FOLDER'])
+    if media_index.store is None:
+        return False
+    
+    start = time.time()
+    count = media_index.load()
+    if not count:
+        media_index.store.set_meta('classification', _classification_signature())
+        return False
+    
+    with cache_lock:
+        subfolders = media_index.folders.root.child_names()
+    _sync_from_index()
+    print(f"🗂️ [FILE-INDEX] Loaded {count} media files from {db_file} in {time.time() - start:.2f}s")
+    
+    # NSFW keywords / folders changed since the index was saved
+    if media_index.store.get_meta('classification') != _classification_signature():
+        threading.Thread(target=reclassify_index, daemon=True).start()
+    return True
+
+
+def start_index_persistence():
+    """
+    Write file index changes to the index database (and prune the scan cache
+    of removed files) every few seconds
+    """
+    if media_index.store is None and media_index.on_removed is None:
+        return
+    
+    def run_flush():
+        while True:
+            time.sleep(5)
+            media_index.flush()
+    
+    threading.Thread(target=run_flush, daemon=True).start()
+
+
+def start_metadata_enrichment():
+    """
+    Queue every file that has no embedded metadata yet for background
+    enrichment. Files already queued or enriched are not queued again, so
+    repeated directory syncs don't restart the backlog from the top.
     """
-    updated = 0
     if not metadata_extraction_enabled:
         return
-        
-    with cache_lock:
-        # Check all images that haven't been enriched yet
-        # We can check if 'embedded_loaded' flag is missing
-        items_to_check = [img for img in image_list if not img.get('embedded_loaded', False)]
     
-    for img in items_to_check:
+    with cache_lock:
         # OPTIMIZATION: Skip Archive files to save resources
         # We only need detailed metadata on-demand for archived items
-        if is_archived_file(img.get('subfolder', '')):
-            continue
-            
-        try:
-            # OPTIMIZATION: Small sleep to yield resources to main thread/web requests
-            # This prevents the background task from hogging Disk I/O
-            time.sleep(0.01)
-            
-            # unique identifier to see if we already have it in cache?
-            # extract_embedded_metadata handles caching internally based on file path
-            embedded = extract_embedded_metadata(img['path'])
-            
-            if embedded:
-                # Merge embedded logic into existing metadata
-                # We prioritize embedded data over filename-parsed data if available
-                if not img.get('metadata'):
-                    img['metadata'] = {}
-                
-                meta = img['metadata']
-                
-                # Update fields if present in embedded data
-                if embedded.get('prompt'):
-                    meta['prompt'] = embedded['prompt']
-                if embedded.get('negative_prompt'):
-                    meta['negative_prompt'] = embedded['negative_prompt']
-                if embedded.get('seed'):
-                    meta['seed'] = embedded['seed']
-                if embedded.get('model'):
-                    meta['model'] = embedded['model']
-                if embedded.get('dimensions'):
-                    meta['dimensions'] = embedded['dimensions']
-                if embedded.get('loras'):
-                    meta['loras'] = embedded['loras']
-                
-                # Mark as loaded so we don't re-scan next time
-                img['embedded_loaded'] = True
-                updated += 1
-                
-        except Exception as e:
-            # print(f"🏷️ [METADATA] Error enriching {img.get('filename')}: {e}")
-            pass
+        pending = [img['path'] for img in image_list
+                   if not img.get('embedded_loaded', False) and not is_archived_file(img.get('subfolder', ''))]
     
-    if updated > 0:
-        if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-            print(f"🏷️ [METADATA] Enriched {updated} files with embedded metadata")
+    enrichment_service.submit_many(pending, PRIORITY_BACKLOG)
 
 
-def fast_track_image(file_path):
+def prioritize_enrichment(images):
+    """Move files that are on screen right now (hero, visible tiles) to the front of the enrichment queue"""
+    if not metadata_extraction_enabled:
+        return
+    enrichment_service.submit_many(
+        (img['path'] for img in images if not img.get('embedded_loaded', False)), PRIORITY_VISIBLE)
+
+
+def _enrich_metadata(file_path):
     """
-    Instantly scans a single newly created/modified image and pushes it directly 
-    into the in-memory image_list to bypass the slow disk scan.
+    Enrichment worker task: extract embedded metadata (prompt, model, seed, loras) 
+    and attach it to the indexed record for display purposes.
+    does NOT use this data for NSFW filtering/flagging.
+    Returns True if the record was updated.
     """
-    global image_list, latest_image, latest_image_timestamp
+    if not metadata_extraction_enabled:
+        return False
     
-    # Supported file extensions
-    IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
-    VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.avi', '.mkv', '.m4v')
+    with cache_lock:
+        img = media_index.records.get(file_path)
+        if img is None or img.get('embedded_loaded', False):
+            return False
     
-    item_lower = file_path.lower()
-    is_image = item_lower.endswith(IMAGE_EXTENSIONS)
-    is_video = item_lower.endswith(VIDEO_EXTENSIONS)
+    # extract_embedded_metadata handles caching internally based on file path
+    embedded = extract_embedded_metadata(file_path)
+    if not embedded:
+        return False
     
-    if not (is_image or is_video):
+    # Merge under the lock so the index can't persist a half-updated record
+    with cache_lock:
+        if media_index.records.get(file_path) is not img:
+            return False  # Moved, deleted or rewritten meanwhile
+        
+        # Merge embedded logic into existing metadata
+        # We prioritize embedded data over filename-parsed data if available
+        if not img.get('metadata'):
+            img['metadata'] = {}
+        
+        meta = img['metadata']
+        
+        # Update fields if present in embedded data
+        if embedded.get('prompt'):
+            meta['prompt'] = embedded['prompt']
+        if embedded.get('negative_prompt'):
+            meta['negative_prompt'] = embedded['negative_prompt']
+        if embedded.get('seed'):
+            meta['seed'] = embedded['seed']
+        if embedded.get('model'):
+            meta['model'] = embedded['model']
+        if embedded.get('dimensions'):
+            meta['dimensions'] = embedded['dimensions']
+        if embedded.get('loras'):
+            meta['loras'] = embedded['loras']
+        # Prompts repeat across a batch: keep one shared copy
+        compact_metadata(meta)
+        
+        # Mark as loaded so we don't re-scan next time (also across restarts)
+        img['embedded_loaded'] = True
+        media_index.mark_dirty(file_path)
+    return True
+
+
+def _log_enrichment_done(count):
+    if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+        print(f"🏷️ [METADATA] Enriched {count} files with embedded metadata")
+
+
+# Background metadata enrichment (bounded worker pool, visible files first)
+enrichment_service = EnrichmentService(_enrich_metadata,
+                                       workers=CONFIG.get('ENRICHMENT_WORKERS', 2),
+                                       on_idle=_log_enrichment_done)
+
+
+def remove_from_index(file_path):
+    """Drop a deleted file from the in-memory file index"""
+    evict_metadata(file_path)
+    record = media_index.remove(file_path)
+    _sync_from_index()
+    return record
+
+
+def move_in_index(src_path, dest_path):
+    """Apply a file move/rename to the in-memory file index"""
+    evict_metadata(src_path)
+    record = media_index.move(src_path, dest_path)
+    _sync_from_index()
+    
+    if record is not None and not record.get('embedded_loaded', False) and metadata_extraction_enabled:
+        enrichment_service.submit(record['path'], PRIORITY_NEW)
+    return record
+
+
+def _update_top_folder(folder_path, exists):
+    """Keep the top-level folder navigation list in step with directory events"""
+    global subfolders
+    
+    if os.path.dirname(os.path.normpath(folder_path)) != os.path.normpath(CONFIG['IMAGE_FOLDER']):
         return
-        
-    try:
-        mod_time = os.path.getmtime(file_path)
-    except OSError:
-        return # Skip if file unsafe/removed
-        
-    filename = os.path.basename(file_path)
-    # Get relative path from the IMAGE_FOLDER
-    rel_path = os.path.relpath(os.path.dirname(file_path), CONFIG['IMAGE_FOLDER'])
     
-    # Extract top folder and subfolder
-    if rel_path == '.':
-        top_folder = ''
-        full_subfolder = ''
-    else:
-        parts = rel_path.replace('\\', '/').split('/', 1)
-        top_folder = parts[0]
-        full_subfolder = rel_path.replace('\\', '/')
+    name = os.path.basename(os.path.normpath(folder_path))
+    with cache_lock:
+        if exists and name not in subfolders:
+            subfolders = subfolders + [name]
+        elif not exists and name in subfolders:
+            subfolders = [folder for folder in subfolders if folder != name]
+
+
+def scan_new_file(file_path):
+    """Content-scan a file the watcher saw being created (run by the scan dispatcher)"""
+    if os.path.exists(file_path) and not content_scanner.should_skip_scanning(file_path):
+        metadata = get_image_metadata(file_path)
+        if content_scanner.scan_single_file(file_path, metadata, worker_pool=get_scan_worker_pool()):
+            print(f"[ContentScan] 📁 File moved to NSFW folder: {file_path}")
+    elif CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+        print(f"[ContentScan] ⏭️ Skipping (not found or in NSFW/SAFE): {file_path}")
+
+
+# Live content scans: one bounded queue and a fixed set of worker threads
+scan_dispatcher = ScanDispatcher(scan_new_file,
+                                 workers=max(CONFIG.get('SCAN_WORKERS', 2), 1),
+                                 max_pending=CONFIG.get('CONTENT_SCAN_QUEUE_SIZE', 10000),
+                                 offset=lambda: CONFIG.get('CONTENT_SCAN_OFFSET', 0))
+
+
+def queue_content_scan(file_path):
+    """Hand a newly created file to the live content scan queue (unless it needn't be scanned)"""
+    # Content Scan: Check if enabled and file is NOT already in NSFW or SAFE folder
+    # Also skip scanning if file is in Archive (as per user request)
+    if content_scan_enabled and not content_scanner.should_skip_scanning(file_path) and not is_archived_file(file_path):
+        # Scanned by the dispatcher's worker threads (after CONTENT_SCAN_OFFSET newer files)
+        scan_dispatcher.submit(file_path)
+        if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug') and CONFIG.get('CONTENT_SCAN_OFFSET', 0) > 0:
+            stats = scan_dispatcher.stats()
+            print(f"[ContentScan] ⏳ Added to queue (offset={CONFIG.get('CONTENT_SCAN_OFFSET', 0)}, queue={stats['held']})")
+    elif content_scan_enabled:
+        if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+            print(f"[ContentScan] ⏭️ Skipping file in NSFW or SAFE folder")
+
+
+def apply_file_changes(changes):
+    """
+    Apply a coalesced batch of file events (path -> {'kind', 'created'}) to the
+    file index, then refresh the views and notify clients once for the batch.
+    """
+    updated = []
+    removed = 0
+    for file_path, change in changes.items():
+        if change['kind'] == REMOVE:
+            evict_metadata(file_path)
+            if media_index.remove(file_path) is not None:
+                removed += 1
+            continue
         
-    # Get metadata
-    metadata = get_image_metadata(file_path)
-    media_type = 'image' if is_image else 'video'
-    
-    media_info = {
-        'path': file_path,
-        'filename': filename,
-        'subfolder': full_subfolder,
-        'top_folder': top_folder,
-        'mod_time': mod_time,
-        'metadata': metadata,
-        'is_nsfw': is_nsfw_content(metadata, full_subfolder),
-        'is_content_locked': is_content_locked_file(full_subfolder),
-        'media_type': media_type
-    }
+        record = media_index.upsert(file_path)
+        if record is None:
+            continue  # gone again before the batch was applied
+        updated.append(file_path)
+        if not record.get('embedded_loaded', False) and metadata_extraction_enabled:
+            enrichment_service.submit(record['path'], PRIORITY_NEW)
+        if change['created']:
+            print(f"✨ New media detected: {file_path}")
+            queue_content_scan(file_path)
+    
+    if not updated and not removed:
+        return
+    _sync_from_index()
     
-    with cache_lock:
-        # Avoid duplicates: update existing if modifying
-        for idx, exist_img in enumerate(image_list):
-            if exist_img['path'] == file_path:
-                image_list[idx] = media_info
-                # Resort just in case mod time changed
-                image_list.sort(key=lambda x: x['mod_time'], reverse=True)
-                break
-        else:
-            # Insert new image in correct sorted position (usually index 0)
-            image_list.insert(0, media_info)
-            image_list.sort(key=lambda x: x['mod_time'], reverse=True)
-            
-        # Update latest media and timestamp
-        if image_list:
-            latest_image = image_list[0]
-            latest_image_timestamp = latest_image['mod_time']
+    if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+        print(f"🗂️ [FILE-INDEX] Applied {len(changes)} file changes (+{len(updated)} / -{removed})")
+    
+    if updated:
+        # One event for the whole batch so clients refresh once
+        try:
+            socketio.emit('new_image', {'path': updated[-1], 'paths': updated, 'type': 'new_image'})
+            if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+                print(f"[WebSocket] [OK] Emitted 'new_image' event successfully")
+        except Exception as e:
+            print(f"[WebSocket] ❌ Error emitting event: {e}")
+
+
+# File events are collected per path and applied in batches once a burst goes quiet
+file_event_coalescer = FileEventCoalescer(apply_file_changes,
+                                          window=CONFIG.get('WATCHER_DEBOUNCE_MS', 250) / 1000.0)
 
 
 class ImageChangeHandler(FileSystemEventHandler):
     """Handler for file system events"""
     # Supported file extensions
-    MEDIA_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.mp4', '.webm', '.mov', '.avi', '.mkv', '.m4v')
-    
-    # Pending scan queue for offset feature
-    _pending_scan_queue = []
-    _scan_queue_lock = threading.Lock()
+    MEDIA_EXTENSIONS = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
     
     def on_created(self, event):
+        if event.is_directory:
+            _update_top_folder(event.src_path, True)
+            return
+        
+        if event.src_path.lower().endswith(self.MEDIA_EXTENSIONS):
+            file_event_coalescer.created(event.src_path)
+    
+    def on_closed(self, event):
+        # Writer closed the file (inotify IN_CLOSE_WRITE) - content scans needn't wait for it to settle
         if not event.is_directory and event.src_path.lower().endswith(self.MEDIA_EXTENSIONS):
-            print(f"✨ New media detected: {event.src_path}")
-            
-            # Fast-track it to the UI list immediately
-            fast_track_image(event.src_path)
-            
-            def perform_content_scan():
-                # Content Scan: Check if enabled and file is NOT already in NSFW or SAFE folder
-                # Also skip scanning if file is in Archive (as per user request)
-                if content_scan_enabled and not content_scanner.should_skip_scanning(event.src_path) and not is_archived_file(event.src_path):
-                    offset = CONFIG.get('CONTENT_SCAN_OFFSET', 0)
-                    
-                    if offset <= 0:
-                        # No offset - scan immediately
-                        try:
-                            metadata = get_image_metadata(event.src_path)
-                            if content_scanner.scan_single_file(event.src_path, metadata):
-                                print(f"[ContentScan] 📁 File moved to NSFW folder")
-                        except Exception as e:
-                            print(f"[ContentScan] ❌ Error scanning: {e}")
-                    else:
-                        with self._scan_queue_lock:
-                            # Add current file to queue 
-                            self._pending_scan_queue.append(event.src_path)
-                            if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                                print(f"[ContentScan] ⏳ Added to queue (offset={offset}, queue={len(self._pending_scan_queue)})")
-                            
-                            files_to_scan = []
-                            # When queue exceeds offset, extract the oldest files
-                            while len(self._pending_scan_queue) > offset:
-                                files_to_scan.append(self._pending_scan_queue.pop(0))
-                        
-                        # Process files outside the lock
-                        for file_to_scan in files_to_scan:
-                            if os.path.exists(file_to_scan) and not content_scanner.should_skip_scanning(file_to_scan):
-                                try:
-                                    metadata = get_image_metadata(file_to_scan)
-                                    if content_scanner.scan_single_file(file_to_scan, metadata):
-                                        print(f"[ContentScan] 📁 File moved to NSFW folder: {file_to_scan}")
-                                except Exception as e:
-                                    print(f"[ContentScan] ❌ Error scanning: {e}")
-                            else:
-                                if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                                    print(f"[ContentScan] ⏭️ Skipping (not found or in NSFW/SAFE): {file_to_scan}")
-                elif content_scan_enabled:
-                    if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                        print(f"[ContentScan] ⏭️ Skipping file in NSFW or SAFE folder")
-            
-            # Run content scan in background thread to avoid blocking the websocket UI emission
-            threading.Thread(target=perform_content_scan, daemon=True).start()
-            
-            # Run full background disk scan (will effectively validate/repair list eventually)
-            threading.Thread(target=scan_images, daemon=True).start()
-            
-            # Emit event to all clients immediately so UI feels responsive
-            try:
-                if CONFIG.get('LOGGING_LEVEL') == 'debug':
-                    print(f"[DEBUG] About to emit new_image event...")
-                socketio.emit('new_image', {'path': event.src_path, 'type': 'new_image'})
-                if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                    print(f"[WebSocket] [OK] Emitted 'new_image' event successfully")
-            except Exception as e:
-                print(f"[WebSocket] ❌ Error emitting event: {e}")
+            content_scanner.mark_write_closed(event.src_path)
     
     def on_modified(self, event):
         if not event.is_directory and event.src_path.lower().endswith(self.MEDIA_EXTENSIONS):
             if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
                 print(f"Media modified: {event.src_path}")
-            # Fast-track it to the UI list immediately
-            fast_track_image(event.src_path)
-            
-            # Run scan in background thread to avoid blocking
-            threading.Thread(target=scan_images, daemon=True).start()
-            # Emit event to all clients
-            try:
-                socketio.emit('new_image', {'path': event.src_path, 'type': 'new_image'})
-                if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                    print(f"[WebSocket] [OK] Emitted 'new_image' event successfully")
-            except Exception as e:
-                print(f"[WebSocket] ❌ Error emitting event: {e}")
+            file_event_coalescer.modified(event.src_path)
     
     def on_moved(self, event):
-        if not event.is_directory and event.dest_path.lower().endswith(self.MEDIA_EXTENSIONS):
+        if event.is_directory:
+            # Apply pending file events first so they don't land on the old subtree afterwards
+            file_event_coalescer.flush()
+            # Folder renamed/moved: drop the old subtree and index the new one
+            removed = media_index.remove_tree(event.src_path)
+            added = media_index.add_tree(media_index.walk(event.dest_path, self.MEDIA_EXTENSIONS, {}))
+            _update_top_folder(event.src_path, False)
+            _update_top_folder(event.dest_path, True)
+            _sync_from_index()
+            if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+                print(f"🗂️ [FILE-INDEX] Folder moved: {event.dest_path} (-{removed} / +{added})")
+            if added:
+                start_metadata_enrichment()
+            return
+        
+        if event.dest_path.lower().endswith(self.MEDIA_EXTENSIONS):
             print(f"Media moved: {event.dest_path}")
-            # Fast-track it to the UI list immediately
-            fast_track_image(event.dest_path)
-            
-            # Run scan in background thread to avoid blocking
-            threading.Thread(target=scan_images, daemon=True).start()
-            # Emit event to all clients
-            try:
-                socketio.emit('new_image', {'path': event.dest_path, 'type': 'new_image'})
-                if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
-                    print(f"[WebSocket] [OK] Emitted 'new_image' event successfully")
-            except Exception as e:
-                print(f"[WebSocket] ❌ Error emitting event: {e}")
+            if event.src_path.lower().endswith(self.MEDIA_EXTENSIONS):
+                file_event_coalescer.moved(event.src_path, event.dest_path)
+            else:
+                # Renamed from a temp/non-media name - a new file as far as the app is concerned
+                file_event_coalescer.created(event.dest_path)
+        elif event.src_path.lower().endswith(self.MEDIA_EXTENSIONS):
+            # Renamed to a non-media name - just drop it
+            file_event_coalescer.deleted(event.src_path)
+    
+    def on_deleted(self, event):
+        if event.is_directory:
+            file_event_coalescer.flush()
+            removed = media_index.remove_tree(event.src_path)
+            _update_top_folder(event.src_path, False)
+            _sync_from_index()
+            if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+                print(f"🗂️ [FILE-INDEX] Folder deleted: {event.src_path} (-{removed})")
+        elif event.src_path.lower().endswith(self.MEDIA_EXTENSIONS):
+            if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
+                print(f"Media deleted: {event.src_path}")
+            file_event_coalescer.deleted(event.src_path)
 
 
 def start_observer():
@@ -951,338 +1362,204 @@ def start_observer():
 @app.route('/')
 def index():
     """Main page showing the latest image and thumbnails"""
-    with cache_lock:
-        # Get selected subfolder (if any)
-        selected_subfolder = request.args.get('subfolder', '')
-        
-        # Get media type filter (if any)
-        media_type = request.args.get('media_type', 'all')
-        
-        # Check if safe mode is enabled (cookie or config default for first visit)
-        safe_mode_cookie = request.cookies.get('safeMode')
-        if safe_mode_cookie is not None:
-            safe_mode = safe_mode_cookie == 'true'
-        else:
-            # First visit - use config default
-            safe_mode = CONFIG.get('SAFE_MODE_DEFAULT', False)
-        
-        # Check if archive view is enabled (cookie or config default)
-        hide_archive_cookie = request.cookies.get('hideArchive')
-        if hide_archive_cookie is not None:
-            hide_archive = hide_archive_cookie == 'true'
-        else:
-            hide_archive = CONFIG.get('HIDE_ARCHIVE_DEFAULT', False)
-        
-        # Check if content lock is enabled (cookie or config default)
-        content_lock_cookie = request.cookies.get('contentLock')
-        if content_lock_cookie is not None:
-            content_lock = content_lock_cookie == 'true'
-        else:
-            content_lock = CONFIG.get('CONTENT_LOCK_DEFAULT', False)
-        
-        # Filter images by top-level subfolder if selected
-        filtered_images = image_list
-        if selected_subfolder:
-            filtered_images = [img for img in image_list if img['top_folder'] == selected_subfolder]
-        
-        # Filter by media type if specified
-        if media_type == 'photos':
-            filtered_images = [img for img in filtered_images if img.get('media_type') == 'image']
-        elif media_type == 'videos':
-            filtered_images = [img for img in filtered_images if img.get('media_type') == 'video']
-        
-        # Filter out archive content if hide archive is enabled
-        if hide_archive:
-            filtered_images = [img for img in filtered_images 
-                             if 'archive' not in img.get('subfolder', '').lower().split('/')]
-        
-        # Filter out NSFW content if safe mode is enabled
-        if safe_mode:
-            filtered_images = [img for img in filtered_images if not img.get('is_nsfw', False)]
-        
-        # Filter out content-locked files if content lock is enabled
-        if content_lock:
-            filtered_images = [img for img in filtered_images if not img.get('is_content_locked', False)]
-        
-        # Get the hero image to display
-        current_latest_image = latest_image
-        
-        # If filtering by media type, use the first filtered item as hero
-        if media_type != 'all' and filtered_images:
-            current_latest_image = filtered_images[0]
-        # otherwise, check for safe mode, content lock, or hide archive
-        elif (safe_mode or content_lock or hide_archive) and latest_image:
-            # Check if current latest image is hidden
-            is_nsfw = latest_image.get('is_nsfw', False)
-            is_locked = latest_image.get('is_content_locked', False)
-            is_archived = is_archived_file(latest_image.get('subfolder', ''))
-            
-            is_hidden = (safe_mode and is_nsfw) or \
-                       (content_lock and is_locked) or \
-                       (hide_archive and is_archived)
-            
-            if is_hidden:
-                # Find the first visible image
-                for img in filtered_images:
-                    # We already filtered filtered_images based on settings, 
-                    # so the first one in there is guaranteed to be visible/allowed
-                    current_latest_image = img
-                    break
-                else:
-                    # If loop completes without break, no visible image found
-                    current_latest_image = None
-        
-        # Limit initial load for performance (only most recent files)
-        max_initial = CONFIG['MAX_INITIAL_LOAD']
-        sidebar_images = filtered_images[:max_initial]
-
-        # Parse breadcrumb path (split by / for nested folders)
-        breadcrumb_parts = selected_subfolder.split('/') if selected_subfolder else []
-        breadcrumbs = []
-        current_path = ''
-        for part in breadcrumb_parts:
-            if current_path:
-                current_path += '/' + part
+    # Immutable index snapshot: the render never waits on directory syncs or watcher updates
+    snapshot = media_index.snapshot()
+    newest_image = snapshot.latest()
+    
+    # Get selected subfolder (if any)
+    selected_subfolder = request.args.get('subfolder', '')
+    
+    # Get media type filter (if any)
+    media_type = request.args.get('media_type', 'all')
+    
+    # Safe mode, content lock and hide archive (cookies or config defaults for first visit)
+    safe_mode, content_lock, hide_archive = get_visibility_flags()
+    
+    # Filter by top-level subfolder, media type, archive, safe mode and content lock
+    filtered_images = snapshot.filter(top_folder=selected_subfolder,
+                                      media_type=MEDIA_TYPE_FILTERS.get(media_type, 'all'),
+                                      hide_nsfw=safe_mode,
+                                      hide_locked=content_lock,
+                                      hide_archived=hide_archive)
+    
+    # Get the hero image to display
+    current_latest_image = newest_image
+    
+    # If filtering by media type, use the first filtered item as hero
+    if media_type != 'all' and filtered_images:
+        current_latest_image = filtered_images[0]
+    # otherwise, check for safe mode, content lock, or hide archive
+    elif (safe_mode or content_lock or hide_archive) and newest_image:
+        # Check if current latest image is hidden
+        is_nsfw = newest_image.get('is_nsfw', False)
+        is_locked = newest_image.get('is_content_locked', False)
+        is_archived = is_archived_file(newest_image.get('subfolder', ''))
+        
+        is_hidden = (safe_mode and is_nsfw) or \
+                   (content_lock and is_locked) or \
+                   (hide_archive and is_archived)
+        
+        if is_hidden:
+            # Find the first visible image
+            for img in filtered_images:
+                # We already filtered filtered_images based on settings, 
+                # so the first one in there is guaranteed to be visible/allowed
+                current_latest_image = img
+                break
             else:
-                current_path = part
-            breadcrumbs.append({'name': part, 'path': current_path})
-        
-        return render_template('index.html', 
-                              latest_image=current_latest_image,
-                              images=sidebar_images,
-                              subfolders=subfolders,
-                              selected_subfolder=selected_subfolder,
-                              total_images=len(filtered_images),
-                              safe_mode=safe_mode,
-                              media_type=media_type)
+                # If loop completes without break, no visible image found
+                current_latest_image = None
+    
+    # Limit initial load for performance (only most recent files)
+    max_initial = CONFIG['MAX_INITIAL_LOAD']
+    sidebar_images = filtered_images[:max_initial]
+    prioritize_enrichment(([current_latest_image] if current_latest_image else []) + sidebar_images)
+
+    # Parse breadcrumb path (split by / for nested folders)
+    breadcrumb_parts = selected_subfolder.split('/') if selected_subfolder else []
+    breadcrumbs = []
+    current_path = ''
+    for part in breadcrumb_parts:
+        if current_path:
+            current_path += '/' + part
+        else:
+            current_path = part
+        breadcrumbs.append({'name': part, 'path': current_path})
+    
+    return render_template('index.html', 
+                          latest_image=current_latest_image,
+                          images=sidebar_images,
+                          subfolders=subfolders,
+                          selected_subfolder=selected_subfolder,
+                          total_images=len(filtered_images),
+                          safe_mode=safe_mode,
+                          media_type=media_type)
 
 
 @app.route('/frame')
 def frame():
     """Picture Frame page showing only the latest image in full-screen mode"""
-    with cache_lock:
-        # Check if safe mode is enabled
-        safe_mode = request.cookies.get('safeMode') == 'true'
-        content_lock = request.cookies.get('contentLock') == 'true'
-        
-        # Get the latest non-hidden image
-        current_latest_image = latest_image
-        
-        # Check if hide archive is enabled (cookie or default)
-        hide_archive_cookie = request.cookies.get('hideArchive')
-        if hide_archive_cookie is not None:
-            hide_archive = hide_archive_cookie == 'true'
-        else:
-            hide_archive = CONFIG.get('HIDE_ARCHIVE_DEFAULT', False)
-
-        if (safe_mode or content_lock or hide_archive) and latest_image:
-            is_nsfw = latest_image.get('is_nsfw', False)
-            is_locked = latest_image.get('is_content_locked', False)
-            is_archived = is_archived_file(latest_image.get('subfolder', ''))
-            
-            is_hidden = (safe_mode and is_nsfw) or \
-                       (content_lock and is_locked) or \
-                       (hide_archive and is_archived)
-                       
-            if is_hidden:
-                # Find the first visible image
-                filtered_images = [img for img in image_list 
-                                 if not (safe_mode and img.get('is_nsfw', False)) and
-                                    not (content_lock and img.get('is_content_locked', False)) and
-                                    not (hide_archive and is_archived_file(img.get('subfolder', '')))]
-                if filtered_images:
-                    current_latest_image = filtered_images[0]
-                else:
-                    current_latest_image = None
-        
-        return render_template('frame.html', 
-                              latest_image=current_latest_image,
-                              safe_mode=safe_mode)
+    snapshot = media_index.snapshot()
+    newest_image = snapshot.latest()
+    
+    # Safe mode / content lock only when the cookie is set, hide archive with config default
+    safe_mode, content_lock, hide_archive = get_visibility_flags(use_defaults=False)
+    
+    # Get the latest non-hidden image
+    current_latest_image = newest_image
+
+    if (safe_mode or content_lock or hide_archive) and newest_image:
+        is_nsfw = newest_image.get('is_nsfw', False)
+        is_locked = newest_image.get('is_content_locked', False)
+        is_archived = is_archived_file(newest_image.get('subfolder', ''))
+        
+        is_hidden = (safe_mode and is_nsfw) or \
+                   (content_lock and is_locked) or \
+                   (hide_archive and is_archived)
+                   
+        if is_hidden:
+            # Find the first visible image
+            filtered_images = snapshot.filter(hide_nsfw=safe_mode,
+                                              hide_locked=content_lock,
+                                              hide_archived=hide_archive)
+            if filtered_images:
+                current_latest_image = filtered_images[0]
+            else:
+                current_latest_image = None
+    
+    return render_template('frame.html', 
+                          latest_image=current_latest_image,
+                          safe_mode=safe_mode)
 
 
 @app.route('/gallery')
 def gallery():
     """Gallery view with grid layout and side preview"""
-    with cache_lock:
-        # Initial batch size for infinite scrolling (reduced for performance)
-        initial_batch_size = 50
-        
-        # Get selected subfolder (if any)
-        selected_subfolder = request.args.get('subfolder', '')
-        
-        # Get search query (if any)
-        search_query = request.args.get('search', '')
-        
-        # Get media type filter (if any)
-        media_type = request.args.get('media_type', 'all')
-        
-        # Check if safe mode is enabled (cookie or config default for first visit)
-        safe_mode_cookie = request.cookies.get('safeMode')
-        if safe_mode_cookie is not None:
-            safe_mode = safe_mode_cookie == 'true'
-        else:
-            # First visit - use config default
-            safe_mode = CONFIG.get('SAFE_MODE_DEFAULT', False)
-        
-        # Check if archive view is enabled (cookie or config default)
-        hide_archive_cookie = request.cookies.get('hideArchive')
-        if hide_archive_cookie is not None:
-            hide_archive = hide_archive_cookie == 'true'
-        else:
-            hide_archive = CONFIG.get('HIDE_ARCHIVE_DEFAULT', False)
-        
-        # Check if content lock is enabled (cookie or config default)
-        content_lock_cookie = request.cookies.get('contentLock')
-        if content_lock_cookie is not None:
-            content_lock = content_lock_cookie == 'true'
-        else:
-            content_lock = CONFIG.get('CONTENT_LOCK_DEFAULT', False)
-        
-        # Get recursive flag (default True)
-        recursive = request.args.get('recursive', 'true') == 'true'
-        
-        # Filter images by selected subfolder
-        filtered_images = image_list
-        if selected_subfolder:
-            # Normalize to forward slashes for consistent comparison
-            selected_subfolder_normalized = selected_subfolder.replace('\\', '/')
-            
-            if recursive:
-                # Show ALL images within the selected folder and any nested subfolders
-                filtered_images = [img for img in image_list 
-                                 if img.get('subfolder', '').replace('\\', '/').startswith(selected_subfolder_normalized)]
-            else:
-                # Show ONLY images in the selected folder (exact match)
-                filtered_images = [img for img in image_list 
-                                 if img.get('subfolder', '').replace('\\', '/') == selected_subfolder_normalized]
-        
-        # Filter by search query if provided
-        if search_query:
-            search_query = search_query.lower()
-            filtered_images = [img for img in filtered_images if 
-                              search_query in img['filename'].lower() or 
-                              search_query in img.get('metadata', {}).get('prompt', '').lower() or
-                              search_query in img.get('metadata', {}).get('model', '').lower()]
-        
-        # Filter by media type if specified
-        if media_type == 'photos':
-            filtered_images = [img for img in filtered_images if img.get('media_type') == 'image']
-        elif media_type == 'videos':
-            filtered_images = [img for img in filtered_images if img.get('media_type') == 'video']
-        
-        # Filter out archive content if hide archive is enabled
-        if hide_archive:
-            filtered_images = [img for img in filtered_images 
-                             if 'archive' not in img.get('subfolder', '').lower().split('/')]
-        
-        # Filter out NSFW content if safe mode is enabled
-        if safe_mode:
-            filtered_images = [img for img in filtered_images if not img.get('is_nsfw', False)]
-        
-        # Filter out content-locked files if content lock is enabled
-        if content_lock:
-            filtered_images = [img for img in filtered_images if not img.get('is_content_locked', False)]
-        
-        # Parse breadcrumb path (split by / for nested folders)
-        breadcrumb_parts = selected_subfolder.split('/') if selected_subfolder else []
-        
-        # Extract SIBLING folders (parallel folders at same level as selected folder)
-        sibling_folders = []
-        if selected_subfolder:
-            # Get parent folder path
-            selected_normalized = selected_subfolder.replace('\\', '/')
-            if '/' in selected_normalized:
-                parent_path = '/'.join(selected_normalized.split('/')[:-1])
-                # Current folder name (last part)
-                current_folder = selected_normalized.split('/')[-1]
-            else:
-                # Selected folder is top-level, so parent is root
-                parent_path = ''
-                current_folder = selected_normalized
-            
-            # Find all folders at the same level (siblings)
-            sibling_set = set()
-            for img in image_list:
-                img_folder_normalized = img.get('subfolder', '').replace('\\', '/')
-                
-                if parent_path:
-                    # Looking for siblings under parent
-                    if img_folder_normalized.startswith(parent_path + '/'):
-                        remaining = img_folder_normalized[len(parent_path) + 1:]
-                        if '/' in remaining:
-                            sibling = remaining.split('/')[0]
-                        else:
-                            sibling = remaining
-                        if sibling:
-                            sibling_set.add(sibling)
-                else:
-                    # Looking for top-level siblings
-                    parts = img_folder_normalized.split('/')
-                    if parts and parts[0]:
-                        sibling_set.add(parts[0])
-            
-            sibling_folders = sorted(sibling_set)
-        
-        # Extract child subfolders from filtered images (ONLY immediate children)
-        child_folders = set()
-        if selected_subfolder:
-            # Normalize selected_subfolder to use forward slashes
-            selected_subfolder_normalized = selected_subfolder.replace('\\', '/')
-            
-            for img in filtered_images:
-                # Check if this image is in a subfolder of the selected folder
-                img_folder = img.get('subfolder', '').replace('\\', '/')  # Normalize to forward slashes
-                
-                # If image folder starts with selected folder + '/', it's in a child
-                if img_folder.startswith(selected_subfolder_normalized + '/'):
-                    # Get the remaining path after selected folder
-                    remaining_path = img_folder[len(selected_subfolder_normalized) + 1:]
-                    # Get ONLY the first part (immediate child folder)
-                    if '/' in remaining_path:
-                        child_folder = remaining_path.split('/')[0]
-                    else:
-                        # The remaining path IS the child folder (no further nesting)
-                        child_folder = remaining_path
-                    if child_folder:
-                        child_folders.add(child_folder)
-                elif img_folder == selected_subfolder_normalized:
-                    # Image is directly in selected folder (not in a subfolder)
-                    # Don't add to child_folders
-                    pass
-        
-        child_folders = sorted(child_folders)
-        
-        # Get initial batch of images
-        initial_images = filtered_images[:initial_batch_size]
-        
-        return render_template('gallery.html', 
-                              images=initial_images,
-                              subfolders=subfolders,
-                              selected_subfolder=selected_subfolder,
-                              breadcrumb_parts=breadcrumb_parts,
-                              sibling_folders=sibling_folders,
-                              child_folders=child_folders,
-                              current_folder=selected_subfolder.split('/')[-1] if selected_subfolder else '',
-                              config=CONFIG,
-                              safe_mode=safe_mode,
-                              media_type=media_type,
-                              total_images=len(filtered_images),
-                              recursive=recursive)
+    # Immutable index snapshot: the render never waits on directory syncs or watcher updates
+    snapshot = media_index.snapshot()
+    
+    # Initial batch size for infinite scrolling (reduced for performance)
+    initial_batch_size = 50
+    
+    # Get selected subfolder (if any)
+    selected_subfolder = request.args.get('subfolder', '')
+    
+    # Get search query (if any)
+    search_query = request.args.get('search', '')
+    
+    # Get media type filter (if any)
+    media_type = request.args.get('media_type', 'all')
+    
+    # Safe mode, content lock and hide archive (cookies or config defaults for first visit)
+    safe_mode, content_lock, hide_archive = get_visibility_flags()
+    
+    # Get recursive flag (default True)
+    recursive = request.args.get('recursive', 'true') == 'true'
+    
+    # Filter by selected subfolder (recursive = include nested subfolders), media type,
+    # archive, safe mode, content lock and search query
+    filtered_images = snapshot.filter(folder=selected_subfolder.replace('\\', '/'),
+                                      recursive=recursive,
+                                      media_type=MEDIA_TYPE_FILTERS.get(media_type, 'all'),
+                                      hide_nsfw=safe_mode,
+                                      hide_locked=content_lock,
+                                      hide_archived=hide_archive,
+                                      search=search_query)
+    
+    # Parse breadcrumb path (split by / for nested folders)
+    breadcrumb_parts = selected_subfolder.split('/') if selected_subfolder else []
+    
+    # Sibling and child folders are lookups in the snapshot's folder tree
+    sibling_folders = []
+    child_folders = []
+    if selected_subfolder:
+        selected_normalized = selected_subfolder.replace('\\', '/')
+        
+        # SIBLING folders (parallel folders at same level as selected folder)
+        parent_path = selected_normalized.rsplit('/', 1)[0] if '/' in selected_normalized else ''
+        parent = snapshot.folders.find(parent_path)
+        if parent is not None:
+            sibling_folders = parent.child_names()
+        
+        # Immediate CHILD folders that hold something visible with the current filters
+        selected = snapshot.folders.find(selected_normalized)
+        if selected is not None:
+            child_folders = [name for name in selected.child_names()
+                             if selected.children[name].has_visible(media_type=MEDIA_TYPE_FILTERS.get(media_type, 'all'),
+                                                                    hide_nsfw=safe_mode,
+                                                                    hide_locked=content_lock,
+                                                                    hide_archived=hide_archive)]
+    
+    # Get initial batch of images
+    initial_images = filtered_images[:initial_batch_size]
+    has_more = len(filtered_images) > len(initial_images)
+    prioritize_enrichment(initial_images)
+    
+    return render_template('gallery.html', 
+                          images=initial_images,
+                          next_cursor=encode_cursor(initial_images[-1]) if has_more else '',
+                          subfolders=subfolders,
+                          selected_subfolder=selected_subfolder,
+                          breadcrumb_parts=breadcrumb_parts,
+                          sibling_folders=sibling_folders,
+                          child_folders=child_folders,
+                          current_folder=selected_subfolder.split('/')[-1] if selected_subfolder else '',
+                          config=CONFIG,
+                          safe_mode=safe_mode,
+                          media_type=media_type,
+                          total_images=len(filtered_images),
+                          recursive=recursive)
 
 
 @app.route('/load_more_images')
 def load_more_images():
-    """API endpoint for loading more images (infinite scroll)"""
-    # Check if scan is in progress - tell client to retry later
-    if scan_in_progress:
-        return jsonify({
-            'images': [],
-            'has_more': True,
-            'total': 0,
-            'scanning': True  # Tell frontend to wait and retry
-        })
-    
-    # Get pagination parameters - use explicit offset instead of page to avoid mismatches
+    """
+    API endpoint for loading more images (infinite scroll). Served from the
+    index snapshot, so batches keep coming while a directory sync runs.
+    """
+    # Get pagination parameters - a cursor (last item shown) keeps batches stable while
+    # new images arrive; an explicit offset is still accepted for older clients
+    cursor = decode_cursor(request.args.get('cursor', ''))
     offset = request.args.get('offset', type=int, default=0)
     batch_size = 20  # Number of images to load per batch
     
@@ -1298,83 +1575,37 @@ def load_more_images():
     # Get media type filter (if any)
     media_type = request.args.get('media_type', 'all')
     
-    # Check if safe mode is enabled (from query param, cookie, or config default)
+    # Safe mode, content lock and hide archive (cookies or config defaults for first visit);
+    # ?safe_mode=true forces safe mode on
+    safe_mode, content_lock, hide_archive = get_visibility_flags()
     if request.args.get('safe_mode') == 'true':
         safe_mode = True
-    else:
-        safe_mode_cookie = request.cookies.get('safeMode')
-        if safe_mode_cookie is not None:
-            safe_mode = safe_mode_cookie == 'true'
-        else:
-            # First visit - use config default
-            safe_mode = CONFIG.get('SAFE_MODE_DEFAULT', False)
     
-    # Check if archive view is enabled (cookie or config default)
-    hide_archive_cookie = request.cookies.get('hideArchive')
-    if hide_archive_cookie is not None:
-        hide_archive = hide_archive_cookie == 'true'
-    else:
-        hide_archive = CONFIG.get('HIDE_ARCHIVE_DEFAULT', False)
-    
-    # Check if content lock is enabled (cookie or config default)
-    content_lock_cookie = request.cookies.get('contentLock')
-    if content_lock_cookie is not None:
-        content_lock = content_lock_cookie == 'true'
-    else:
-        content_lock = CONFIG.get('CONTENT_LOCK_DEFAULT', False)
-    
-    # Filter images by selected subfolder
-    filtered_images = image_list
-    if selected_subfolder:
-        # Normalize to forward slashes for consistent comparison
-        selected_subfolder_normalized = selected_subfolder.replace('\\', '/')
-        
-        if recursive:
-            # Show ALL images within the selected folder and any nested subfolders
-            filtered_images = [img for img in image_list 
-                             if img.get('subfolder', '').replace('\\', '/').startswith(selected_subfolder_normalized)]
-        else:
-            # Show ONLY images in the selected folder (exact match)
-            filtered_images = [img for img in image_list 
-                             if img.get('subfolder', '').replace('\\', '/') == selected_subfolder_normalized]
-    
-    # Filter by search query if provided
-    if search_query:
-        search_query = search_query.lower()
-        filtered_images = [img for img in filtered_images if 
-                          search_query in img['filename'].lower() or 
-                          search_query in img.get('metadata', {}).get('prompt', '').lower() or
-                          search_query in img.get('metadata', {}).get('model', '').lower()]
-    
-    # Filter by media type if specified
-    if media_type == 'photos':
-        filtered_images = [img for img in filtered_images if img.get('media_type') == 'image']
-    elif media_type == 'videos':
-        filtered_images = [img for img in filtered_images if img.get('media_type') == 'video']
-    
-    # Filter out archive content if hide archive is enabled
-    if hide_archive:
-        filtered_images = [img for img in filtered_images 
-                         if 'archive' not in img.get('subfolder', '').lower().split('/')]
-    
-    # Filter out NSFW content if safe mode is enabled
-    if safe_mode:
-        filtered_images = [img for img in filtered_images if not img.get('is_nsfw', False)]
-    
-    # Filter out content-locked files if content lock is enabled
-    if content_lock:
-        filtered_images = [img for img in filtered_images if not img.get('is_content_locked', False)]
+    # Filter by selected subfolder (recursive = include nested subfolders), media type,
+    # archive, safe mode, content lock and search query
+    filtered_images = media_index.filter(folder=selected_subfolder.replace('\\', '/'),
+                                         recursive=recursive,
+                                         media_type=MEDIA_TYPE_FILTERS.get(media_type, 'all'),
+                                         hide_nsfw=safe_mode,
+                                         hide_locked=content_lock,
+                                         hide_archived=hide_archive,
+                                         search=search_query)
     
     # Debug log for infinite scroll issues
     if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
         print("=" * 80)
-        print(f"[LOAD MORE] offset={offset}, filtered_count={len(filtered_images)}, safe_mode={safe_mode}")
+        print(f"[LOAD MORE] cursor={cursor}, offset={offset}, filtered_count={len(filtered_images)}, safe_mode={safe_mode}")
         print(f"[LOAD MORE] subfolder='{selected_subfolder}', media_type='{media_type}', recursive={recursive}")
-        print(f"[LOAD MORE] batch will be [{offset}:{offset + batch_size}]")
         print("=" * 80)
     
-    # Get batch of images
-    batch_images = filtered_images[offset:offset + batch_size]
+    # Get batch of images (one extra to tell whether more follow)
+    if cursor is not None:
+        batch_images = page_after(filtered_images, cursor, batch_size + 1)
+    else:
+        batch_images = filtered_images[offset:offset + batch_size + 1]
+    has_more = len(batch_images) > batch_size
+    batch_images = batch_images[:batch_size]
+    prioritize_enrichment(batch_images)
     
     # Convert to JSON-serializable format (only include necessary fields)
     serialized_images = []
@@ -1382,116 +1613,212 @@ def load_more_images():
         serialized_images.append({
             'filename': img.get('filename', ''),
             'subfolder': img.get('subfolder', ''),
-            'media_type': img.get('media_type', 'image')
+            'media_type': img.get('media_type', 'image'),
+            'mod_time': img.get('mod_time', 0)
         })
     
     # Return JSON response
     return jsonify({
         'images': serialized_images,
-        'has_more': offset + batch_size < len(filtered_images),
+        'has_more': has_more,
+        'next_cursor': encode_cursor(batch_images[-1]) if has_more else None,
         'total': len(filtered_images)
     })
 
 
+# Fallback MIME types for videos the platform's mimetypes table may not know
+VIDEO_MIMETYPES = {
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.mov': 'video/quicktime',
+    '.avi': 'video/x-msvideo',
+    '.mkv': 'video/x-matroska',
+    '.m4v': 'video/x-m4v'
+}
+
+_mimetype_cache = {}
+
+
+def media_mimetype(filename):
+    """MIME type for a media file name (looked up once per extension)"""
+    ext = os.path.splitext(filename)[1].lower()
+    mimetype = _mimetype_cache.get(ext)
+    if mimetype is None:
+        mimetype = mimetypes.guess_type('file' + ext)[0] or VIDEO_MIMETYPES.get(ext, 'application/octet-stream')
+        _mimetype_cache[ext] = mimetype
+    return mimetype
+
+
+def _http_time(timestamp):
+    """HTTP dates have whole-second resolution"""
+    return datetime.fromtimestamp(int(timestamp), timezone.utc)
+
+
+def _media_cache_control(mod_time):
+    # Only a URL versioned with the file's mtime (?v=...) names fixed bytes; plain
+    # URLs may see the file rewritten in place, so they revalidate every time
+    max_age = CONFIG.get('MEDIA_CACHE_MAX_AGE', 604800)
+    if max_age <= 0 or request.args.get('v') != str(int(mod_time)):
+        return 'private, no-cache'
+    return f'private, max-age={max_age}, immutable'
+
+
 @app.route('/image/<path:filename>')
 def serve_image(filename):
-    """Serve original images and videos from any subfolder depth with range request support for iOS"""
+    """
+    Serve original images and videos from any subfolder depth, with range
+    request support (required for iOS Safari and robust Chrome playback).
+    The file is handed to the server's file wrapper (sendfile where supported)
+    for full and ranged responses alike. ETag/Last-Modified come from the file
+    index, so revalidations are answered with 304 without touching the disk.
+    URLs versioned with ?v=<mtime> are cached as immutable, others revalidate.
+    """
+    full_file_path = safe_join(CONFIG['IMAGE_FOLDER'], filename)
+    if full_file_path is None:
+        return "File not found", 404
     
-    # Split the path to handle nested subfolders
-    path_parts = filename.split('/')
+    mimetype = media_mimetype(full_file_path)
+    record = media_index.get(full_file_path)
     
-    # The last part is the actual filename
-    actual_filename = path_parts[-1]
+    def conditional_headers(response, etag, mod_time):
+        response.set_etag(etag)
+        response.last_modified = _http_time(mod_time)
+        response.headers['Cache-Control'] = _media_cache_control(mod_time)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        return response
     
-    # The rest is the subfolder path
-    subfolder_path = '/'.join(path_parts[:-1])
+    # Revalidation of an indexed file: answer from the index's stat data
+    if record is not None and record.get('size') is not None:
+        etag = media_etag(record['mod_time'], record['size'])
+        if not is_resource_modified(request.environ, etag=etag,
+                                    last_modified=_http_time(record['mod_time'])):
+            return conditional_headers(Response(status=304), etag, record['mod_time'])
     
-    # Construct the full directory path
-    full_dir_path = os.path.join(CONFIG['IMAGE_FOLDER'], subfolder_path)
-    full_file_path = os.path.join(full_dir_path, actual_filename)
+    opened = open_media(full_file_path)
+    if opened is None:
+        return "File not found", 404
+    f, file_size, mod_time = opened
+    
+    # Validators of the file actually being sent (the index may lag behind a rewrite)
+    etag = media_etag(mod_time, file_size)
+    if not is_resource_modified(request.environ, etag=etag,
+                                last_modified=_http_time(mod_time)):
+        f.close()
+        return conditional_headers(Response(status=304), etag, mod_time)
+    
+    byte_range = None
+    requested = request.range
+    if requested is not None and len(requested.ranges) == 1:
+        # If-Range: only honour the range if the client's copy is still current
+        if_range = request.if_range
+        stale = (if_range.etag and if_range.etag != etag) or \
+            (if_range.date and int(if_range.date.timestamp()) != int(mod_time))
+        if not stale:
+            byte_range = requested.range_for_length(file_size)
+            if byte_range is None:
+                f.close()
+                response = Response(status=416)
+                response.headers['Content-Range'] = f'bytes */{file_size}'
+                return conditional_headers(response, etag, mod_time)
+    
+    response = Response(media_body(request.environ, f, byte_range), mimetype=mimetype, direct_passthrough=True)
+    if byte_range is not None:
+        start, stop = byte_range
+        response.status_code = 206
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{file_size}'
+        response.content_length = stop - start
+        if CONFIG.get('LOGGING_LEVEL') == 'debug':
+            print(f"[MEDIA] Streaming range {start}-{stop - 1}/{file_size} for {os.path.basename(full_file_path)}")
+    else:
+        response.content_length = file_size
+    return conditional_headers(response, etag, mod_time)
+
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+# Named thumbnail sizes -> config keys
+THUMBNAIL_PRESETS = {
+    'home': 'HOME_THUMBNAIL_SIZE',
+    'gallery': 'GALLERY_THUMBNAIL_SIZE',
+    'preview': 'GALLERY_PREVIEW_SIZE',
+}
+
+# Thumbnails are rendered at twice the configured size so they stay sharp on
+# high-DPI screens and when the grid size slider is turned up
+THUMBNAIL_SCALE = 2
+
+THUMBNAIL_EXTENSIONS = tuple(ext for ext in IMAGE_EXTENSIONS if ext != '.gif')
+
+
+def get_thumbnail_cache():
+    """Lazy-load the thumbnail cache (creates the cache folder on first use)"""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        with _thumbnail_cache_lock:
+            if _thumbnail_cache is None:
+                cache_dir = CONFIG.get('THUMBNAIL_CACHE_DIR') or 'thumbnail_cache'
+                if not os.path.isabs(cache_dir):
+                    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), cache_dir)
+                _thumbnail_cache = ThumbnailCache(
+                    cache_dir,
+                    max(CONFIG.get('THUMBNAIL_CACHE_SIZE_MB', 1024), 1) * 1024 * 1024,
+                    CONFIG.get('THUMBNAIL_FORMAT', 'jpeg')
+                )
+    return _thumbnail_cache
+
+
+@app.route('/thumb/<size>/<path:filename>')
+def serve_thumbnail(size, filename):
+    """
+    Serve a resized copy of an image from the thumbnail cache.
+    `size` is a preset name (home, gallery, preview) or one of the configured
+    WIDTHxHEIGHT sizes. Videos are redirected to the original file.
+    """
+    if size in THUMBNAIL_PRESETS:
+        dimensions = parse_size(CONFIG.get(THUMBNAIL_PRESETS[size], ''))
+    elif size in {CONFIG.get(key) for key in THUMBNAIL_PRESETS.values()}:
+        dimensions = parse_size(size)
+    else:
+        return "Unknown thumbnail size", 404
+    if dimensions is None:
+        return "Invalid thumbnail size", 404
     
-    # Check if file exists
-    if not os.path.exists(full_file_path):
+    full_file_path = safe_join(CONFIG['IMAGE_FOLDER'], filename)
+    if full_file_path is None:
         return "File not found", 404
     
-    # Determine MIME type based on file extension
-    mimetype, _ = mimetypes.guess_type(actual_filename)
-    
-    # If mimetype couldn't be guessed, set defaults based on extension
-    if not mimetype:
-        ext = os.path.splitext(actual_filename)[1].lower()
-        video_mimes = {
-            '.mp4': 'video/mp4',
-            '.webm': 'video/webm',
-            '.mov': 'video/quicktime',
-            '.avi': 'video/x-msvideo',
-            '.mkv': 'video/x-matroska',
-            '.m4v': 'video/x-m4v'
-        }
-        mimetype = video_mimes.get(ext, 'application/octet-stream')
-    
-    # Check if this is a video file
-    is_video = mimetype and mimetype.startswith('video/')
-    
-    # For videos, support range requests (required for iOS Safari and robust Chrome playback)
-    if is_video:
-        file_size = os.path.getsize(full_file_path)
-        range_header = request.headers.get('Range', None)
-        
-        if range_header:
-            # Parse range header
-            byte_range = range_header.replace('bytes=', '').split('-')
-            start = int(byte_range[0]) if byte_range[0] else 0
-            end = int(byte_range[1]) if len(byte_range) > 1 and byte_range[1] else file_size - 1
-            length = end - start + 1
-            
-            # Stream the requested range to handle disconnections gracefully and save memory
-            def generate_range(path, start_pos, total_length):
-                with open(path, 'rb') as f_stream:
-                    f_stream.seek(start_pos)
-                    bytes_sent = 0
-                    while bytes_sent < total_length:
-                        # Use 128KB chunks for a good balance between overhead and responsiveness
-                        chunk_size = min(total_length - bytes_sent, 128 * 1024)
-                        chunk = f_stream.read(chunk_size)
-                        if not chunk:
-                            break
-                        yield chunk
-                        bytes_sent += len(chunk)
-            
-            # Return 206 Partial Content response using a generator
-            # direct_passthrough=True allows Eventlet/WSGI to handle the stream efficiently
-            response = Response(generate_range(full_file_path, start, length), 206, mimetype=mimetype, direct_passthrough=True)
-            response.headers['Content-Range'] = f'bytes {start}-{end}/{file_size}'
-            response.headers['Accept-Ranges'] = 'bytes'
-            response.headers['Content-Length'] = str(length)
-            response.headers['X-Content-Type-Options'] = 'nosniff'
-            response.headers['Cache-Control'] = 'no-cache, must-revalidate'
-            
-            if CONFIG.get('LOGGING_LEVEL') == 'debug':
-                print(f"[MEDIA] Streaming range {start}-{end}/{file_size} for {actual_filename}")
-                
-            return response
-        else:
-            # No range request, send full file
-            # send_from_directory handles most headers, but we'll ensure range support is explicitly signaled
-            response = send_from_directory(full_dir_path, actual_filename, mimetype=mimetype)
-            response.headers['Accept-Ranges'] = 'bytes'
-            response.headers['X-Content-Type-Options'] = 'nosniff'
-            return response
+    # Indexed files are served from the index's mtime/size, without a stat call
+    record = media_index.records.get(os.path.normpath(full_file_path))
+    if record is not None and record.get('size') is not None:
+        mod_time, file_size = record['mod_time'], record['size']
     else:
-        # For images, use standard serving
-        response = send_from_directory(full_dir_path, actual_filename, mimetype=mimetype)
-        response.headers.add('X-Content-Type-Options', 'nosniff')
-        return response
+        if not os.path.isfile(full_file_path):
+            return "File not found", 404
+        stat = os.stat(full_file_path)
+        mod_time, file_size = stat.st_mtime, stat.st_size
+    
+    # Videos and (possibly animated) GIFs are shown as-is
+    if not filename.lower().endswith(THUMBNAIL_EXTENSIONS):
+        return redirect(url_for('serve_image', filename=filename, v=int(mod_time)))
+    
+    cache = get_thumbnail_cache()
+    thumb_path = cache.get(full_file_path, mod_time, file_size,
+                           (dimensions[0] * THUMBNAIL_SCALE, dimensions[1] * THUMBNAIL_SCALE))
+    if thumb_path is None:
+        # Pillow couldn't decode it - let the browser try the original
+        return redirect(url_for('serve_image', filename=filename, v=int(mod_time)))
+    
+    response = send_file(thumb_path, mimetype=cache.mimetype, conditional=True, max_age=86400)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
 
 
 
 @app.route('/delete_image/<path:filename>', methods=['DELETE'])
 def delete_image(filename):
     """Delete an image or video file"""
-    global image_list, latest_image, latest_image_timestamp
-    
     # Check permissions
     if not can_delete():
         return jsonify({'success': False, 'error': 'Permission denied. Admin access required.'}), 403
@@ -1508,18 +1835,8 @@ def delete_image(filename):
         os.remove(file_path)
         print(f"🗑️ [DELETE] Deleted file: {file_path}")
         
-        # Remove from image_list
-        with cache_lock:
-            image_list = [img for img in image_list if not (img['subfolder'] + '/' + img['filename'] == filename)]
-            
-            # Update latest_image if it was the deleted one
-            if latest_image and (latest_image['subfolder'] + '/' + latest_image['filename'] == filename):
-                if image_list:
-                    latest_image = image_list[0]
-                    latest_image_timestamp = latest_image['mod_time']
-                else:
-                    latest_image = None
-                    latest_image_timestamp = 0
+        # Remove from the file index (the watcher delete event is then a no-op)
+        remove_from_index(file_path)
         
         return jsonify({'success': True, 'message': 'File deleted successfully'})
     
@@ -1531,8 +1848,6 @@ def delete_image(filename):
 @app.route('/flag_nsfw/<path:filename>', methods=['POST'])
 def flag_nsfw(filename):
     """Move a file to NSFW subfolder"""
-    global image_list
-    
     # Check permissions
     if not can_flag():
         return jsonify({'success': False, 'error': 'Permission denied. Insufficient access level.'}), 403
@@ -1554,8 +1869,8 @@ def flag_nsfw(filename):
         if new_path:
             print(f"🟥 [FLAG NSFW] Moved file to: {new_path}")
             
-            # Trigger rescan to update image list
-            threading.Thread(target=scan_images, daemon=True).start()
+            # Apply the move to the file index
+            move_in_index(file_path, new_path)
             
             return jsonify({
                 'success': True, 
@@ -1573,8 +1888,6 @@ def flag_nsfw(filename):
 @app.route('/unflag_nsfw/<path:filename>', methods=['POST'])
 def unflag_nsfw(filename):
     """Move a file from NSFW subfolder back to parent folder"""
-    global image_list
-    
     # Check permissions
     if not can_flag():
         return jsonify({'success': False, 'error': 'Permission denied. Insufficient access level.'}), 403
@@ -1611,8 +1924,8 @@ def unflag_nsfw(filename):
         shutil.move(file_path, dest_path)
         print(f"🟩 [UNFLAG NSFW] Moved file to: {dest_path}")
         
-        # Trigger rescan to update image list
-        threading.Thread(target=scan_images, daemon=True).start()
+        # Apply the move to the file index
+        move_in_index(file_path, dest_path)
         
         return jsonify({
             'success': True, 
@@ -1628,8 +1941,6 @@ def unflag_nsfw(filename):
 @app.route('/mark_safe/<path:filename>', methods=['POST'])
 def mark_safe(filename):
     """Move a file to SAFE folder to prevent re-flagging"""
-    global image_list
-    
     # Check permissions
     if not can_mark_safe():
         return jsonify({'success': False, 'error': 'Permission denied. Insufficient access level.'}), 403
@@ -1651,8 +1962,8 @@ def mark_safe(filename):
         if new_path:
             print(f"🟩 [MARK SAFE] Moved file to: {new_path}")
             
-            # Trigger rescan to update image list
-            threading.Thread(target=scan_images, daemon=True).start()
+            # Apply the move to the file index
+            move_in_index(file_path, new_path)
             
             return jsonify({
                 'success': True, 
@@ -1669,40 +1980,49 @@ def mark_safe(filename):
 
 @app.route('/image_info/<path:filename>')
 def image_info(filename):
-    """Get image metadata - combines filename parsing with embedded metadata"""
+    """
+    Get image metadata - combines filename parsing with embedded metadata.
+    `filename` is the path relative to IMAGE_FOLDER (subfolder/filename); a
+    bare filename is still accepted and matches the newest file of that name.
+    """
     if CONFIG.get('LOGGING_LEVEL') == 'debug':
         print(f"[DEBUG] image_info requested for: {filename}")
-    for img in image_list:
-        if img['filename'] == filename:
-            # Start with filename-based metadata
-            result = dict(img['metadata'])
-            
-            # Try to extract embedded metadata from the file
-            try:
-                if metadata_extraction_enabled:
-                    embedded = extract_embedded_metadata(img['path'])
-                    if embedded:
-                        if CONFIG.get('LOGGING_LEVEL') == 'debug':
-                            print(f"[DEBUG] Embedded metadata found for {filename}: {embedded.keys()}")
-                    
-                    # Merge embedded logic into existing metadata
-                    # We prioritize embedded data over filename-parsed data if available
-                    if embedded.get('prompt'):
-                        result['prompt'] = embedded['prompt']
-                    if embedded.get('negative_prompt'):
-                        result['negative_prompt'] = embedded['negative_prompt']
-                    if embedded.get('seed'):
-                        result['seed'] = embedded['seed']
-                    if embedded.get('model'):
-                        result['model'] = embedded['model']
-                    if embedded.get('dimensions'):
-                        result['dimensions'] = embedded['dimensions']
-                    if embedded.get('loras'):
-                        result['loras'] = embedded['loras']
-            except Exception as e:
-                print(f"🏷️ [METADATA] Error extracting embedded metadata: {e}")
-            
-            return jsonify(result)
+    
+    img = media_index.get(os.path.join(CONFIG['IMAGE_FOLDER'], filename))
+    if img is None and '/' not in filename:
+        with cache_lock:
+            img = next((item for item in image_list if item['filename'] == filename), None)
+    
+    if img is not None:
+        # Start with filename-based metadata
+        result = dict(img['metadata'])
+        
+        # Try to extract embedded metadata from the file
+        try:
+            if metadata_extraction_enabled:
+                embedded = extract_embedded_metadata(img['path'])
+                if embedded:
+                    if CONFIG.get('LOGGING_LEVEL') == 'debug':
+                        print(f"[DEBUG] Embedded metadata found for {filename}: {embedded.keys()}")
+                
+                # Merge embedded logic into existing metadata
+                # We prioritize embedded data over filename-parsed data if available
+                if embedded.get('prompt'):
+                    result['prompt'] = embedded['prompt']
+                if embedded.get('negative_prompt'):
+                    result['negative_prompt'] = embedded['negative_prompt']
+                if embedded.get('seed'):
+                    result['seed'] = embedded['seed']
+                if embedded.get('model'):
+                    result['model'] = embedded['model']
+                if embedded.get('dimensions'):
+                    result['dimensions'] = embedded['dimensions']
+                if embedded.get('loras'):
+                    result['loras'] = embedded['loras']
+        except Exception as e:
+            print(f"🏷️ [METADATA] Error extracting embedded metadata: {e}")
+        
+        return jsonify(result)
     return jsonify({})
 
 
@@ -2169,6 +2489,7 @@ def get_settings():
             'CONTENT_SCAN_OFFSET': CONFIG.get('CONTENT_SCAN_OFFSET', 0),
             'NUDITY_THRESHOLD': CONFIG.get('NUDITY_THRESHOLD', 0.5),
             'NSFW_KEYWORDS': ', '.join(CONFIG.get('NSFW_KEYWORDS', [])),
+            'NSFW_KEYWORDS_WHOLE_WORDS': CONFIG.get('NSFW_KEYWORDS_WHOLE_WORDS', False),
             'NSFW_FOLDERS': ', '.join(CONFIG.get('NSFW_FOLDERS', [])),
             'NSFW_LABELS': ', '.join(CONFIG.get('NSFW_LABELS', [])),
             'SAFE_FOLDERS': ', '.join(CONFIG.get('SAFE_FOLDERS', []))
@@ -2209,6 +2530,7 @@ def save_settings():
             config.write(f)
         
         # Reload config
+        previous_classification = _classification_signature()
         CONFIG = load_config()
         
         # Update content scanner with new settings
@@ -2217,9 +2539,16 @@ def save_settings():
             CONFIG.get('NUDITY_THRESHOLD', 0.5),
             CONFIG.get('NSFW_LABELS', []),
             CONFIG.get('SAFE_FOLDERS', ['SAFE']),
-            logging_level=CONFIG.get('LOGGING_LEVEL', 'basic')
+            logging_level=CONFIG.get('LOGGING_LEVEL', 'basic'),
+            video_frames=CONFIG.get('VIDEO_SCAN_FRAMES', 5),
+            keyword_whole_words=CONFIG.get('NSFW_KEYWORDS_WHOLE_WORDS', False)
         )
         
+        # Re-derive NSFW / content lock flags if the keyword or folder lists changed
+        # (after set_config, which rebuilds the keyword matcher)
+        if _classification_signature() != previous_classification:
+            threading.Thread(target=reclassify_index, daemon=True).start()
+        
         if CONFIG.get('LOGGING_LEVEL') in ('detailed', 'debug'):
             print(f"[Settings] Saved {len(settings)} settings to config.ini")
         return jsonify({'success': True, 'message': 'Settings saved successfully'})
@@ -2260,6 +2589,11 @@ def toggle_metadata_extraction():
     enabled = data.get('enabled', not metadata_extraction_enabled)
     metadata_extraction_enabled = enabled
     
+    if enabled:
+        start_metadata_enrichment()
+    else:
+        enrichment_service.clear()
+    
     status = "enabled" if enabled else "disabled"
     print(f"[MetadataExtraction] Metadata extraction {status}")
     
@@ -2279,12 +2613,46 @@ def get_content_scan_status():
     })
 
 
+@app.route('/api/folders')
+def api_folders():
+    """
+    Folder tree with per-folder counts (total / images / videos / nsfw /
+    locked) and newest file, from the index snapshot. ?folder= selects the
+    folder (default: the library root), ?depth= how many levels of
+    subfolders to include (default 1, up to 32). Subfolders with nothing
+    visible under the caller's Safe Mode / Content Lock / Hide Archive
+    settings are left out.
+    """
+    snapshot = media_index.snapshot()
+    node = snapshot.folders.find(request.args.get('folder', ''))
+    if node is None:
+        return jsonify({'error': 'Folder not found'}), 404
+    
+    safe_mode, content_lock, hide_archive = get_visibility_flags()
+    depth = min(max(request.args.get('depth', type=int, default=1), 0), 32)
+    return jsonify(node.to_dict(depth,
+                                media_type=MEDIA_TYPE_FILTERS.get(request.args.get('media_type', 'all'), 'all'),
+                                hide_nsfw=safe_mode,
+                                hide_locked=content_lock,
+                                hide_archived=hide_archive))
+
+
+@app.route('/index_memory')
+def index_memory():
+    """Memory held by the file index records (compact layout vs. plain dicts) and the process RSS"""
+    report = memory_report(media_index.snapshot().items)
+    report['process_rss'] = psutil.Process().memory_info().rss
+    return jsonify(report)
+
+
 @app.route('/get_metadata_extraction_status')
 def get_metadata_extraction_status():
     """Get current metadata extraction toggle state and default settings"""
     return jsonify({
         'enabled': metadata_extraction_enabled,
-        'metadata_extraction_default': CONFIG.get('METADATA_EXTRACTION_DEFAULT', True)
+        'metadata_extraction_default': CONFIG.get('METADATA_EXTRACTION_DEFAULT', True),
+        'cache': get_cache_stats(),
+        'enrichment': enrichment_service.stats()
     })
 
 
@@ -2310,6 +2678,7 @@ def scan_folder():
         'processed': 0,
         'total': 0,
         'moved': 0,
+        'rate': 0,
         'current': 'Starting scan...',
         'complete': False
     }
@@ -2320,7 +2689,11 @@ def scan_folder():
         final_progress = {'processed': 0, 'total': 0, 'moved': 0, 'complete': True}
         # Skip Archive folder during full scans (no subfolder), allow targeted scans within Archive
         skip_archive = not subfolder
-        for progress in content_scanner.scan_folder_batch(folder_path, batch_size=20, get_metadata_func=get_image_metadata, skip_archive=skip_archive):
+        for progress in content_scanner.scan_folder_batch(folder_path, batch_size=20, get_metadata_func=get_image_metadata, skip_archive=skip_archive,
+                                                          inference_batch_size=CONFIG.get('NUDENET_BATCH_SIZE', 8),
+                                                          prefetch_workers=CONFIG.get('SCAN_PREFETCH_WORKERS', 4),
+                                                          worker_pool=get_scan_worker_pool(),
+                                                          walk_workers=CONFIG.get('DIRECTORY_WALK_WORKERS', 8)):
             content_scan_progress = progress
             final_progress = progress  # Keep track of the last progress
             socketio.emit('scan_progress', progress)
@@ -2343,9 +2716,10 @@ def scan_folder():
 @app.route('/scan_status')
 def scan_status():
     """Get current scan progress"""
-    if content_scan_progress:
-        return jsonify(content_scan_progress)
-    return jsonify({'complete': True, 'processed': 0, 'total': 0, 'moved': 0})
+    progress = dict(content_scan_progress) if content_scan_progress else {'complete': True, 'processed': 0, 'total': 0, 'moved': 0}
+    # Backlog of the live (new file) scan queue
+    progress['live_queue'] = scan_dispatcher.stats()
+    return jsonify(progress)
 
 
 # Archive operation progress
@@ -2371,15 +2745,15 @@ def archive_files():
     folders_to_archive = []
     files_to_archive = []
     
-    for item in os.listdir(image_folder):
-        item_path = os.path.join(image_folder, item)
-        if item.lower() == 'archive':
-            continue
-        if os.path.isdir(item_path):
-            folders_to_archive.append(item)
-        elif os.path.isfile(item_path):
-            # Also handle loose files in root
-            files_to_archive.append(item)
+    with os.scandir(image_folder) as entries:
+        for entry in entries:
+            if entry.name.lower() == 'archive':
+                continue
+            if entry.is_dir():
+                folders_to_archive.append(entry.name)
+            elif entry.is_file():
+                # Also handle loose files in root
+                files_to_archive.append(entry.name)
     
     total_items = len(folders_to_archive) + len(files_to_archive)
     
@@ -2427,16 +2801,18 @@ def archive_files():
                         # Ensure destination exists
                         os.makedirs(dst, exist_ok=True)
                         
-                        items = os.listdir(src)
+                        # scandir: folder checks come from the listing, not a stat per item
+                        with os.scandir(src) as entries:
+                            items = [(entry.name, entry.is_dir()) for entry in entries]
                         if not items:
                             print(f"[Archive]   Empty folder: {src}")
                             return
                             
-                        for item in items:
+                        for item, is_dir in items:
                             s = os.path.join(src, item)
                             d = os.path.join(dst, item)
                             try:
-                                if os.path.isdir(s):
+                                if is_dir:
                                     if os.path.exists(d):
                                         # Recursively merge subdirectories
                                         merge_folders(s, d)
@@ -2539,8 +2915,12 @@ if __name__ == '__main__':
         CONFIG.get('NUDITY_THRESHOLD', 0.5),
         CONFIG.get('NSFW_LABELS', []),
         CONFIG.get('SAFE_FOLDERS', ['SAFE']),
-        logging_level=CONFIG.get('LOGGING_LEVEL', 'basic')
+        logging_level=CONFIG.get('LOGGING_LEVEL', 'basic'),
+        video_frames=CONFIG.get('VIDEO_SCAN_FRAMES', 5),
+        keyword_whole_words=CONFIG.get('NSFW_KEYWORDS_WHOLE_WORDS', False)
     )
+    set_cache_size(CONFIG.get('METADATA_CACHE_SIZE', 20000))
+    open_scan_cache()
     
     # Configure Werkzeug Logger
     werkzeug_logger = logging.getLogger('werkzeug')
@@ -2551,12 +2931,20 @@ if __name__ == '__main__':
         werkzeug_logger.disabled = False
         werkzeug_logger.setLevel(logging.INFO)
     
-    # Initial scan
-    scan_images()
+    # Initial scan: load the persisted index and reconcile changed folders in the
+    # background, or walk the whole library if there is nothing to load yet
+    if load_file_index():
+        threading.Thread(target=scan_images, kwargs={'incremental': True}, daemon=True).start()
+    else:
+        scan_images()
+    start_index_persistence()
     
     # Start file system observer
     observer = start_observer()
     
+    # Periodic full directory sync (watcher deltas keep the index current in between)
+    start_directory_sync_timer()
+    
     port = CONFIG.get('PORT', 5000)
     
     # Check for port conflict and offer to kill blocking process
@@ -2617,3 +3005,4 @@ if __name__ == '__main__':
         print("\n[Shutdown] Stopping file system observer...")
         observer.stop()
     observer.join()
+    media_index.flush()
@@ -156,7 +156,8 @@ document.addEventListener('DOMContentLoaded', function () {
         }
 
         if (scanProgressText) {
-            scanProgressText.textContent = `Scanned ${data.processed} of ${data.total} (${data.moved} moved)`;
+            const rate = data.rate ? `, ${data.rate} files/s` : '';
+            scanProgressText.textContent = `Scanned ${data.processed} of ${data.total} (${data.moved} moved${rate})`;
         }
     }
 
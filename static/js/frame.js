@@ -1,88 +1,144 @@
-// Polling-based auto-update for Picture Frame page
+// Push-based auto-update for Picture Frame page
 document.addEventListener('DOMContentLoaded', () => {
     // Initialize event listeners for metadata overlay
     initializeEventListeners();
 
-    // Track the current image filename
-    let currentFilename = document.querySelector('.image-container')?.dataset.filename;
-
-    console.log('[FRAME] Starting auto-update polling...');
-    console.log('[FRAME] Current image:', currentFilename);
-
-    // Poll for new images every 3 seconds
-    setInterval(() => {
-        fetch('/frame')
-            .then(response => response.text())
-            .then(html => {
-                const parser = new DOMParser();
-                const newDoc = parser.parseFromString(html, 'text/html');
-
-                // Get the new image filename
-                const newImageContainer = newDoc.querySelector('.image-container');
-                const newFilename = newImageContainer?.dataset.filename;
-
-                // Check if the image has changed
-                if (newFilename && newFilename !== currentFilename) {
-                    console.log('[FRAME] 🔔 NEW IMAGE DETECTED!');
-                    console.log('[FRAME] Old:', currentFilename);
-                    console.log('[FRAME] New:', newFilename);
-
-                    const currentImageContainer = document.querySelector('.image-container');
-
-                    if (newImageContainer && currentImageContainer) {
-                        // Check if it's a video or image
-                        const newMedia = newImageContainer.querySelector('img, video');
-                        const currentMedia = currentImageContainer.querySelector('img, video');
-
-                        if (newMedia && currentMedia) {
-                            // If media type changed (img to video or vice versa), replace the element
-                            if (newMedia.tagName !== currentMedia.tagName) {
-                                const cloned = newMedia.cloneNode(true);
-                                cloned.classList.add('hero-image');
-                                currentMedia.replaceWith(cloned);
-                            } else {
-                                // Same type — ensure hero-image class is present
-                                currentMedia.classList.add('hero-image');
-                                if (currentMedia.tagName === 'VIDEO') {
-                                    const sourceEl = currentMedia.querySelector('source') || document.createElement('source');
-                                    sourceEl.src = newMedia.querySelector('source') ? newMedia.querySelector('source').src : newMedia.src;
-                                    sourceEl.type = 'video/mp4';
-                                    if (!currentMedia.querySelector('source')) {
-                                        currentMedia.appendChild(sourceEl);
-                                    }
-                                    currentMedia.load();
-                                } else {
-                                    currentMedia.src = newMedia.src;
-                                }
-                            }
-
-                            // Update data attributes
-                            currentImageContainer.dataset.filename = newImageContainer.dataset.filename;
-                            currentImageContainer.dataset.subfolder = newImageContainer.dataset.subfolder;
-                            currentImageContainer.dataset.mediaType = newImageContainer.dataset.mediaType;
-
-                            // Reset metadata loaded state
-                            const metadataContainer = currentImageContainer.querySelector('.metadata');
-                            if (metadataContainer) {
-                                metadataContainer.dataset.loaded = 'false';
-                                metadataContainer.innerHTML = '';
-                            }
-
-                            // Update current filename tracker
-                            currentFilename = newFilename;
-
-                            console.log('[FRAME] ✅ Image updated successfully!');
-                        }
-                    }
-
-                    // Reinitialize event listeners
-                    initializeEventListeners();
+    // Track the current image
+    let currentKey = mediaKey(document.querySelector('.image-container')?.dataset);
+
+    console.log('[FRAME] Waiting for latest_changed events...');
+    console.log('[FRAME] Current image:', currentKey);
+
+    function mediaKey(data) {
+        return data && data.filename ? `${data.subfolder}/${data.filename}` : null;
+    }
+
+    // The server pushes the newest visible file for this frame's cookies (safe mode, content lock, archive)
+    if (typeof io !== 'undefined') {
+        const socket = io();
+        let everConnected = false;
+        socket.on('connect', () => {
+            everConnected = true;
+            socket.emit('subscribe_latest', { page: 'frame' });
+        });
+        socket.on('latest_changed', showLatest);
+        socket.on('connect_error', () => {
+            // Browsers/proxies that can't hold a websocket fall back to long-polling /api/latest
+            if (!everConnected) {
+                console.warn('[FRAME] Socket.IO unavailable, falling back to /api/latest long-poll');
+                socket.close();
+                pollLatest();
+            }
+        });
+    } else {
+        console.warn('[FRAME] Socket.IO client not available, using /api/latest long-poll');
+        pollLatest();
+    }
+
+    // Long-poll /api/latest: the server holds the request until a newer file arrives (or 30 s pass)
+    function pollLatest(etag = null) {
+        const headers = etag ? { 'If-None-Match': etag } : {};
+        fetch('/api/latest?page=frame&wait=30', { headers: headers, cache: 'no-store' })
+            .then(response => {
+                const newEtag = response.headers.get('ETag') || etag;
+                if (response.status === 304) {
+                    return pollLatest(newEtag);
                 }
+                return response.json().then(data => {
+                    showLatest(data);
+                    pollLatest(newEtag);
+                });
             })
             .catch(error => {
                 console.error('[FRAME] Error checking for updates:', error);
+                setTimeout(() => pollLatest(etag), 5000);
             });
-    }, 3000); // Check every 3 seconds
+    }
+
+    function showLatest(data) {
+        const newKey = mediaKey(data);
+
+        // Check if the image has changed
+        if (!newKey || newKey === currentKey) return;
+
+        console.log('[FRAME] 🔔 NEW IMAGE DETECTED!');
+        console.log('[FRAME] Old:', currentKey);
+        console.log('[FRAME] New:', newKey);
+
+        const currentImageContainer = document.querySelector('.image-container');
+        if (!currentImageContainer) {
+            // Nothing was shown yet ("No images found") - render the page once
+            window.location.reload();
+            return;
+        }
+
+        const mediaUrl = `/image/${data.subfolder}/${data.filename}?v=${Math.floor(data.mod_time || 0)}`;
+        const wantVideo = data.media_type === 'video';
+        const currentMedia = currentImageContainer.querySelector('img, video');
+
+        if (currentMedia && (currentMedia.tagName === 'VIDEO') === wantVideo) {
+            // Same type — ensure hero-image class is present
+            currentMedia.classList.add('hero-image');
+            if (wantVideo) {
+                const sourceEl = currentMedia.querySelector('source') || document.createElement('source');
+                sourceEl.src = mediaUrl;
+                sourceEl.type = 'video/mp4';
+                if (!currentMedia.querySelector('source')) {
+                    currentMedia.appendChild(sourceEl);
+                }
+                currentMedia.load();
+            } else {
+                currentMedia.src = mediaUrl;
+            }
+        } else {
+            // Media type changed (img to video or vice versa), replace the element
+            let newMedia;
+            if (wantVideo) {
+                newMedia = document.createElement('video');
+                newMedia.preload = 'metadata';
+                newMedia.autoplay = true;
+                newMedia.loop = true;
+                newMedia.playsInline = true;
+                newMedia.setAttribute('playsinline', '');
+                newMedia.setAttribute('webkit-playsinline', '');
+                const sourceEl = document.createElement('source');
+                sourceEl.src = mediaUrl;
+                sourceEl.type = 'video/mp4';
+                newMedia.appendChild(sourceEl);
+            } else {
+                newMedia = document.createElement('img');
+                newMedia.src = mediaUrl;
+                newMedia.alt = 'Latest Image';
+            }
+            newMedia.id = 'frame-image';
+            newMedia.classList.add('hero-image');
+            if (currentMedia) {
+                currentMedia.replaceWith(newMedia);
+            } else {
+                currentImageContainer.prepend(newMedia);
+            }
+        }
+
+        // Update data attributes
+        currentImageContainer.dataset.filename = data.filename;
+        currentImageContainer.dataset.subfolder = data.subfolder;
+        currentImageContainer.dataset.mediaType = data.media_type;
+
+        // Reset metadata loaded state
+        const metadataContainer = currentImageContainer.querySelector('.metadata');
+        if (metadataContainer) {
+            metadataContainer.dataset.loaded = 'false';
+            metadataContainer.innerHTML = '';
+        }
+
+        // Update current image tracker
+        currentKey = newKey;
+
+        console.log('[FRAME] ✅ Image updated successfully!');
+
+        // Reinitialize event listeners
+        initializeEventListeners();
+    }
 
 
     // Function to reinitialize event listeners after content update
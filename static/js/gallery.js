@@ -380,7 +380,7 @@ document.addEventListener('DOMContentLoaded', function () {
             if (!mediaElement) return;
 
             // Get the media URL safely (handle <video> with <source> tags)
-            const fullMediaUrl = video ? (video.currentSrc || video.querySelector('source')?.src) : img.src;
+            const fullMediaUrl = video ? (video.currentSrc || video.querySelector('source')?.src) : (img.dataset.fullSrc || img.src);
             const mediaType = video ? 'video' : 'image';
 
             // Get the filename and metadata
@@ -561,7 +561,7 @@ document.addEventListener('DOMContentLoaded', function () {
         if (!mediaElement) return;
 
         // Get the media URL safely (handle <video> with <source> tags)
-        const fullMediaUrl = video ? (video.currentSrc || video.querySelector('source')?.src) : img.src;
+        const fullMediaUrl = video ? (video.currentSrc || video.querySelector('source')?.src) : (img.dataset.fullSrc || img.src);
         const filename = container.dataset.filename;
         const subfolder = container.dataset.subfolder;
         const mediaType = video ? 'video' : 'image';
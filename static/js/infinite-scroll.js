@@ -9,6 +9,9 @@ document.addEventListener('DOMContentLoaded', function () {
     // State variables
     let loading = false;
     let allImagesLoaded = false;
+    // Cursor of the last image shown (keeps batches stable while new images arrive)
+    const scrollStatus = document.getElementById('scroll-status');
+    let nextCursor = scrollStatus ? (scrollStatus.dataset.nextCursor || '') : '';
 
     // Get current query parameters
     const urlParams = new URLSearchParams(window.location.search);
@@ -61,8 +64,8 @@ document.addEventListener('DOMContentLoaded', function () {
             const searchQuery = urlParams.get('search') || '';
             const mediaType = urlParams.get('media_type') || 'all';
 
-            // Build the query string with explicit offset
-            let queryString = `offset=${currentImageCount}`;
+            // Build the query string with the cursor (or an explicit offset as fallback)
+            let queryString = nextCursor ? `cursor=${encodeURIComponent(nextCursor)}` : `offset=${currentImageCount}`;
             if (selectedSubfolder) {
                 queryString += `&subfolder=${encodeURIComponent(selectedSubfolder)}`;
             }
@@ -98,42 +101,18 @@ document.addEventListener('DOMContentLoaded', function () {
                         loadingIndicator.parentNode.removeChild(loadingIndicator);
                     }
 
-                    // Check if server is scanning - retry after delay
-                    if (data.scanning) {
-                        console.log('[INFINITE SCROLL] Server is scanning, will retry in 2s');
-                        loading = false;
-                        // Show scanning message
-                        const scanMsg = document.createElement('div');
-                        scanMsg.id = 'scanning-message';
-                        scanMsg.className = 'col-12 text-center my-4';
-                        scanMsg.innerHTML = '<p>Scanning files... please wait</p>';
-                        if (!document.getElementById('scanning-message')) {
-                            imageGrid.appendChild(scanMsg);
-                        }
-                        // Retry after 2 seconds
-                        setTimeout(() => {
-                            const msg = document.getElementById('scanning-message');
-                            if (msg) msg.remove();
-                            loadMoreImages();
-                        }, 2000);
-                        return;
-                    }
-
                     if (data.images && data.images.length > 0) {
                         // Append new images to the grid
                         appendImages(data.images);
                         // Update the loaded count
                         updateScrollStatus(data.total);
+                        nextCursor = data.next_cursor || '';
+                        if (!data.has_more) {
+                            showAllLoaded();
+                        }
                     } else {
                         // No more images to load
-                        allImagesLoaded = true;
-                        // Hide scroll status and show completion message
-                        const statusEl = document.getElementById('scroll-status');
-                        if (statusEl) statusEl.style.display = 'none';
-                        const endMessage = document.createElement('div');
-                        endMessage.className = 'col-12 text-center my-4';
-                        endMessage.innerHTML = '<p>All images loaded</p>';
-                        imageGrid.appendChild(endMessage);
+                        showAllLoaded();
                     }
 
                     loading = false;
@@ -159,6 +138,18 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
+    // Stop loading and show the completion message
+    function showAllLoaded() {
+        allImagesLoaded = true;
+        // Hide scroll status and show completion message
+        const statusEl = document.getElementById('scroll-status');
+        if (statusEl) statusEl.style.display = 'none';
+        const endMessage = document.createElement('div');
+        endMessage.className = 'col-12 text-center my-4';
+        endMessage.innerHTML = '<p>All images loaded</p>';
+        imageGrid.appendChild(endMessage);
+    }
+
     // Sentinel element reference
     let sentinel;
 
@@ -215,12 +206,14 @@ document.addEventListener('DOMContentLoaded', function () {
                 mediaElement.onerror = function() { console.error('Video Error in Infinite Scroll:', this.error); };
                 
                 const sourceElement = document.createElement('source');
-                sourceElement.src = `/image/${image.subfolder}/${image.filename}`;
+                sourceElement.src = `/image/${image.subfolder}/${image.filename}?v=${Math.floor(image.mod_time || 0)}`;
                 sourceElement.type = 'video/mp4';
                 mediaElement.appendChild(sourceElement);
             } else {
                 mediaElement = document.createElement('img');
-                mediaElement.src = `/image/${image.subfolder}/${image.filename}`;
+                mediaElement.src = `/thumb/gallery/${image.subfolder}/${image.filename}?v=${Math.floor(image.mod_time || 0)}`;
+                mediaElement.dataset.fullSrc = `/image/${image.subfolder}/${image.filename}?v=${Math.floor(image.mod_time || 0)}`;
+                mediaElement.loading = 'lazy';
                 mediaElement.alt = image.filename;
                 mediaElement.className = 'thumbnail';
             }
@@ -241,7 +234,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 // Get the media URL and type
                 const fullMediaUrl = mediaElement.tagName === 'VIDEO' ? 
                                        (mediaElement.querySelector('source') ? mediaElement.querySelector('source').src : mediaElement.src) 
-                                       : mediaElement.src;
+                                       : (mediaElement.dataset.fullSrc || mediaElement.src);
                 const mediaType = image.media_type || 'image';
 
                 // Show the preview panel with this media
@@ -252,7 +245,7 @@ document.addEventListener('DOMContentLoaded', function () {
             });
 
             // Load metadata for hover display
-            fetch('/image_info/' + encodeURIComponent(image.filename))
+            fetch('/image_info/' + encodeURIComponent(image.subfolder + '/' + image.filename))
                 .then(response => response.json())
                 .then(data => {
                     let metadataHtml = '';
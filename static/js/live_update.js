@@ -1,159 +1,223 @@
 // Live auto-update for Home page
 document.addEventListener('DOMContentLoaded', function () {
-    // Track the current latest image filename
-    let currentLatestFilename = document.querySelector('.hero-view')?.dataset.filename;
-
-    console.log('[LIVE UPDATE] Starting auto-update polling...');
-    console.log('[LIVE UPDATE] Current latest image:', currentLatestFilename);
-
-    // Poll for new images every 3 seconds
-    setInterval(() => {
-        fetch(window.location.href)
-            .then(response => response.text())
-            .then(html => {
-                const parser = new DOMParser();
-                const newDoc = parser.parseFromString(html, 'text/html');
-
-                // Get the new latest image filename
-                const newHeroView = newDoc.querySelector('.hero-view');
-                const newLatestFilename = newHeroView?.dataset.filename;
-
-                // Check if a new image has been added
-                if (newLatestFilename && newLatestFilename !== currentLatestFilename) {
-                    console.log('[LIVE UPDATE] 🔔 NEW IMAGE DETECTED!');
-                    console.log('[LIVE UPDATE] Old:', currentLatestFilename);
-                    console.log('[LIVE UPDATE] New:', newLatestFilename);
-
-                    // Update the hero view with the new latest image
-                    const currentHeroView = document.querySelector('.hero-view');
-
-                    if (newHeroView && currentHeroView) {
-                        // Get media elements
-                        const newMedia = newHeroView.querySelector('img, video');
-                        const currentMedia = currentHeroView.querySelector('img, video');
-
-                        if (newMedia && currentMedia) {
-                            // If media type changed (img to video or vice versa), replace the element
-                            if (newMedia.tagName !== currentMedia.tagName) {
-                                currentMedia.replaceWith(newMedia.cloneNode(true));
-                            } else {
-                                // Same type
-                                if (currentMedia.tagName === 'VIDEO') {
-                                    const sourceEl = currentMedia.querySelector('source') || document.createElement('source');
-                                    sourceEl.src = newMedia.querySelector('source') ? newMedia.querySelector('source').src : newMedia.src;
-                                    sourceEl.type = 'video/mp4';
-                                    if (!currentMedia.querySelector('source')) {
-                                        currentMedia.appendChild(sourceEl);
-                                    }
-                                    currentMedia.load(); // necessary to apply new source
-                                } else {
-                                    currentMedia.src = newMedia.src;
-                                    currentMedia.alt = newMedia.alt;
-                                }
-                            }
-
-                            // Update data attributes
-                            currentHeroView.dataset.filename = newHeroView.dataset.filename;
-                            currentHeroView.dataset.subfolder = newHeroView.dataset.subfolder;
-                            currentHeroView.dataset.mediaType = newHeroView.dataset.mediaType;
-
-                            // Reset metadata loaded state to allow reload on hover
-                            const metadataContainer = currentHeroView.querySelector('.metadata');
-                            if (metadataContainer) {
-                                metadataContainer.dataset.loaded = 'false';
-                                metadataContainer.innerHTML = '';
-                            }
-
-                            // Update current filename tracker
-                            currentLatestFilename = newLatestFilename;
-
-                            console.log('[LIVE UPDATE] ✅ Hero view updated successfully!');
-                        }
-                    }
-
-                    // Update thumbnail sidebar
-                    const newThumbnailGrid = newDoc.querySelector('.thumbnail-grid');
-                    const currentThumbnailGrid = document.querySelector('.thumbnail-grid');
-
-                    if (newThumbnailGrid && currentThumbnailGrid) {
-                        // Replace entire thumbnail grid content
-                        currentThumbnailGrid.innerHTML = newThumbnailGrid.innerHTML;
-
-                        // Re-attach click event listeners to new thumbnails
-                        const thumbnailLinks = currentThumbnailGrid.querySelectorAll('.thumbnail-link');
-                        thumbnailLinks.forEach(link => {
-                            link.addEventListener('click', function (e) {
-                                e.preventDefault();
-                                const url = this.href;
-                                const container = this.closest('.image-container');
-                                const mediaType = container ? container.dataset.mediaType : 'image';
-                                const filename = this.dataset.filename;
-                                const subfolder = this.dataset.subfolder;
-
-                                // Get the hero view container
-                                const heroContainer = document.querySelector('.image-container.hero-view');
-                                if (!heroContainer) return;
-
-                                // Clear existing content except metadata
-                                const metadata = heroContainer.querySelector('.metadata');
-                                heroContainer.innerHTML = '';
-
-                                // Create appropriate media element
-                                if (mediaType === 'video') {
-                                    const videoElement = document.createElement('video');
-                                    videoElement.controls = true;
-                                    videoElement.autoplay = true;
-                                    videoElement.loop = true;
-                                    videoElement.playsInline = true;
-                                    videoElement.setAttribute('playsinline', '');
-                                    videoElement.setAttribute('webkit-playsinline', '');
-                                    videoElement.className = 'hero-image';
-                                    videoElement.onerror = function() { console.error('Video Error in Live Update:', this.error); };
-                                    
-                                    const sourceElement = document.createElement('source');
-                                    sourceElement.src = url;
-                                    sourceElement.type = 'video/mp4';
-                                    videoElement.appendChild(sourceElement);
-                                    
-                                    heroContainer.appendChild(videoElement);
-                                } else {
-                                    const imgElement = document.createElement('img');
-                                    imgElement.src = url;
-                                    imgElement.alt = 'Selected Image';
-                                    imgElement.className = 'hero-image';
-                                    heroContainer.appendChild(imgElement);
-                                }
-
-                                // Update hero container data attributes for metadata loading
-                                heroContainer.dataset.filename = filename;
-                                heroContainer.dataset.subfolder = subfolder;
-                                heroContainer.dataset.mediaType = mediaType;
-
-                                // Re-add metadata div and reset
-                                if (metadata) {
-                                    metadata.innerHTML = '';
-                                    delete metadata.dataset.loaded;
-                                    heroContainer.appendChild(metadata);
-                                }
-
-                                // Highlight selected
-                                document.querySelectorAll('.thumbnail-only').forEach(t => t.classList.remove('selected'));
-                                this.closest('.thumbnail-only').classList.add('selected');
-                            });
-                        });
-
-                        // Highlight the first thumbnail
-                        const firstThumbnail = currentThumbnailGrid.querySelector('.thumbnail-link');
-                        if (firstThumbnail) {
-                            firstThumbnail.closest('.thumbnail-only').classList.add('selected');
-                        }
-
-                        console.log('[LIVE UPDATE] ✅ Thumbnail sidebar refreshed!');
-                    }
+    // The server pushes latest_changed events; don't let websocket.js reload the page on new_image
+    window.liveUpdateActive = true;
+
+    // Track the current latest image
+    let currentLatestKey = heroKey(document.querySelector('.hero-view')?.dataset);
+
+    const urlParams = new URLSearchParams(window.location.search);
+    const selectedSubfolder = urlParams.get('subfolder') || '';
+    const mediaType = urlParams.get('media_type') || 'all';
+
+    console.log('[LIVE UPDATE] Waiting for latest_changed events...');
+    console.log('[LIVE UPDATE] Current latest image:', currentLatestKey);
+
+    function heroKey(data) {
+        return data && data.filename ? `${data.subfolder}/${data.filename}` : null;
+    }
+
+    // Subscribe once the shared socket (websocket.js) is available, and again after reconnects
+    function subscribe(socket) {
+        const sendSubscription = () => socket.emit('subscribe_latest', { page: 'index', media_type: mediaType });
+        socket.on('connect', sendSubscription);
+        if (socket.connected) {
+            sendSubscription();
+        }
+        socket.on('latest_changed', onLatestChanged);
+    }
+
+    if (window.appSocket) {
+        subscribe(window.appSocket);
+    } else {
+        document.addEventListener('socket-ready', (e) => subscribe(e.detail), { once: true });
+    }
+
+    function onLatestChanged(data) {
+        const newLatestKey = heroKey(data);
+
+        // Check if a new image has been added
+        if (!newLatestKey || newLatestKey === currentLatestKey) return;
+
+        console.log('[LIVE UPDATE] 🔔 NEW IMAGE DETECTED!');
+        console.log('[LIVE UPDATE] Old:', currentLatestKey);
+        console.log('[LIVE UPDATE] New:', newLatestKey);
+
+        const mediaUrl = `/image/${data.subfolder}/${data.filename}?v=${Math.floor(data.mod_time || 0)}`;
+        updateHero(data, mediaUrl);
+        currentLatestKey = newLatestKey;
+
+        // Only add to the sidebar if it matches the selected top-level folder
+        if (!selectedSubfolder || selectedSubfolder === data.top_folder) {
+            prependThumbnail(data, mediaUrl);
+        }
+    }
+
+    // Update the hero view with the new latest image
+    function updateHero(data, mediaUrl) {
+        const currentHeroView = document.querySelector('.hero-view');
+        if (!currentHeroView) {
+            // Nothing was shown yet (empty library) - render the page once
+            window.location.reload();
+            return;
+        }
+
+        const currentMedia = currentHeroView.querySelector('img, video');
+        const wantVideo = data.media_type === 'video';
+
+        if (currentMedia && (currentMedia.tagName === 'VIDEO') === wantVideo) {
+            // Same type
+            if (wantVideo) {
+                const sourceEl = currentMedia.querySelector('source') || document.createElement('source');
+                sourceEl.src = mediaUrl;
+                sourceEl.type = 'video/mp4';
+                if (!currentMedia.querySelector('source')) {
+                    currentMedia.appendChild(sourceEl);
                 }
-            })
-            .catch(error => {
-                console.error('[LIVE UPDATE] Error checking for updates:', error);
-            });
-    }, 3000); // Check every 3 seconds
+                currentMedia.load(); // necessary to apply new source
+            } else {
+                currentMedia.src = mediaUrl;
+                currentMedia.alt = 'Latest Image';
+            }
+        } else {
+            // Media type changed (img to video or vice versa), replace the element
+            const newMedia = createHeroMedia(wantVideo, mediaUrl);
+            if (currentMedia) {
+                currentMedia.replaceWith(newMedia);
+            } else {
+                currentHeroView.prepend(newMedia);
+            }
+        }
+
+        // Update data attributes
+        currentHeroView.dataset.filename = data.filename;
+        currentHeroView.dataset.subfolder = data.subfolder;
+        currentHeroView.dataset.mediaType = data.media_type;
+
+        // Reset metadata loaded state to allow reload on hover
+        const metadataContainer = currentHeroView.querySelector('.metadata');
+        if (metadataContainer) {
+            metadataContainer.dataset.loaded = 'false';
+            metadataContainer.innerHTML = '';
+        }
+
+        console.log('[LIVE UPDATE] ✅ Hero view updated successfully!');
+    }
+
+    function createHeroMedia(isVideo, url) {
+        if (isVideo) {
+            const videoElement = document.createElement('video');
+            videoElement.controls = true;
+            videoElement.autoplay = true;
+            videoElement.loop = true;
+            videoElement.playsInline = true;
+            videoElement.setAttribute('playsinline', '');
+            videoElement.setAttribute('webkit-playsinline', '');
+            videoElement.className = 'hero-image';
+            videoElement.onerror = function() { console.error('Video Error in Live Update:', this.error); };
+
+            const sourceElement = document.createElement('source');
+            sourceElement.src = url;
+            sourceElement.type = 'video/mp4';
+            videoElement.appendChild(sourceElement);
+            return videoElement;
+        }
+
+        const imgElement = document.createElement('img');
+        imgElement.src = url;
+        imgElement.alt = 'Selected Image';
+        imgElement.className = 'hero-image';
+        return imgElement;
+    }
+
+    // Add the new file to the top of the thumbnail sidebar
+    function prependThumbnail(data, mediaUrl) {
+        const currentThumbnailGrid = document.querySelector('.thumbnail-grid');
+        if (!currentThumbnailGrid) return;
+
+        // Already listed (e.g. the previous newest file was deleted)
+        const alreadyListed = Array.from(currentThumbnailGrid.querySelectorAll('.thumbnail-link')).some(
+            link => link.dataset.filename === data.filename && link.dataset.subfolder === data.subfolder);
+        if (alreadyListed) return;
+
+        const wrapper = document.createElement('div');
+        wrapper.className = 'mb-2';
+
+        const container = document.createElement('div');
+        container.className = 'image-container thumbnail-only';
+        container.dataset.mediaType = data.media_type;
+
+        const link = document.createElement('a');
+        link.href = mediaUrl;
+        link.className = 'thumbnail-link';
+        link.dataset.filename = data.filename;
+        link.dataset.subfolder = data.subfolder;
+
+        if (data.media_type === 'video') {
+            const videoElement = document.createElement('video');
+            videoElement.preload = 'metadata';
+            videoElement.className = 'thumbnail';
+            videoElement.muted = true;
+            videoElement.playsInline = true;
+            const sourceElement = document.createElement('source');
+            sourceElement.src = mediaUrl;
+            sourceElement.type = 'video/mp4';
+            videoElement.appendChild(sourceElement);
+            link.appendChild(videoElement);
+        } else {
+            const imgElement = document.createElement('img');
+            imgElement.src = `/thumb/home/${data.subfolder}/${data.filename}?v=${Math.floor(data.mod_time || 0)}`;
+            imgElement.alt = data.filename;
+            imgElement.className = 'thumbnail';
+            link.appendChild(imgElement);
+        }
+
+        container.appendChild(link);
+        wrapper.appendChild(container);
+        currentThumbnailGrid.prepend(wrapper);
+        attachThumbnailClick(link);
+
+        // Highlight the new first thumbnail
+        document.querySelectorAll('.thumbnail-only').forEach(t => t.classList.remove('selected'));
+        container.classList.add('selected');
+
+        console.log('[LIVE UPDATE] ✅ Thumbnail sidebar updated!');
+    }
+
+    // Show a clicked thumbnail in the hero view
+    function attachThumbnailClick(link) {
+        link.addEventListener('click', function (e) {
+            e.preventDefault();
+            const url = this.href;
+            const container = this.closest('.image-container');
+            const mediaType = container ? container.dataset.mediaType : 'image';
+            const filename = this.dataset.filename;
+            const subfolder = this.dataset.subfolder;
+
+            // Get the hero view container
+            const heroContainer = document.querySelector('.image-container.hero-view');
+            if (!heroContainer) return;
+
+            // Clear existing content except metadata
+            const metadata = heroContainer.querySelector('.metadata');
+            heroContainer.innerHTML = '';
+            heroContainer.appendChild(createHeroMedia(mediaType === 'video', url));
+
+            // Update hero container data attributes for metadata loading
+            heroContainer.dataset.filename = filename;
+            heroContainer.dataset.subfolder = subfolder;
+            heroContainer.dataset.mediaType = mediaType;
+
+            // Re-add metadata div and reset
+            if (metadata) {
+                metadata.innerHTML = '';
+                delete metadata.dataset.loaded;
+                heroContainer.appendChild(metadata);
+            }
+
+            // Highlight selected
+            document.querySelectorAll('.thumbnail-only').forEach(t => t.classList.remove('selected'));
+            this.closest('.thumbnail-only').classList.add('selected');
+        });
+    }
 });
@@ -1,7 +1,8 @@
 // Media rendering helper for displaying both images and videos
 function createMediaElement(mediaInfo) {
-    const { filename, subfolder, media_type } = mediaInfo;
-    const mediaUrl = `/image/${subfolder}/${filename}`;
+    const { filename, subfolder, media_type, mod_time } = mediaInfo;
+    // Versioned like the server-rendered URLs, so a rewritten file gets a new URL
+    const mediaUrl = `/image/${subfolder}/${filename}` + (mod_time ? `?v=${Math.floor(mod_time)}` : '');
 
     if (media_type === 'video') {
         return `
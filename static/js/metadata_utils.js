@@ -92,7 +92,8 @@ function loadMetadata(filename, container, subfolder = '') {
     // Show loading state
     container.innerHTML = '<p class="text-muted"><i class="bi bi-hourglass-split"></i> Loading metadata...</p>';
 
-    return fetch('/image_info/' + encodeURIComponent(filename))
+    // Address the file by its relative path, so same-named files in other folders don't collide
+    return fetch('/image_info/' + encodeURIComponent(subfolder ? subfolder + '/' + filename : filename))
         .then(response => response.json())
         .then(data => {
             const metadataHtml = formatMetadataHTML(data, subfolder);
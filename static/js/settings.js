@@ -115,7 +115,7 @@ async function saveSettings() {
         'SETTINGS_LEVEL', 'SETTINGS_PASSPHRASE',
         'TOGGLE_CONTENT_SCAN_LEVEL', 'TOGGLE_METADATA_EXTRACTION_LEVEL', 'TOGGLE_CONTENT_LOCK_LEVEL', 'TOGGLE_HIDE_ARCHIVE_LEVEL', 'TOGGLE_SAFEMODE_VIEW_LEVEL',
         'TOGGLE_CONTENT_SCAN_PASSPHRASE', 'TOGGLE_METADATA_EXTRACTION_PASSPHRASE', 'TOGGLE_CONTENT_LOCK_PASSPHRASE', 'TOGGLE_ARCHIVE_PASSPHRASE', 'TOGGLE_SAFEMODE_PASSPHRASE',
-        'CONTENT_SCAN_OFFSET', 'NUDITY_THRESHOLD', 'NSFW_KEYWORDS', 'NSFW_FOLDERS', 'NSFW_LABELS', 'SAFE_FOLDERS'
+        'CONTENT_SCAN_OFFSET', 'NUDITY_THRESHOLD', 'NSFW_KEYWORDS', 'NSFW_KEYWORDS_WHOLE_WORDS', 'NSFW_FOLDERS', 'NSFW_LABELS', 'SAFE_FOLDERS'
     ];
 
     for (const key of settingFields) {
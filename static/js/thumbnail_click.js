@@ -87,7 +87,7 @@ document.addEventListener('DOMContentLoaded', function () {
             const metadataContainer = newImageContainer.querySelector('.metadata');
 
             if (metadataContainer && !metadataContainer.dataset.loaded) {
-                fetch('/image_info/' + encodeURIComponent(filename))
+                fetch('/image_info/' + encodeURIComponent(subfolder ? subfolder + '/' + filename : filename))
                     .then(response => response.json())
                     .then(data => {
                         let metadataHtml = '';
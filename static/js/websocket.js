@@ -41,6 +41,10 @@ document.addEventListener('DOMContentLoaded', () => {
         // Connect to the Socket.IO server
         const socket = io();
 
+        // Share the connection with page scripts (e.g. live_update.js)
+        window.appSocket = socket;
+        document.dispatchEvent(new CustomEvent('socket-ready', { detail: socket }));
+
         // Connection established
         socket.on('connect', () => {
             console.log('Connected to SocketIO server');
@@ -49,8 +53,11 @@ document.addEventListener('DOMContentLoaded', () => {
         // Listen for new image events
         socket.on('new_image', (data) => {
             console.log('New image detected:', data.path);
-            // Show a notification
-            showNotification('New media file detected!');
+            // Pages with live updates apply latest_changed events in place instead of reloading
+            if (window.liveUpdateActive) return;
+            // Show a notification (events carry every file of a coalesced batch)
+            const count = (data.paths || []).length;
+            showNotification(count > 1 ? `${count} new media files detected!` : 'New media file detected!');
             // Reload the page after a short delay to show the notification
             setTimeout(() => {
                 window.location.reload();
@@ -9,12 +9,22 @@ import shutil
 import threading
 import time
 import tempfile
-from typing import Optional, Generator, List, Dict, Any
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Generator, List, Dict, Any, Tuple
+
+from utils.folder_walker import DEFAULT_WALK_WORKERS, walk_media
+from utils.keyword_matcher import matcher_for
+from utils.verdict_store import detector_version
 
 # NudeNet detector (lazy loaded to avoid startup delay)
 _detector = None
 _detector_lock = threading.Lock()
 
+# Cache of detections by content hash (set from main app; None = always run the detector)
+_verdict_store = None
+_detector_version = None
+
 
 def _has_non_ascii(path: str) -> bool:
     """Check if path contains non-ASCII characters (e.g., Chinese, Japanese, etc.)"""
@@ -57,10 +67,83 @@ def _cleanup_temp_file(temp_path: str, original_path: str):
         except:
             pass
 
+# Write completion: a file is treated as fully written once the writer closed it
+# (inotify IN_CLOSE_WRITE, reported by the watcher where the platform supports it)
+# or its size and mtime have stopped changing for WRITE_SETTLE_SECONDS.
+WRITE_SETTLE_SECONDS = 1.0
+WRITE_POLL_INTERVAL = 0.25
+WRITE_TIMEOUT_SECONDS = 60
+_closed_writes = OrderedDict()  # path -> time the writer closed it
+_closed_writes_lock = threading.Lock()
+_CLOSED_WRITES_MAX = 1000
+
+
+def mark_write_closed(file_path: str):
+    """Record that a writer closed file_path (from a file-closed watcher event)"""
+    with _closed_writes_lock:
+        _closed_writes[file_path] = time.time()
+        _closed_writes.move_to_end(file_path)
+        while len(_closed_writes) > _CLOSED_WRITES_MAX:
+            _closed_writes.popitem(last=False)
+
+
+def wait_until_written(file_path: str, settle: float = None, timeout: float = None) -> bool:
+    """
+    Wait until a file looks completely written. Files that haven't changed
+    for `settle` seconds (e.g. everything in a bulk scan of old folders) or
+    whose writer already closed them return immediately; only files that are
+    still changing are polled.
+    
+    Returns False if the file is missing or empty. A file still changing
+    after `timeout` seconds is returned as ready (with a warning).
+    """
+    settle = WRITE_SETTLE_SECONDS if settle is None else settle
+    timeout = WRITE_TIMEOUT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    previous = None
+    stable_since = None
+    
+    while True:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        
+        now = time.monotonic()
+        if stat.st_size > 0:
+            with _closed_writes_lock:
+                closed_at = _closed_writes.get(file_path)
+            if closed_at is not None and closed_at >= stat.st_mtime:
+                return True
+            if time.time() - stat.st_mtime >= settle:
+                return True
+            
+            # mtime looks recent (or the clock is skewed) - require it to hold still while we watch
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature != previous:
+                previous, stable_since = signature, now
+            elif now - stable_since >= settle:
+                return True
+        
+        if now >= deadline:
+            if stat.st_size == 0:
+                return False
+            print(f"[ContentScanner] ⚠️ Still being written after {timeout:.0f}s, scanning anyway: {os.path.basename(file_path)}")
+            return True
+        time.sleep(WRITE_POLL_INTERVAL)
+
+
 # Configuration - will be set from main app
 NSFW_KEYWORDS = []
+KEYWORD_WHOLE_WORDS = False  # Match keywords as whole words only
 NUDITY_THRESHOLD = 0.5  # Confidence threshold for nudity detection
 SAFE_FOLDERS = ['SAFE']  # Folders that mark content as safe (skip scanning)
+VIDEO_SCAN_FRAMES = 5  # Frames sampled across each video
+VIDEO_BATCH_SIZE = 8  # Video frames per detector call
+LOGGING_LEVEL = 'basic'
+
+# NSFW_KEYWORDS compiled into one matcher (rebuilt by set_config)
+_keyword_matcher = matcher_for(NSFW_KEYWORDS)
 
 # Body parts that indicate NSFW content (configurable via set_config)
 NSFW_LABELS = [
@@ -72,10 +155,18 @@ NSFW_LABELS = [
 ]
 
 
-def set_config(keywords: List[str], threshold: float = 0.5, labels: List[str] = None, safe_folders: List[str] = None, logging_level: str = 'basic'):
+def set_config(keywords: List[str], threshold: float = 0.5, labels: List[str] = None, safe_folders: List[str] = None, logging_level: str = 'basic', video_frames: int = None,
+               keyword_whole_words: bool = None):
     """Set configuration from main app"""
-    global NSFW_KEYWORDS, NUDITY_THRESHOLD, NSFW_LABELS, SAFE_FOLDERS
+    global NSFW_KEYWORDS, NUDITY_THRESHOLD, NSFW_LABELS, SAFE_FOLDERS, LOGGING_LEVEL, VIDEO_SCAN_FRAMES
+    global KEYWORD_WHOLE_WORDS, _keyword_matcher
+    LOGGING_LEVEL = logging_level
+    if video_frames is not None:
+        VIDEO_SCAN_FRAMES = max(int(video_frames), 1)
     NSFW_KEYWORDS = [kw.lower().strip() for kw in keywords]
+    if keyword_whole_words is not None:
+        KEYWORD_WHOLE_WORDS = bool(keyword_whole_words)
+    _keyword_matcher = matcher_for(NSFW_KEYWORDS, KEYWORD_WHOLE_WORDS)
     NUDITY_THRESHOLD = threshold
     if labels:
         NSFW_LABELS = [label.strip().upper() for label in labels]
@@ -87,6 +178,44 @@ def set_config(keywords: List[str], threshold: float = 0.5, labels: List[str] =
             print(f"[ContentScanner] Safe folders: {', '.join(SAFE_FOLDERS)}")
 
 
+def match_keyword(text: Optional[str]) -> Optional[str]:
+    """First NSFW keyword in text (None if none), using the matcher set_config built"""
+    return _keyword_matcher.match(text)
+
+
+def set_verdict_store(store):
+    """Set the VerdictStore used to skip files that were already scanned"""
+    global _verdict_store
+    _verdict_store = store
+
+
+def _detection_cache_key(file_path: str, kind: str = 'image') -> Optional[Tuple[str, str]]:
+    """(content hash, detector) key of a file in the verdict cache, or None if caching is off"""
+    global _detector_version
+    if _verdict_store is None:
+        return None
+    content_hash = _verdict_store.content_hash(file_path)
+    if content_hash is None:
+        return None
+    if _detector_version is None:
+        _detector_version = detector_version()
+    return content_hash, f"{_detector_version}/{kind}"
+
+
+def _cached_detections(cache_key: Optional[Tuple[str, str]]) -> Optional[List[Dict[str, Any]]]:
+    if cache_key is None or _verdict_store is None:
+        return None
+    return _verdict_store.get(*cache_key)
+
+
+def _store_detections(cache_key: Optional[Tuple[str, str]], detections: List[Dict[str, Any]]):
+    if cache_key is not None and _verdict_store is not None:
+        try:
+            _verdict_store.put(*cache_key, detections, NUDITY_THRESHOLD, NSFW_LABELS)
+        except Exception as e:
+            print(f"[ContentScanner] ⚠️ Could not cache scan result: {e}")
+
+
 def get_detector():
     """Lazy load NudeNet detector (thread-safe)"""
     global _detector
@@ -117,22 +246,94 @@ def check_nsfw_keywords(metadata: Dict[str, Any]) -> bool:
     Returns:
         True if NSFW keyword found, False otherwise
     """
-    if not metadata or not NSFW_KEYWORDS:
+    if not metadata or not _keyword_matcher:
         return False
     
-    # Check prompt
-    prompt = metadata.get('prompt', '').lower()
-    for keyword in NSFW_KEYWORDS:
-        if keyword in prompt:
-            print(f"[ContentScanner] 🔍 Keyword match: '{keyword}' in prompt")
+    # Check prompt (all keywords in one pass)
+    keyword = _keyword_matcher.match(metadata.get('prompt'))
+    if keyword:
+        print(f"[ContentScanner] 🔍 Keyword match: '{keyword}' in prompt")
+        return True
+    
+    return False
+
+
+def _detections_flagged(results: List[Dict[str, Any]]) -> bool:
+    """Check NudeNet detections for an NSFW label at or above the threshold"""
+    for detection in results:
+        label = detection.get('class', '')
+        confidence = detection.get('score', 0)
+        
+        if label in NSFW_LABELS and confidence >= NUDITY_THRESHOLD:
+            print(f"[ContentScanner] 🔞 NSFW FLAGGED: {label} ({confidence:.1%}) >= threshold ({NUDITY_THRESHOLD:.0%})")
             return True
     
     return False
 
 
+def _video_duration(file_path: str) -> Optional[float]:
+    """Video duration in seconds via ffprobe (None if unknown)"""
+    import subprocess
+    
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', file_path],
+            capture_output=True, timeout=10
+        )
+        duration = float(result.stdout.decode('utf-8', errors='ignore').strip())
+        return duration if duration > 0 else None
+    except (ValueError, OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def _video_frames(file_path: str, count: int, timeout: float = 30) -> Generator[Any, None, None]:
+    """
+    Yield up to `count` frames spread evenly across a video, decoded by ffmpeg
+    straight into memory (raw BGR over stdout, letterboxed to
+    DETECTION_MAX_SIDE square). Closing the generator stops ffmpeg early.
+    """
+    import subprocess
+    import numpy as np
+    
+    side = DETECTION_MAX_SIDE
+    frame_bytes = side * side * 3
+    duration = _video_duration(file_path)
+    
+    if duration:
+        # One frame from the middle of each of `count` equal segments
+        interval = duration / count
+        seek = ['-ss', f"{interval / 2:.3f}"]
+        rate = f"fps=1/{interval:.6f},"
+    else:
+        seek, rate = [], 'fps=1,'
+    
+    cmd = ['ffmpeg', '-v', 'error', *seek, '-i', file_path,
+           '-vf', f"{rate}scale={side}:{side}:force_original_aspect_ratio=decrease,"
+                  f"pad={side}:{side}:(ow-iw)/2:(oh-ih)/2",
+           '-frames:v', str(count), '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    try:
+        for _ in range(count):
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, np.uint8).reshape(side, side, 3)
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
 def check_video_nudity(file_path: str) -> bool:
     """
-    Check video for nudity by extracting and scanning the last frame.
+    Check video for nudity by sampling VIDEO_SCAN_FRAMES frames across its
+    whole length. Frames are piped from ffmpeg into memory and run through the
+    detector in batches; scanning stops at the first NSFW batch.
     
     Args:
         file_path: Path to video file
@@ -140,71 +341,57 @@ def check_video_nudity(file_path: str) -> bool:
     Returns:
         True if nudity detected, False otherwise
     """
-    import subprocess
-    import tempfile
-    
     filename = os.path.basename(file_path)
-    print(f"[ContentScanner] 🎬 Scanning video (last frame): {filename}")
     
-    # Create temp file for extracted frame
-    temp_dir = tempfile.gettempdir()
-    temp_frame = os.path.join(temp_dir, f"content_scan_{os.getpid()}.jpg")
+    # A video still being encoded has no usable frames at the end yet
+    if not wait_until_written(file_path):
+        print(f"[ContentScanner] ⏭️ File not ready or empty: {file_path}")
+        return False
+    
+    # Same video scanned before (by content) - judge the cached detections with the current settings
+    frame_count = max(int(VIDEO_SCAN_FRAMES), 1)
+    cache_key = _detection_cache_key(file_path, f"video-{frame_count}-frames")
+    cached = _cached_detections(cache_key)
+    if cached is not None:
+        if LOGGING_LEVEL in ('detailed', 'debug'):
+            print(f"[ContentScanner] ♻️ Cached result: {filename}")
+        return _detections_flagged(cached)
+    
+    detector = get_detector()
+    if detector is None:
+        return False
+    
+    print(f"[ContentScanner] 🎬 Scanning video ({frame_count} frames): {filename}")
     
+    frames = _video_frames(file_path, frame_count)
+    all_detections = []
+    scanned = 0
     try:
-        # Use ffmpeg to extract last frame
-        # sseof seeks to end of file, -1 means 1 second before end
-        cmd = [
-            'ffmpeg', '-y',
-            '-sseof', '-1',  # Seek to 1 second before end
-            '-i', file_path,
-            '-frames:v', '1',
-            '-q:v', '2',
-            temp_frame
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            timeout=30
-        )
-        
-        if result.returncode != 0 or not os.path.exists(temp_frame):
-            stderr = result.stderr.decode('utf-8', errors='ignore')[:200]
-            print(f"[ContentScanner] ⚠️ Failed to extract frame from video")
-            if stderr:
-                print(f"    └─ ffmpeg error: {stderr}")
-            return False
-        
-        print(f"[ContentScanner] ✅ Frame extracted successfully")
-        
-        # Scan the extracted frame
-        detector = get_detector()
-        if detector is None:
-            return False
-        
-        results = detector.detect(temp_frame)
-        
-        # Log all detections found
-        if results:
-            for detection in results:
-                label = detection.get('class', '')
-                confidence = detection.get('score', 0)
-                print(f"    └─ {label}: {confidence:.1%}")
-        
-        # Check for NSFW content
-        for detection in results:
-            label = detection.get('class', '')
-            confidence = detection.get('score', 0)
+        while True:
+            batch = [frame for _, frame in zip(range(VIDEO_BATCH_SIZE), frames)]
+            if not batch:
+                break
+            scanned += len(batch)
+            
+            for detections in _detect_images(detector, batch):
+                if not detections:
+                    continue
+                for detection in detections:
+                    print(f"    └─ {detection.get('class', '')}: {detection.get('score', 0):.1%}")
+                all_detections.extend(detections)
             
-            if label in NSFW_LABELS and confidence >= NUDITY_THRESHOLD:
-                print(f"[ContentScanner] 🔞 NSFW FLAGGED: {label} ({confidence:.1%}) >= threshold ({NUDITY_THRESHOLD:.0%})")
+            if _detections_flagged(all_detections):
+                # Stop decoding - the rest of the video can't un-flag it. Not cached: the
+                # unscanned frames would be missing if the threshold is raised later.
                 return True
         
-        return False
+        if scanned == 0:
+            print(f"[ContentScanner] ⚠️ Failed to extract frames from video")
+            return False
         
-    except subprocess.TimeoutExpired:
-        print(f"[ContentScanner] ⚠️ Video frame extraction timed out")
+        _store_detections(cache_key, all_detections)
         return False
+        
     except FileNotFoundError:
         print(f"[ContentScanner] ⚠️ ffmpeg not found - video scanning disabled")
         return False
@@ -212,18 +399,14 @@ def check_video_nudity(file_path: str) -> bool:
         print(f"[ContentScanner] ❌ Error scanning video: {e}")
         return False
     finally:
-        # Clean up temp file
-        if os.path.exists(temp_frame):
-            try:
-                os.remove(temp_frame)
-            except:
-                pass
+        frames.close()
 
 
 def check_nudity_detection(file_path: str) -> bool:
     """
     Use NudeNet to check for nudity in an image or video.
-    For videos, extracts and scans the last frame.
+    For videos, samples VIDEO_SCAN_FRAMES frames spread across the clip
+    (piped from ffmpeg) and flags the video if any of them is flagged.
     
     Args:
         file_path: Path to image or video file
@@ -235,7 +418,7 @@ def check_nudity_detection(file_path: str) -> bool:
     image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
     video_extensions = ('.mp4', '.webm', '.mov', '.avi', '.mkv')
     
-    # Handle video files - extract last frame
+    # Handle video files - sample frames across the clip
     if ext in video_extensions:
         return check_video_nudity(file_path)
     
@@ -244,6 +427,19 @@ def check_nudity_detection(file_path: str) -> bool:
         print(f"[ContentScanner] ⏭️ Skipping unsupported: {ext}")
         return False
     
+    # Only delays files that are still being written
+    if not wait_until_written(file_path):
+        print(f"[ContentScanner] ⏭️ File not ready or empty: {file_path}")
+        return False
+    
+    # Same image scanned before (by content) - judge the cached detections with the current settings
+    cache_key = _detection_cache_key(file_path)
+    cached = _cached_detections(cache_key)
+    if cached is not None:
+        if LOGGING_LEVEL in ('detailed', 'debug'):
+            print(f"[ContentScanner] ♻️ Cached result: {os.path.basename(file_path)}")
+        return _detections_flagged(cached)
+    
     detector = get_detector()
     if detector is None:
         return False
@@ -252,16 +448,9 @@ def check_nudity_detection(file_path: str) -> bool:
     scan_path = _get_safe_temp_path(file_path)
     
     try:
-        # Wait briefly for file to be fully written
-        time.sleep(0.5)
-        
-        # Verify file is readable
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-            print(f"[ContentScanner] ⏭️ File not ready or empty: {file_path}")
-            return False
-        
         filename = os.path.basename(file_path)
         results = detector.detect(scan_path)
+        _store_detections(cache_key, results)
         
         # Log all detections found
         if results:
@@ -274,15 +463,7 @@ def check_nudity_detection(file_path: str) -> bool:
             print(f"[ContentScanner] ✅ No detections: {filename}")
         
         # Check for NSFW content
-        for detection in results:
-            label = detection.get('class', '')
-            confidence = detection.get('score', 0)
-            
-            if label in NSFW_LABELS and confidence >= NUDITY_THRESHOLD:
-                print(f"[ContentScanner] 🔞 NSFW FLAGGED: {label} ({confidence:.1%}) >= threshold ({NUDITY_THRESHOLD:.0%})")
-                return True
-                
-        return False
+        return _detections_flagged(results)
         
     except Exception as e:
         print(f"[ContentScanner] ❌ Error scanning {file_path}: {e}")
@@ -459,38 +640,199 @@ def should_skip_scanning(file_path: str, skip_archive: bool = False) -> bool:
     return False
 
 
+# Folder scans: images decoded ahead by the prefetch pool, then run through NudeNet in batches
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.avi', '.mkv')
+DETECTION_MAX_SIDE = 640  # Images are shrunk to this before batching (NudeNet infers at 320px)
+
+
+def _load_for_detection(file_path: str):
+    """
+    Decode and shrink an image for NudeNet (runs in the prefetch pool).
+    Reads the bytes in Python, so Unicode paths need no temp copy.
+    Returns None if the file can't be decoded.
+    """
+    try:
+        import cv2
+        import numpy as np
+        
+        with open(file_path, 'rb') as f:
+            data = np.frombuffer(f.read(), np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"[ContentScanner] ⏭️ Could not decode: {os.path.basename(file_path)}")
+            return None
+        
+        height, width = image.shape[:2]
+        scale = DETECTION_MAX_SIDE / max(height, width)
+        if scale < 1:
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return image
+    except Exception as e:
+        print(f"[ContentScanner] ❌ Error reading {file_path}: {e}")
+        return None
+
+
+def _prepare_for_scan(file_path: str, get_metadata_func, detector):
+    """
+    Prefetch step for one file. Returns (verdict, image, cache_key): verdict
+    is True/False when the file is already decided (keyword match, cached
+    detections, unreadable, unsupported), or None with a decoded image still
+    to be run through the detector (image is also None for videos, which are
+    scanned separately). cache_key is where the new detections are stored.
+    """
+    metadata = None
+    if get_metadata_func:
+        try:
+            metadata = get_metadata_func(file_path)
+        except:
+            pass
+    
+    # Keywords first (fast)
+    if metadata and check_nsfw_keywords(metadata):
+        return True, None, None
+    
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in VIDEO_EXTENSIONS:
+        return None, None, None
+    if ext not in IMAGE_EXTENSIONS:
+        return False, None, None
+    
+    # Free for files that have existed a while; waits only on files still being written
+    if not wait_until_written(file_path):
+        return False, None, None
+    
+    # Unchanged content scanned before - no inference, just apply the current threshold/labels
+    cache_key = _detection_cache_key(file_path)
+    cached = _cached_detections(cache_key)
+    if cached is not None:
+        return _detections_flagged(cached), None, None
+    if detector is None:
+        return False, None, None
+    
+    image = _load_for_detection(file_path)
+    if image is None:
+        return False, None, None
+    return None, image, cache_key
+
+
+def _detect_images(detector, images: List[Any]) -> List[Optional[List[Dict[str, Any]]]]:
+    """
+    Run one batch of decoded images through NudeNet (one ONNX call where
+    supported). Images that fail on their own get None instead of detections.
+    """
+    try:
+        if hasattr(detector, 'detect_batch'):
+            return detector.detect_batch(images, batch_size=len(images))
+        return [detector.detect(image) for image in images]
+    except Exception as e:
+        print(f"[ContentScanner] ❌ Batch detection failed ({e}), retrying one by one")
+    
+    results = []
+    for image in images:
+        try:
+            results.append(detector.detect(image))
+        except Exception as e:
+            print(f"[ContentScanner] ❌ Error scanning image: {e}")
+            results.append(None)
+    return results
+
+
+def scan_files(
+    file_paths: List[str],
+    get_metadata_func=None,
+    inference_batch_size: int = 8,
+    prefetch_workers: int = 4
+) -> Generator[Tuple[str, bool], None, None]:
+    """
+    Check files for NSFW content without moving anything.
+    
+    A pool of prefetch threads reads metadata and decodes/shrinks upcoming
+    images while NudeNet runs over the current batch. Also the unit of work
+    of a scan worker process (see utils/scan_workers.py).
+    
+    Yields:
+        (file_path, flagged) in the order of file_paths
+    """
+    if not file_paths:
+        return
+    
+    detector = get_detector()
+    inference_batch_size = max(int(inference_batch_size), 1)
+    chunks = [file_paths[i:i + inference_batch_size] for i in range(0, len(file_paths), inference_batch_size)]
+    
+    with ThreadPoolExecutor(max_workers=max(int(prefetch_workers), 1),
+                            thread_name_prefix='scan-prefetch') as pool:
+        def submit(chunk):
+            return [pool.submit(_prepare_for_scan, file_path, get_metadata_func, detector) for file_path in chunk]
+        
+        # Keep two batches decoding ahead of the one being inferred (bounds memory)
+        ahead = deque(submit(chunk) for chunk in chunks[:2])
+        
+        for index, chunk in enumerate(chunks):
+            prepared = [future.result() for future in ahead.popleft()]
+            if index + 2 < len(chunks):
+                ahead.append(submit(chunks[index + 2]))
+            
+            verdicts = [verdict for verdict, _, _ in prepared]
+            pending = [slot for slot, (_, image, _) in enumerate(prepared) if image is not None]
+            if pending:
+                results = _detect_images(detector, [prepared[slot][1] for slot in pending])
+                for slot, detections in zip(pending, results):
+                    if detections is None:
+                        verdicts[slot] = False
+                        continue
+                    _store_detections(prepared[slot][2], detections)
+                    if detections:
+                        print(f"[ContentScanner] 🔍 Scanning: {os.path.basename(chunk[slot])}")
+                        for detection in detections:
+                            print(f"    └─ {detection.get('class', '')}: {detection.get('score', 0):.1%}")
+                    verdicts[slot] = _detections_flagged(detections)
+            
+            for file_path, flagged in zip(chunk, verdicts):
+                if flagged is None:
+                    # Videos: frame extraction + detection, one at a time
+                    flagged = check_video_nudity(file_path)
+                yield file_path, flagged
+
+
 def scan_folder_batch(
     folder_path: str, 
     batch_size: int = 50,
     get_metadata_func=None,
-    skip_archive: bool = False
+    skip_archive: bool = False,
+    inference_batch_size: int = 8,
+    prefetch_workers: int = 4,
+    worker_pool=None,
+    walk_workers: int = DEFAULT_WALK_WORKERS
 ) -> Generator[Dict[str, Any], None, None]:
     """
     Scan folder for NSFW content in batches.
     
+    Files are checked by scan_files (in this process, or in scan worker
+    processes if worker_pool is given); verdicts and moves to NSFW folders
+    are applied in file order.
+    
     Args:
         folder_path: Path to folder to scan
-        batch_size: Number of files to process per batch
+        batch_size: Number of files to process between progress updates
         get_metadata_func: Function to get metadata for a file
         skip_archive: If True, skip files in Archive folders (for full scans)
+        inference_batch_size: Number of images per NudeNet inference call
+        prefetch_workers: Number of threads decoding images ahead of inference
+        worker_pool: Optional ScanWorkerPool to run the checks in
+        walk_workers: Number of threads listing folders while collecting files
         
     Yields:
-        Progress dict: {'processed': int, 'total': int, 'moved': int, 'current': str}
+        Progress dict: {'processed': int, 'total': int, 'moved': int, 'current': str, 'rate': images/sec}
     """
     # Collect all media files (not in NSFW/SAFE folders, optionally skip Archive)
-    image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
-    video_extensions = ('.mp4', '.webm', '.mov', '.avi', '.mkv')
-    media_extensions = image_extensions + video_extensions
-    files_to_scan = []
-    
-    for root, dirs, files in os.walk(folder_path):
-        # Skip NSFW, SAFE, and optionally Archive folders
-        if should_skip_scanning(root, skip_archive=skip_archive):
-            continue
-            
-        for filename in files:
-            if filename.lower().endswith(media_extensions):
-                files_to_scan.append(os.path.join(root, filename))
+    media_extensions = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+    # Skip NSFW, SAFE, and optionally Archive folders (and everything below them)
+    files_to_scan = [file_path for file_path, _, _ in walk_media(
+        folder_path, media_extensions, workers=walk_workers, with_stat=False,
+        skip_folder=lambda folder: should_skip_scanning(folder, skip_archive=skip_archive))]
     
     total = len(files_to_scan)
     processed = 0
@@ -503,44 +845,44 @@ def scan_folder_batch(
             'total': 0,
             'moved': 0,
             'current': '',
+            'rate': 0,
             'complete': True
         }
         return
     
-    for file_path in files_to_scan:
-        # Get metadata if function provided
-        metadata = None
-        if get_metadata_func:
-            try:
-                metadata = get_metadata_func(file_path)
-            except:
-                pass
-        
-        # Scan content
-        if scan_media_content(file_path, metadata):
-            if move_to_nsfw_folder(file_path):
-                moved += 1
+    start_time = time.monotonic()
+    if worker_pool is not None:
+        verdicts = worker_pool.scan_files(files_to_scan, get_metadata_func, inference_batch_size)
+    else:
+        verdicts = scan_files(files_to_scan, get_metadata_func, inference_batch_size, prefetch_workers)
+    
+    for file_path, flagged in verdicts:
+        if flagged and move_to_nsfw_folder(file_path):
+            moved += 1
         
         processed += 1
         
         # Yield progress every batch
         if processed % batch_size == 0 or processed == total:
+            elapsed = time.monotonic() - start_time
             yield {
                 'processed': processed,
                 'total': total,
                 'moved': moved,
                 'current': os.path.basename(file_path),
+                'rate': round(processed / elapsed, 1) if elapsed > 0 else 0,
                 'complete': processed >= total
             }
 
 
-def scan_single_file(file_path: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+def scan_single_file(file_path: str, metadata: Optional[Dict[str, Any]] = None, worker_pool=None) -> bool:
     """
     Scan a single file and move to NSFW folder if detected.
     
     Args:
         file_path: Path to file
         metadata: Optional metadata dictionary
+        worker_pool: Optional ScanWorkerPool to run the check in
         
     Returns:
         True if file was moved, False otherwise
@@ -550,7 +892,11 @@ def scan_single_file(file_path: str, metadata: Optional[Dict[str, Any]] = None)
         return False
     
     # Scan content
-    if scan_media_content(file_path, metadata):
+    if worker_pool is not None:
+        flagged = worker_pool.check(file_path, metadata)
+    else:
+        flagged = scan_media_content(file_path, metadata)
+    if flagged:
         return move_to_nsfw_folder(file_path) is not None
     
     return False
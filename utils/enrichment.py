@@ -0,0 +1,112 @@
+"""
+Enrichment Service Module
+Runs metadata enrichment on a small pool of worker threads fed by a priority
+queue, so files the user is looking at are enriched before the backlog and a
+large library is worked through in parallel instead of one file at a time.
+"""
+
+import heapq
+import itertools
+import threading
+from typing import Callable, Iterable, Optional
+
+# Lower value = handled first
+PRIORITY_VISIBLE = 0   # hero / tiles currently on screen
+PRIORITY_NEW = 1       # files that just arrived
+PRIORITY_BACKLOG = 2   # everything found by a directory sync
+
+
+class EnrichmentService:
+    """
+    Deduplicating priority queue of file paths plus worker threads that call
+    `enrich(path)` for each one. Submitting a queued path again with a better
+    priority moves it ahead; submitting it with a worse one is a no-op.
+    """
+
+    def __init__(self, enrich: Callable[[str], bool], workers: int = 2,
+                 on_idle: Optional[Callable[[int], None]] = None):
+        self._enrich = enrich
+        self._on_idle = on_idle
+        self.workers = max(int(workers), 1)
+
+        self._condition = threading.Condition()
+        self._heap = []
+        self._queued = {}      # path -> best queued priority
+        self._counter = itertools.count()  # FIFO order within a priority
+        self._threads = []
+        self._active = 0
+        self._processed = 0    # files enriched since the queue was last empty
+
+    def __len__(self):
+        with self._condition:
+            return len(self._queued)
+
+    def submit(self, path: str, priority: int = PRIORITY_BACKLOG):
+        self.submit_many((path,), priority)
+
+    def submit_many(self, paths: Iterable[str], priority: int = PRIORITY_BACKLOG):
+        """Queue paths for enrichment (starting the workers on first use)"""
+        added = False
+        with self._condition:
+            for path in paths:
+                queued = self._queued.get(path)
+                if queued is not None and queued <= priority:
+                    continue
+                self._queued[path] = priority
+                heapq.heappush(self._heap, (priority, next(self._counter), path))
+                added = True
+            if added:
+                self._start_workers()
+                self._condition.notify_all()
+
+    def clear(self):
+        """Drop everything that is still queued"""
+        with self._condition:
+            self._heap = []
+            self._queued = {}
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {'queued': len(self._queued), 'active': self._active, 'workers': self.workers}
+
+    def _start_workers(self):
+        """Start worker threads up to the configured count (caller holds the condition)"""
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, daemon=True,
+                                      name=f"enrichment-{len(self._threads)}")
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_path(self) -> str:
+        """Block until a path is available and claim it"""
+        with self._condition:
+            while True:
+                while self._heap:
+                    priority, _, path = heapq.heappop(self._heap)
+                    # Skip entries superseded by a better-priority resubmission
+                    if self._queued.get(path) == priority:
+                        del self._queued[path]
+                        self._active += 1
+                        return path
+                self._condition.wait()
+
+    def _worker(self):
+        while True:
+            path = self._next_path()
+            enriched = False
+            try:
+                enriched = self._enrich(path)
+            except Exception as e:
+                print(f"🏷️ [METADATA] Error enriching {path}: {e}")
+            finally:
+                with self._condition:
+                    self._active -= 1
+                    if enriched:
+                        self._processed += 1
+                    idle = not self._queued and not self._active
+                    processed = self._processed
+                    if idle:
+                        self._processed = 0
+            if idle and processed and self._on_idle is not None:
+                self._on_idle(processed)
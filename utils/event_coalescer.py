@@ -0,0 +1,131 @@
+"""
+Event Coalescer Module
+Merges bursts of file system events per path (e.g. created + modified +
+modified + moved when a generator writes a temp file and renames it) over a
+short window, and hands the net changes to the app as one batch.
+"""
+
+import threading
+import time
+from typing import Callable, Dict
+
+# Net change kinds
+UPSERT = 'upsert'
+REMOVE = 'remove'
+
+
+class FileEventCoalescer:
+    """
+    Collects per-path changes and applies them through `apply_batch(changes)`
+    once no new event arrived for `window` seconds (or at the latest
+    `max_delay` seconds after the first event of the batch).
+
+    `changes` maps path -> {'kind': UPSERT | REMOVE, 'created': bool}, where
+    'created' marks files that are new (created, or renamed from a file
+    created in the same batch) rather than modified.
+    """
+
+    def __init__(self, apply_batch: Callable[[Dict[str, dict]], None], window: float = 0.25,
+                 max_delay: float = 1.0):
+        self._apply_batch = apply_batch
+        self.window = max(window, 0)
+        self.max_delay = max(max_delay, self.window)
+
+        self._condition = threading.Condition()
+        self._apply_lock = threading.Lock()   # batches are applied one at a time, in order
+        self._pending = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._thread = None
+        self.events = 0
+        self.batches = 0
+
+    # ----------------------------------------
+    # Events
+    # ----------------------------------------
+
+    def created(self, path: str):
+        self._record(path, UPSERT, created=True)
+
+    def modified(self, path: str):
+        self._record(path, UPSERT)
+
+    def deleted(self, path: str):
+        self._record(path, REMOVE)
+
+    def moved(self, src_path: str, dest_path: str):
+        with self._condition:
+            # A file created in this batch and renamed (temp file -> final name) is still new
+            was_created = self._pending.get(src_path, {}).get('created', False)
+            self._set(src_path, REMOVE, False)
+            self._set(dest_path, UPSERT, was_created)
+            self._touch()
+
+    def _record(self, path: str, kind: str, created: bool = False):
+        with self._condition:
+            previous = self._pending.get(path)
+            # created + modified stays a creation; a deletion in between starts over
+            if kind == UPSERT and previous is not None and previous['kind'] == UPSERT:
+                created = created or previous['created']
+            self._set(path, kind, created)
+            self._touch()
+
+    def _set(self, path: str, kind: str, created: bool):
+        self._pending.pop(path, None)  # re-insert so batch order follows the latest event
+        self._pending[path] = {'kind': kind, 'created': created}
+
+    def _touch(self):
+        """Note an event and wake the flush thread (caller holds the condition)"""
+        now = time.monotonic()
+        if not self._first_event:
+            self._first_event = now
+        self._last_event = now
+        self.events += 1
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name='event-coalescer')
+            self._thread.start()
+        self._condition.notify_all()
+
+    # ----------------------------------------
+    # Flushing
+    # ----------------------------------------
+
+    def flush(self):
+        """Apply everything pending now (e.g. before handling a directory event)"""
+        with self._apply_lock:
+            with self._condition:
+                batch = self._take()
+            if batch:
+                self._apply(batch)
+
+    def _take(self) -> Dict[str, dict]:
+        """Swap out the pending changes (caller holds the condition)"""
+        batch, self._pending = self._pending, {}
+        self._first_event = 0.0
+        return batch
+
+    def _apply(self, batch: Dict[str, dict]):
+        self.batches += 1
+        try:
+            self._apply_batch(batch)
+        except Exception as e:
+            print(f"🗂️ [FILE-INDEX] Error applying {len(batch)} file changes: {e}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # Wait for the burst to go quiet, but don't hold changes back forever
+                while True:
+                    now = time.monotonic()
+                    deadline = min(self._last_event + self.window, self._first_event + self.max_delay)
+                    if now >= deadline or not self._pending:
+                        break
+                    self._condition.wait(deadline - now)
+
+            with self._apply_lock:
+                with self._condition:
+                    batch = self._take()
+                if batch:
+                    self._apply(batch)
@@ -0,0 +1,269 @@
+"""
+Folder Tree Module
+Tree of the library's folders, kept in step with the file index. Every node
+holds the paths of the files directly in it and counts for its whole subtree
+(total / image / video / NSFW / content-locked / NSFW-or-locked files,
+newest file), so folder
+navigation (breadcrumbs, sibling and child folders, recursive folder filters)
+is a lookup instead of a pass over every indexed file.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+
+# Folder name that marks archived content anywhere in a record's subfolder path
+ARCHIVE_FOLDER = 'archive'
+
+
+def _newer(record: Dict[str, Any], other: Optional[Dict[str, Any]]) -> bool:
+    # Same ordering as the index (mod_time, then path)
+    return other is None or (record['mod_time'], record['path']) > (other['mod_time'], other['path'])
+
+
+class FolderNode:
+    """One folder. `path` is the subfolder path relative to the library ('' for the root)."""
+
+    __slots__ = ('name', 'path', 'parent', 'children', 'files', 'total', 'images', 'videos',
+                 'nsfw', 'locked', 'restricted', 'newest', '_newest_stale', '_paths', '_frozen', '_changed', '_files_changed')
+
+    def __init__(self, name: str, path: str, parent: Optional['FolderNode'] = None):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.children: Dict[str, 'FolderNode'] = {}
+        self.files = set()  # paths directly in this folder
+        # Subtree counts
+        self.total = 0
+        self.images = 0
+        self.videos = 0
+        self.nsfw = 0
+        self.locked = 0
+        self.restricted = 0  # NSFW or content-locked (the two sets can overlap or be disjoint)
+        self.newest: Optional[Dict[str, Any]] = None
+        self._newest_stale = False
+        self._paths = None
+        # Live nodes: last frozen copy, reused by the next snapshot while nothing below changed
+        self._frozen = None
+        self._changed = True
+        self._files_changed = True
+
+    def __repr__(self):
+        return f"FolderNode({self.path!r}, total={self.total})"
+
+    @property
+    def archived(self) -> bool:
+        return ARCHIVE_FOLDER in self.path.lower().split('/')
+
+    def child_names(self) -> List[str]:
+        return sorted(self.children)
+
+    def walk(self) -> Iterator['FolderNode']:
+        """This node and every node below it"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+    def paths(self) -> frozenset:
+        """Paths of every file in this folder and its subfolders (cached on snapshot copies)"""
+        if self._paths is not None:
+            return self._paths
+        paths = frozenset().union(*[node.files for node in self.walk()])
+        if isinstance(self.files, frozenset):
+            self._paths = paths
+        return paths
+
+    def has_visible(self, media_type: str = 'all', hide_nsfw: bool = False, hide_locked: bool = False,
+                    hide_archived: bool = False) -> bool:
+        """
+        Whether the folder holds anything to show under these filters. Judged
+        from the counts alone, so a folder whose hidden files are all of the
+        other media type still counts as visible.
+        """
+        if hide_archived and self.archived:
+            return False
+        count = {'image': self.images, 'video': self.videos}.get(media_type, self.total)
+        if hide_nsfw and hide_locked:
+            hidden = self.restricted
+        elif hide_nsfw:
+            hidden = self.nsfw
+        elif hide_locked:
+            hidden = self.locked
+        else:
+            hidden = 0
+        return count > 0 and hidden < self.total
+
+    def to_dict(self, depth: int = 1, **visibility) -> Dict[str, Any]:
+        """
+        JSON description of the folder and `depth` levels of subfolders
+        (only those with visible content). The newest file and its mtime are
+        left out when the visibility flags would hide it.
+        """
+        newest = self.newest
+        if newest is not None and (
+                (visibility.get('hide_nsfw') and newest.get('is_nsfw')) or
+                (visibility.get('hide_locked') and newest.get('is_content_locked')) or
+                (visibility.get('hide_archived') and ARCHIVE_FOLDER in newest['subfolder'].lower().split('/'))):
+            newest = None
+        data = {
+            'name': self.name,
+            'path': self.path,
+            'total': self.total,
+            'images': self.images,
+            'videos': self.videos,
+            'nsfw': self.nsfw,
+            'locked': self.locked,
+            'restricted': self.restricted,
+            'newest_mtime': newest['mod_time'] if newest is not None else None,
+            'newest': {
+                'filename': newest['filename'],
+                'subfolder': newest['subfolder'],
+                'media_type': newest['media_type'],
+                'mod_time': newest['mod_time']
+            } if newest is not None else None,
+            'child_count': len(self.children)
+        }
+        if depth > 0:
+            data['children'] = [self.children[name].to_dict(depth - 1, **visibility)
+                                for name in self.child_names()
+                                if self.children[name].has_visible(**visibility)]
+        return data
+
+
+class FolderTree:
+    """
+    Folder tree maintained by MediaIndex (under its lock). NSFW / locked /
+    restricted counts follow the index's flag sets, so they are adjusted
+    separately from adding and removing files.
+    """
+
+    def __init__(self):
+        self.root = FolderNode('', '')
+        self._stale = set()  # nodes whose newest file was removed
+
+    def find(self, folder: str) -> Optional[FolderNode]:
+        """Node for a subfolder path ('a/b'), or None if no indexed file is below it"""
+        node = self.root
+        for name in folder.replace('\\', '/').split('/'):
+            if not name:
+                continue
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    def lineage(self, node: FolderNode) -> Iterator[FolderNode]:
+        """A node and its ancestors up to the root"""
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def add(self, record: Dict[str, Any]):
+        """Count a new file in its folder and every folder above it"""
+        node = self.root
+        for name in record.get('subfolder', '').split('/'):
+            if not name:
+                continue
+            child = node.children.get(name)
+            if child is None:
+                child = FolderNode(name, f"{node.path}/{name}" if node.path else name, node)
+                node.children[name] = child
+            node = child
+        node.files.add(record['path'])
+        node._files_changed = True
+
+        is_video = record.get('media_type') == 'video'
+        for folder in self.lineage(node):
+            folder._changed = True
+            folder.total += 1
+            if is_video:
+                folder.videos += 1
+            else:
+                folder.images += 1
+            if not folder._newest_stale and _newer(record, folder.newest):
+                folder.newest = record
+
+    def remove(self, record: Dict[str, Any], nsfw: bool = False, locked: bool = False):
+        """Drop a file (counted as nsfw / locked as given), pruning folders left empty"""
+        node = self.find(record.get('subfolder', ''))
+        if node is None or record['path'] not in node.files:
+            return
+        node.files.discard(record['path'])
+        node._files_changed = True
+
+        is_video = record.get('media_type') == 'video'
+        for folder in list(self.lineage(node)):
+            folder._changed = True
+            folder.total -= 1
+            if is_video:
+                folder.videos -= 1
+            else:
+                folder.images -= 1
+            folder.nsfw -= nsfw
+            folder.locked -= locked
+            folder.restricted -= nsfw or locked
+            if folder.newest is record:
+                # Found again from the remaining files when the next snapshot is taken
+                folder.newest = None
+                folder._newest_stale = True
+                self._stale.add(folder)
+            if folder.total <= 0 and folder.parent is not None:
+                del folder.parent.children[folder.name]
+
+    def adjust(self, record: Dict[str, Any], nsfw: int = 0, locked: int = 0, restricted: int = 0):
+        """
+        Apply a change of a file's NSFW / locked flags to its folders' counts.
+        `restricted` is the change of (nsfw or locked), so both flags' old and
+        new values are needed to work it out.
+        """
+        node = self.find(record.get('subfolder', ''))
+        if node is None or record['path'] not in node.files:
+            return
+        for folder in self.lineage(node):
+            folder._changed = True
+            folder.nsfw += nsfw
+            folder.locked += locked
+            folder.restricted += restricted
+
+    def copy(self, records: Dict[str, Dict[str, Any]]) -> 'FolderTree':
+        """
+        Frozen copy for an index snapshot (file sets frozen, newest files
+        resolved). Subtrees unchanged since the last copy are shared with it,
+        so a copy after a few file changes only rebuilds the changed folders
+        and their ancestors. Frozen nodes have no parent link.
+        """
+        self._resolve_newest(records)
+        tree = FolderTree()
+        tree.root = self._freeze(self.root)
+        return tree
+
+    def _freeze(self, node: FolderNode) -> FolderNode:
+        # Every change updates the counts of all ancestors, so an unchanged node has an unchanged subtree
+        if not node._changed and node._frozen is not None:
+            return node._frozen
+        frozen = FolderNode(node.name, node.path)
+        previous = node._frozen
+        frozen.files = previous.files if previous is not None and not node._files_changed else frozenset(node.files)
+        frozen.total, frozen.images, frozen.videos = node.total, node.images, node.videos
+        frozen.nsfw, frozen.locked, frozen.restricted = node.nsfw, node.locked, node.restricted
+        frozen.newest = node.newest
+        frozen.children = {name: self._freeze(child) for name, child in node.children.items()}
+        node._frozen = frozen
+        node._changed = node._files_changed = False
+        return frozen
+
+    def _resolve_newest(self, records: Dict[str, Dict[str, Any]]):
+        """Recompute newest where a removal left it unknown (deepest folders first)"""
+        for node in sorted(self._stale, key=lambda node: node.path.count('/') + bool(node.path), reverse=True):
+            newest = None
+            for path in node.files:
+                record = records.get(path)
+                if record is not None and _newer(record, newest):
+                    newest = record
+            for child in node.children.values():
+                if child.newest is not None and _newer(child.newest, newest):
+                    newest = child.newest
+            node.newest = newest
+            node._newest_stale = False
+            node._changed = True
+        self._stale.clear()
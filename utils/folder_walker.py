@@ -0,0 +1,94 @@
+"""
+Folder Walker Module
+Lists media folders with os.scandir, so folder/file checks come from the
+directory entries instead of an isdir/getmtime call per file (each of which is
+a round trip on network drives), and walks folder trees on a thread pool: every
+subfolder found is listed as soon as a worker is free, so a full walk is bound
+by I/O parallelism rather than by per-file latency.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, List, Tuple
+
+# (path, mod_time, size) of one media file
+FileEntry = Tuple[str, float, int]
+
+# Folder listings in flight at once (they mostly wait on the file system)
+DEFAULT_WALK_WORKERS = 8
+
+
+def list_media_folder(folder_path: str, extensions: Tuple[str, ...],
+                      with_stat: bool = True) -> Tuple[List[FileEntry], List[str]]:
+    """
+    List a single folder.
+    Returns (media_files, subfolders) where media_files are (path, mod_time, size).
+    With with_stat=False files aren't stat-ed and mod_time/size are 0.
+    """
+    media_files = []
+    subfolders = []
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        subfolders.append(entry.path)
+                        continue
+                    if not entry.name.lower().endswith(extensions):
+                        continue
+                    if with_stat:
+                        # Windows fills this in from the directory listing; elsewhere it is one stat
+                        stat = entry.stat()
+                        media_files.append((entry.path, stat.st_mtime, stat.st_size))
+                    else:
+                        media_files.append((entry.path, 0, 0))
+                except OSError:
+                    continue  # Skip if file unsafe/removed
+    except OSError as e:
+        print(f"🗂️ [FILE-INDEX] Error syncing folder {folder_path}: {e}")
+
+    return media_files, subfolders
+
+
+def walk_folders(roots: Iterable[str], visit: Callable[[str], Tuple[Iterable, Iterable[str]]],
+                 workers: int = DEFAULT_WALK_WORKERS) -> Iterable:
+    """
+    Yield the entries of every folder below `roots`. `visit(folder)` returns
+    (entries, subfolders) for one folder; subfolders are visited in turn.
+    Folders are visited on `workers` threads, so entries come out grouped by
+    folder but in no particular folder order.
+    """
+    roots = list(roots)
+    if workers <= 1:
+        stack = roots[::-1]
+        while stack:
+            entries, subfolders = visit(stack.pop())
+            yield from entries
+            stack.extend(reversed(list(subfolders)))
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='folder-walk')
+    try:
+        pending = {executor.submit(visit, root) for root in roots}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subfolders = future.result()
+                pending.update(executor.submit(visit, folder) for folder in subfolders)
+                yield from entries
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def walk_media(folder_path: str, extensions: Tuple[str, ...], workers: int = DEFAULT_WALK_WORKERS,
+               skip_folder: Callable[[str], bool] = None, with_stat: bool = True) -> Iterable[FileEntry]:
+    """
+    Yield (path, mod_time, size) for every media file below folder_path.
+    Folders for which skip_folder(path) is true are not entered.
+    """
+    def visit(folder):
+        if skip_folder is not None and skip_folder(folder):
+            return (), ()
+        return list_media_folder(folder, extensions, with_stat)
+
+    return walk_folders([folder_path], visit, workers)
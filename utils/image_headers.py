@@ -0,0 +1,208 @@
+"""
+Image Headers Module
+Reads the metadata-carrying parts of JPEG, PNG and WebP files straight from
+the byte stream (JPEG APP1/COM segments, PNG text chunks, WebP EXIF/XMP
+chunks) without handing the file to an image decoder. Pixel data is skipped
+with seeks, never read.
+"""
+
+import re
+import struct
+import zlib
+from typing import Any, Dict, Optional
+
+# JPEG start-of-frame markers (carry the image size); C4, C8 and CC are not frames
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_JPEG_EXIF_PREFIX = b'Exif\x00\x00'
+_JPEG_XMP_PREFIX = b'http://ns.adobe.com/xap/1.0/\x00'
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Refuse to buffer absurd text chunks from corrupt files
+_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+# XMP elements that can hold a generation prompt (dc:description, exif:UserComment)
+_XMP_TEXT_RE = re.compile(
+    rb'<(?:dc:description|exif:UserComment)\b[^>]*>.*?<rdf:li\b[^>]*>(.*?)</rdf:li>', re.S)
+
+
+def _empty_headers() -> Dict[str, Any]:
+    return {'width': None, 'height': None, 'text': {}, 'exif': None, 'xmp': None}
+
+
+def read_headers(file_path: str, ext: str) -> Optional[Dict[str, Any]]:
+    """
+    Read metadata headers for a .jpg/.jpeg/.png/.webp file. Returns a dict with
+    width, height, text (PNG text chunks / JPEG comment), exif (raw TIFF bytes)
+    and xmp (raw packet), or None for other formats. Raises ValueError if the
+    file isn't laid out as expected, so callers can fall back to a full decoder.
+    """
+    with open(file_path, 'rb') as f:
+        if ext in ('.jpg', '.jpeg'):
+            return _read_jpeg(f)
+        if ext == '.png':
+            return _read_png(f)
+        if ext == '.webp':
+            return _read_webp(f)
+    return None
+
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("unexpected end of file")
+    return data
+
+
+def _read_jpeg(f) -> Dict[str, Any]:
+    """Walk JPEG segments up to the start of scan (SOS)"""
+    headers = _empty_headers()
+    if _read_exact(f, 2) != b'\xff\xd8':
+        raise ValueError("not a JPEG file")
+
+    while True:
+        byte = _read_exact(f, 1)
+        if byte != b'\xff':
+            raise ValueError("JPEG marker expected")
+        marker = _read_exact(f, 1)[0]
+        while marker == 0xFF:  # fill bytes
+            marker = _read_exact(f, 1)[0]
+
+        if marker == 0xDA or marker == 0xD9:  # start of scan / end of image
+            return headers
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # markers without a payload
+            continue
+
+        length = struct.unpack('>H', _read_exact(f, 2))[0] - 2
+        if length < 0:
+            raise ValueError("bad JPEG segment length")
+
+        if marker == 0xE1 or marker == 0xFE:
+            payload = _read_exact(f, length)
+            if marker == 0xFE:
+                # A repeated COM segment replaces the earlier one, like Pillow's img.info['comment']
+                headers['text']['comment'] = payload
+            elif payload.startswith(_JPEG_EXIF_PREFIX) and headers['exif'] is None:
+                headers['exif'] = payload[len(_JPEG_EXIF_PREFIX):]
+            elif payload.startswith(_JPEG_XMP_PREFIX) and headers['xmp'] is None:
+                headers['xmp'] = payload[len(_JPEG_XMP_PREFIX):]
+        elif marker in _JPEG_SOF_MARKERS:
+            payload = _read_exact(f, length)
+            if len(payload) < 5:
+                raise ValueError("bad JPEG frame header")
+            headers['height'], headers['width'] = struct.unpack('>HH', payload[1:5])
+        else:
+            f.seek(length, 1)
+
+
+def _read_png(f) -> Dict[str, Any]:
+    """Collect tEXt/zTXt/iTXt chunks up to the first IDAT chunk"""
+    headers = _empty_headers()
+    if _read_exact(f, 8) != _PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+
+    while True:
+        length, chunk_type = struct.unpack('>I4s', _read_exact(f, 8))
+        if chunk_type in (b'IDAT', b'IEND'):
+            return headers
+
+        if chunk_type in (b'IHDR', b'tEXt', b'zTXt', b'iTXt', b'eXIf'):
+            if length > _MAX_CHUNK_BYTES:
+                raise ValueError("PNG chunk too large")
+            data = _read_exact(f, length)
+            f.seek(4, 1)  # CRC
+            if chunk_type == b'IHDR':
+                headers['width'], headers['height'] = struct.unpack('>II', data[:8])
+            elif chunk_type == b'eXIf':
+                headers['exif'] = data
+            else:
+                key, value = _decode_png_text(chunk_type, data)
+                if key == 'XML:com.adobe.xmp':
+                    headers['xmp'] = value.encode('utf-8')
+                elif key:
+                    headers['text'][key] = value
+        else:
+            f.seek(length + 4, 1)  # data + CRC
+
+
+def _decode_png_text(chunk_type: bytes, data: bytes):
+    """Decode a PNG text chunk into (keyword, text). Undecodable chunks yield (None, None)."""
+    keyword, sep, rest = data.partition(b'\x00')
+    if not sep:
+        return None, None
+    key = keyword.decode('latin-1')
+    try:
+        if chunk_type == b'tEXt':
+            return key, rest.decode('latin-1')
+        if chunk_type == b'zTXt':
+            # compression method byte, then zlib stream
+            return key, zlib.decompress(rest[1:]).decode('latin-1')
+        # iTXt: compression flag, compression method, language\0, translated keyword\0, text
+        compressed = rest[:1] == b'\x01'
+        _, _, rest = rest[2:].partition(b'\x00')
+        _, _, text = rest.partition(b'\x00')
+        if compressed:
+            text = zlib.decompress(text)
+        return key, text.decode('utf-8', errors='replace')
+    except zlib.error:
+        return None, None
+
+
+def _read_webp(f) -> Dict[str, Any]:
+    """Walk WebP RIFF chunks, seeking over image data to reach EXIF/XMP chunks"""
+    headers = _empty_headers()
+    riff, _, webp = struct.unpack('<4sI4s', _read_exact(f, 12))
+    if riff != b'RIFF' or webp != b'WEBP':
+        raise ValueError("not a WebP file")
+
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return headers
+        chunk_type, length = struct.unpack('<4sI', header)
+        padded = length + (length & 1)
+
+        if chunk_type in (b'VP8X', b'VP8 ', b'VP8L') and headers['width'] is None:
+            data = _read_exact(f, min(length, 30))
+            headers['width'], headers['height'] = _webp_dimensions(chunk_type, data)
+            f.seek(padded - len(data), 1)
+        elif chunk_type in (b'EXIF', b'XMP '):
+            if length > _MAX_CHUNK_BYTES:
+                raise ValueError("WebP chunk too large")
+            data = _read_exact(f, length)
+            f.seek(padded - length, 1)
+            if chunk_type == b'EXIF':
+                # Some writers keep the JPEG-style "Exif\0\0" prefix
+                headers['exif'] = data[len(_JPEG_EXIF_PREFIX):] if data.startswith(_JPEG_EXIF_PREFIX) else data
+            else:
+                headers['xmp'] = data
+        else:
+            f.seek(padded, 1)
+
+
+def _webp_dimensions(chunk_type: bytes, data: bytes):
+    if chunk_type == b'VP8X' and len(data) >= 10:
+        width = 1 + int.from_bytes(data[4:7], 'little')
+        height = 1 + int.from_bytes(data[7:10], 'little')
+        return width, height
+    if chunk_type == b'VP8 ' and len(data) >= 10 and data[3:6] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[6:10])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk_type == b'VP8L' and len(data) >= 5 and data[0] == 0x2F:
+        bits = int.from_bytes(data[1:5], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    raise ValueError("bad WebP image header")
+
+
+def xmp_texts(xmp: Optional[bytes]):
+    """Yield the description / UserComment strings of an XMP packet"""
+    if not xmp:
+        return
+    for match in _XMP_TEXT_RE.finditer(xmp):
+        text = match.group(1).decode('utf-8', errors='replace').strip()
+        if text:
+            yield _unescape_xml(text)
+
+
+def _unescape_xml(text: str) -> str:
+    return (text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+            .replace('&apos;', "'").replace('&#10;', '\n').replace('&amp;', '&'))
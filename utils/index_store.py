@@ -0,0 +1,131 @@
+"""
+Index Store Module
+Persists the media file index (records plus directory mtimes) to a local
+SQLite database, so startup can load the library in well under a second
+and only reconcile the folders that changed while the server was down.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+SCHEMA_VERSION = '1'
+
+
+class IndexStore:
+    """Thin SQLite wrapper used by MediaIndex for persistence"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS media (
+                path TEXT PRIMARY KEY,
+                mod_time REAL NOT NULL,
+                size INTEGER NOT NULL,
+                record TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS folders (
+                path TEXT PRIMARY KEY,
+                mod_time REAL NOT NULL
+            );
+        ''')
+
+        # Drop everything if the on-disk layout is from another version
+        if self.get_meta('schema_version') != SCHEMA_VERSION:
+            self.clear()
+            self.set_meta('schema_version', SCHEMA_VERSION)
+
+    # ----------------------------------------
+    # Meta values
+    # ----------------------------------------
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    # ----------------------------------------
+    # Records and folders
+    # ----------------------------------------
+
+    def load_records(self) -> List[Dict[str, Any]]:
+        """Load every persisted media record"""
+        records = []
+        with self._lock:
+            rows = self._conn.execute('SELECT record FROM media').fetchall()
+        for (blob,) in rows:
+            try:
+                records.append(json.loads(blob))
+            except ValueError:
+                continue
+        return records
+
+    def load_folders(self) -> Dict[str, float]:
+        """Load the directory mtimes recorded by the last directory sync"""
+        with self._lock:
+            rows = self._conn.execute('SELECT path, mod_time FROM folders').fetchall()
+        return dict(rows)
+
+    def save(self, records: Iterable[Dict[str, Any]], deleted_paths: Iterable[str],
+             folders: Optional[Dict[str, float]] = None):
+        """Write changed records, drop deleted ones and optionally replace the folder mtimes"""
+        rows = [
+            (record['path'], record['mod_time'], record.get('size', 0), json.dumps(dict(record)))
+            for record in records
+        ]
+        deleted = [(path,) for path in deleted_paths]
+
+        with self._lock, self._conn:
+            if rows:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO media (path, mod_time, size, record) VALUES (?, ?, ?, ?)', rows)
+            if deleted:
+                self._conn.executemany('DELETE FROM media WHERE path = ?', deleted)
+            if folders is not None:
+                self._conn.execute('DELETE FROM folders')
+                self._conn.executemany(
+                    'INSERT INTO folders (path, mod_time) VALUES (?, ?)', list(folders.items()))
+
+    def clear(self):
+        """Remove all persisted records and folders (meta values are kept)"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM media')
+            self._conn.execute('DELETE FROM folders')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(db_path: str, image_folder: str) -> Optional[IndexStore]:
+    """
+    Open (or create) the index database for an image folder.
+    Returns None if the database can't be opened - the app then simply
+    runs without persistence.
+    """
+    try:
+        store = IndexStore(db_path)
+    except Exception as e:
+        print(f"🗂️ [FILE-INDEX] Could not open index database {db_path}: {e}")
+        return None
+
+    # An index built for a different library is useless
+    folder_key = os.path.normcase(os.path.normpath(image_folder))
+    if store.get_meta('image_folder') != folder_key:
+        store.clear()
+        store.set_meta('image_folder', folder_key)
+    return store
@@ -0,0 +1,73 @@
+"""
+Keyword Matcher Module
+Matches prompts against the NSFW keyword list in a single pass. The keywords
+are compiled once into one regular expression whose alternatives are folded
+into a prefix tree (so 'nude', 'nudes' and 'nipple' share their common
+prefixes), which keeps the cost per prompt flat as the keyword list grows.
+Matchers are cached per keyword list, so they are only rebuilt when the
+settings change.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation of the keywords, factored by common prefix (longest match preferred)"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of a keyword
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A keyword ends here, but a longer one may continue
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Compiled keyword list. Matching is case-insensitive and, by default, by
+    substring (as before: 'ass' also matches 'glass'); with whole_words=True
+    keywords only match as whole words.
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = False):
+        self.keywords = tuple(sorted({keyword.strip().lower() for keyword in keywords if keyword and keyword.strip()}))
+        self.whole_words = whole_words
+        self._pattern = None
+        if self.keywords:
+            pattern = _trie_pattern(self.keywords)
+            if whole_words:
+                pattern = r'(?<!\w)(?:' + pattern + r')(?!\w)'
+            self._pattern = re.compile(pattern)
+
+    def __bool__(self):
+        return self._pattern is not None
+
+    def match(self, text: Optional[str]) -> Optional[str]:
+        """Return the first keyword found in text, or None"""
+        if not text or self._pattern is None:
+            return None
+        found = self._pattern.search(text.lower())
+        return found.group(0) if found else None
+
+
+@lru_cache(maxsize=8)
+def _compile(keywords: Tuple[str, ...], whole_words: bool) -> KeywordMatcher:
+    return KeywordMatcher(keywords, whole_words)
+
+
+def matcher_for(keywords: Iterable[str], whole_words: bool = False) -> KeywordMatcher:
+    """Shared matcher for a keyword list (compiled on first use, reused until the list changes)"""
+    return _compile(tuple(keywords), bool(whole_words))
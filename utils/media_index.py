@@ -0,0 +1,687 @@
+"""
+Media Index Module
+Keeps the in-memory list of media files up to date by applying file system
+deltas (create/modify/move/delete) directly, instead of re-walking the whole
+library for every change. A full reconciliation walk is still available for
+scheduled or manual directory syncs, and the index can be persisted to an
+IndexStore so startup does not need to walk the library at all.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Any, Set, Tuple, Union
+
+from utils.folder_tree import ARCHIVE_FOLDER, FolderTree
+from utils.folder_walker import DEFAULT_WALK_WORKERS, FileEntry, list_media_folder, walk_folders
+from utils.media_record import MediaRecord
+from utils.search_index import SearchIndex
+
+
+# Filtered views are cached per filter combination until the index changes
+VIEW_CACHE_SIZE = 32
+VIEW_CACHE_TTL = 60  # seconds
+
+
+def sort_key(record: Dict[str, Any]) -> Tuple[float, str]:
+    """Ordering of the index (used newest first); path breaks mod_time ties"""
+    return record['mod_time'], record['path']
+
+
+def bisect_newest_first(view: List[Dict[str, Any]], key: Tuple[float, str], inclusive: bool = False) -> int:
+    """
+    Binary search a newest-first list for the first record whose sort_key is
+    below `key` (or at/below it with inclusive=True).
+    """
+    lo, hi = 0, len(view)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        mid_key = sort_key(view[mid])
+        if mid_key < key or (inclusive and mid_key == key):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def page_after(view: List[Dict[str, Any]], cursor: Optional[Tuple[float, str]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Keyset pagination over a newest-first view: return up to `limit` records
+    that sort after `cursor` (the sort_key of the last record already shown,
+    or None for the first page). Unlike offsets, this does not shift when
+    new files are inserted at the front.
+    """
+    start = bisect_newest_first(view, cursor) if cursor is not None else 0
+    return view[start:start + limit]
+
+
+class IndexSnapshot:
+    """
+    Immutable, versioned copy of the index's ordered list and membership sets.
+    Readers filter and page over a snapshot without taking the index lock, so
+    page renders never wait on directory syncs or watcher updates, and a sync
+    replaces the whole view in one step instead of exposing a half-built one.
+
+    Records are shared with the live index (enrichment updates them in place);
+    only the list and the sets are frozen. Structures that didn't change since
+    the previous snapshot are shared with it rather than copied again, so e.g.
+    a flag flip only re-freezes the flag sets and the affected folders.
+    """
+
+    def __init__(self, index: 'MediaIndex', previous: Optional['IndexSnapshot'] = None):
+        # Built by MediaIndex.snapshot() under the index lock
+        changed = index._changed if previous is not None else None
+        self._index = index
+        self.version = index.version
+        if changed is None or 'items' in changed:
+            self.items: Tuple[Dict[str, Any], ...] = tuple(index.items)
+            self._records: Optional[Dict[str, Dict[str, Any]]] = None
+        else:
+            self.items, self._records = previous.items, previous._records
+        for name in ('nsfw', 'locked', 'archived', 'videos'):
+            if changed is None or name in changed:
+                setattr(self, name, frozenset(getattr(index, name)))
+            else:
+                setattr(self, name, getattr(previous, name))
+        self.folders = index.folders.copy(index.records)
+        self._views = OrderedDict()  # filter arguments -> (created, records)
+        self._views_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def records(self) -> Dict[str, Dict[str, Any]]:
+        """path -> record for this snapshot (built from items on first use, outside the index lock)"""
+        records = self._records
+        if records is None:
+            records = self._records = {record['path']: record for record in self.items}
+        return records
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        return self.items[0] if self.items else None
+
+    def latest_visible(self, media_type: str = 'all', hide_nsfw: bool = False, hide_locked: bool = False,
+                       hide_archived: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Newest record passing the visibility filters: walks the ordered list
+        only until the first record that isn't hidden, without building a view.
+        """
+        hidden = []
+        if media_type == 'image':
+            hidden.append(self.videos)
+        if hide_nsfw:
+            hidden.append(self.nsfw)
+        if hide_locked:
+            hidden.append(self.locked)
+        if hide_archived:
+            hidden.append(self.archived)
+        for record in self.items:
+            path = record['path']
+            if media_type == 'video' and path not in self.videos:
+                continue
+            if not any(path in paths for paths in hidden):
+                return record
+        return None
+
+    def filter(self, folder: str = '', recursive: bool = True, top_folder: str = '',
+               media_type: str = 'all', hide_nsfw: bool = False, hide_locked: bool = False,
+               hide_archived: bool = False, search: str = '') -> List[Dict[str, Any]]:
+        """Same as MediaIndex.filter, evaluated against this snapshot"""
+        search = ' '.join(search.lower().split())
+        # Search results also change when enrichment adds prompt text, without a new snapshot
+        key = (folder, recursive, top_folder, media_type, hide_nsfw, hide_locked, hide_archived,
+               search, self._index.search_version if search else 0)
+        with self._views_lock:
+            cached = self._views.get(key)
+            if cached is not None and time.time() - cached[0] < VIEW_CACHE_TTL:
+                self._views.move_to_end(key)
+                return cached[1]
+
+        view = self._filter(*key[:-1])
+        with self._views_lock:
+            self._views[key] = (time.time(), view)
+            self._views.move_to_end(key)
+            while len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        return view
+
+    def _filter(self, folder, recursive, top_folder, media_type, hide_nsfw, hide_locked, hide_archived,
+                search) -> List[Dict[str, Any]]:
+        candidates = None
+        if top_folder:
+            node = self.folders.root.children.get(top_folder)
+            candidates = node.paths() if node is not None else frozenset()
+        if folder:
+            node = self.folders.find(folder)
+            if node is None:
+                in_folder = frozenset()
+            else:
+                in_folder = node.paths() if recursive else node.files
+            candidates = in_folder if candidates is None else candidates & in_folder
+        if media_type == 'video':
+            candidates = self.videos if candidates is None else candidates & self.videos
+        if search:
+            matches = self._index.search(search)
+            if matches is not None:
+                candidates = matches if candidates is None else candidates & matches
+
+        hidden = []
+        if media_type == 'image':
+            hidden.append(self.videos)
+        if hide_nsfw:
+            hidden.append(self.nsfw)
+        if hide_locked:
+            hidden.append(self.locked)
+        if hide_archived:
+            hidden.append(self.archived)
+
+        if candidates is None:
+            # No restriction to a subset - walk the ordered list once, skipping hidden paths
+            hidden = frozenset().union(*hidden)
+            return [record for record in self.items if record['path'] not in hidden]
+        # Search postings may already know files this snapshot doesn't
+        allowed = candidates.difference(*hidden)
+        records = self.records
+        return sorted((records[path] for path in allowed if path in records),
+                      key=sort_key, reverse=True)
+
+
+class MediaIndex:
+    """
+    Path-keyed index of media records, with a list view sorted newest first,
+    per-flag / per-folder membership sets for filtering and a token index for
+    search.
+
+    Records are built by the `build_record(path, mod_time=None, size=None)`
+    callable supplied by the main app, which returns a MediaRecord (or
+    None if the path should not be listed). Paths are normalized with
+    os.path.normpath so watcher events and URL-derived paths resolve to the
+    same key.
+    """
+
+    def __init__(self, build_record: Callable[..., Optional[Dict[str, Any]]], lock=None, store=None,
+                 on_removed: Optional[Callable[[List[str]], None]] = None):
+        self._build_record = build_record
+        self.lock = lock if lock is not None else threading.RLock()
+        self.store = store
+        # Called (on flush) with the paths dropped from the index, e.g. to prune caches keyed by path
+        self.on_removed = on_removed
+        self.records: Dict[str, Dict[str, Any]] = {}  # path -> media info
+        self.items: List[Dict[str, Any]] = []          # newest first
+        self.folder_mtimes: Dict[str, float] = {}     # folder -> mtime at last directory sync
+        # Membership sets (of paths), kept in step with records so filtered views are set operations
+        self.nsfw = set()
+        self.locked = set()
+        self.archived = set()
+        self.videos = set()
+        self.folders = FolderTree()  # subfolder tree with per-folder counts
+        self.search_index = SearchIndex()
+        # Rebuilt on first search after a reload, rather than while loading the library
+        self._search_stale = False
+        # Paths changed while a stale search index is being rebuilt (applied before it is swapped in)
+        self._search_pending: Optional[Set[str]] = None
+        self._search_generation = 0  # bumped by every reload, so a rebuild from older records is dropped
+        self._search_build_lock = threading.Lock()
+        # Bumped on every change to the list or the membership sets; readers get a new snapshot
+        self.version = 0
+        self._snapshot: Optional[IndexSnapshot] = None
+        # Snapshot structures ('items', 'nsfw', 'locked', 'archived', 'videos') changed since the last snapshot
+        self._changed = set()
+        # Bumped when searchable text changes in place (enrichment), so cached searches are redone
+        self.search_version = 0
+        # Paths changed by deltas while a reconciliation walk is running
+        self._touched = None
+        # Paths waiting to be written to / deleted from the store
+        self._dirty = set()
+        self._deleted = set()
+
+    def __len__(self):
+        return len(self.items)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Return the newest record, or None if the index is empty"""
+        return self.snapshot().latest()
+
+    def snapshot(self) -> IndexSnapshot:
+        """
+        Current immutable snapshot of the index. Taken without the lock while
+        nothing changed; the first reader after a change builds the next one
+        and publishes it by swapping the reference.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+        with self.lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != self.version:
+                snapshot = IndexSnapshot(self, snapshot)
+                self._changed.clear()
+                self._snapshot = snapshot
+            return snapshot
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Look up a record by file path"""
+        return self.records.get(os.path.normpath(path))
+
+    # ----------------------------------------
+    # Deltas
+    # ----------------------------------------
+
+    def upsert(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Add or refresh a single file. Returns the current record, or None if
+        the file is gone or not indexable (in which case it is removed).
+        """
+        path = os.path.normpath(path)
+        record = self._build_record(path)
+        if record is None:
+            self.remove(path)
+            return None
+
+        with self.lock:
+            existing = self.records.get(path)
+            if existing is not None and self._same_file(existing, record['mod_time'], record.get('size')):
+                # Unchanged - keep the existing record (and its enriched metadata)
+                return existing
+            if existing is not None:
+                self._unlink(existing)
+            self.records[path] = record
+            self._link(record)
+            self._mark_touched(path)
+        return record
+
+    def remove(self, path: str) -> Optional[Dict[str, Any]]:
+        """Drop a single file from the index. Returns the removed record, if any."""
+        path = os.path.normpath(path)
+        with self.lock:
+            record = self.records.pop(path, None)
+            if record is not None:
+                self._unlink(record)
+            self._mark_touched(path, deleted=True)
+        return record
+
+    def move(self, src_path: str, dest_path: str) -> Optional[Dict[str, Any]]:
+        """Apply a rename/move of a single file"""
+        self.remove(src_path)
+        return self.upsert(dest_path)
+
+    def remove_tree(self, folder_path: str) -> int:
+        """Drop every record below a folder (directory deleted or moved away)"""
+        prefix = os.path.join(os.path.normpath(folder_path), '')
+        with self.lock:
+            doomed = [path for path in self.records if path.startswith(prefix)]
+            for path in doomed:
+                self._unlink(self.records.pop(path))
+                self._mark_touched(path, deleted=True)
+        return len(doomed)
+
+    def add_tree(self, entries: Iterable[FileEntry]) -> int:
+        """Index every (path, mod_time, size) entry of a folder that appeared in one go"""
+        added = 0
+        for path, mod_time, size in entries:
+            path = os.path.normpath(path)
+            record = self._build_record(path, mod_time, size)
+            if record is None:
+                continue
+            with self.lock:
+                existing = self.records.get(path)
+                if existing is not None:
+                    self._unlink(existing)
+                self.records[path] = record
+                self._link(record)
+                self._mark_touched(path)
+            added += 1
+        return added
+
+    def mark_dirty(self, path: str):
+        """
+        Flag a record that was updated in place (e.g. enriched or reclassified)
+        for persistence, and refresh its flag memberships.
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            self._dirty.add(path)
+            record = self.records.get(path)
+            if record is not None:
+                if self._set_flags(record):
+                    self.version += 1
+                self.search_version += 1
+                self._update_search(path, record)
+
+    # ----------------------------------------
+    # Filtered views
+    # ----------------------------------------
+
+    def filter(self, folder: str = '', recursive: bool = True, top_folder: str = '',
+               media_type: str = 'all', hide_nsfw: bool = False, hide_locked: bool = False,
+               hide_archived: bool = False, search: str = '') -> List[Dict[str, Any]]:
+        """
+        Return the records matching the given filters, newest first.
+
+        folder matches the record subfolder (or, when recursive, that folder
+        and everything below it),
+        top_folder the top-level folder, media_type is 'image', 'video' or
+        'all'. The hide_* flags drop NSFW, content-locked and archived records.
+        search is a list of terms that must all match (as word prefixes) the
+        filename, prompt, negative prompt, model or LoRA names.
+
+        Evaluated against the current snapshot; results are cached per
+        snapshot, so the returned list is shared and must not be modified.
+        """
+        return self.snapshot().filter(folder, recursive, top_folder, media_type,
+                                      hide_nsfw, hide_locked, hide_archived, search)
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """
+        Paths matching a search query (see SearchIndex.search), or None if it
+        has no terms. Runs on the search index's own lock, not the index lock,
+        so searches and directory syncs don't wait on each other.
+        """
+        if self._search_stale:
+            self._rebuild_search()
+        return self.search_index.search(query)
+
+    def _rebuild_search(self):
+        """
+        Build the search index for the current records outside the index
+        lock, then swap it in along with the changes made in the meantime.
+        """
+        with self._search_build_lock:  # one rebuild at a time; other searches wait for it
+            with self.lock:
+                if not self._search_stale:
+                    return
+                records = list(self.records.values())
+                generation = self._search_generation
+                self._search_pending = set()
+
+            fresh = SearchIndex()
+            fresh.rebuild(records)
+
+            with self.lock:
+                pending, self._search_pending = self._search_pending, None
+                if generation != self._search_generation:
+                    return  # Reloaded while building - the next search starts over
+                for path in pending:
+                    record = self.records.get(path)
+                    if record is None:
+                        fresh.remove(path)
+                    else:
+                        fresh.add(record)
+                self.search_index = fresh
+                self._search_stale = False
+
+    # ----------------------------------------
+    # Full reconciliation
+    # ----------------------------------------
+
+    def walk(self, folder_path: Union[str, Iterable[str]], extensions: Tuple[str, ...], seen_folders: Dict[str, float],
+             incremental: bool = False, workers: int = DEFAULT_WALK_WORKERS) -> Iterable[FileEntry]:
+        """
+        Yield (path, mod_time, size) for every media file below folder_path
+        (a folder or a list of folders), recording each folder's mtime in
+        seen_folders. Folders are listed on `workers` threads, so several
+        top-level trees are walked at once.
+
+        With incremental=True, folders whose mtime matches the last directory
+        sync are not listed or stat-ed again: their indexed files and known
+        subfolders are reused. A folder's mtime changes whenever entries are
+        added, removed or renamed in it, so only files rewritten in place are
+        missed - the file watcher and the scheduled full sync cover those.
+        """
+        files_by_folder = {}
+        children_by_folder = {}
+        known_mtimes = {}
+        if incremental:
+            with self.lock:
+                for record in self.records.values():
+                    files_by_folder.setdefault(os.path.dirname(record['path']), []).append(
+                        (record['path'], record['mod_time'], record.get('size', 0)))
+                for folder in self.folder_mtimes:
+                    children_by_folder.setdefault(os.path.dirname(folder), []).append(folder)
+                known_mtimes = dict(self.folder_mtimes)
+
+        def visit(folder):
+            try:
+                folder_mtime = os.stat(folder).st_mtime
+            except OSError:
+                return (), ()
+            seen_folders[folder] = folder_mtime
+
+            if incremental and known_mtimes.get(folder) == folder_mtime:
+                return files_by_folder.get(folder, ()), children_by_folder.get(folder, ())
+            return list_media_folder(folder, extensions)
+
+        roots = [os.path.normpath(folder_path)] if isinstance(folder_path, str) else \
+            [os.path.normpath(folder) for folder in folder_path]
+        return walk_folders(roots, visit, workers)
+
+    def reconcile(self, walk: Callable[[], Iterable[FileEntry]],
+                  folders: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+        """
+        Reconcile the index against a full walk of the library.
+
+        `walk` returns (path, mod_time, size) for every media file on disk.
+        Records whose mod_time and size are unchanged are kept as-is, so
+        enriched metadata is not thrown away. Deltas applied while the walk
+        runs win over the walk result, since they are newer. `folders` is the
+        folder -> mtime map collected during the walk; it is kept for the
+        next incremental walk.
+        """
+        with self.lock:
+            self._touched = set()
+            known = {path: (record['mod_time'], record.get('size')) for path, record in self.records.items()}
+
+        found = []
+        fresh = {}
+        try:
+            for path, mod_time, size in walk():
+                path = os.path.normpath(path)
+                found.append(path)
+                if known.get(path) == (mod_time, size):
+                    continue
+                record = self._build_record(path, mod_time, size)
+                if record is not None:
+                    fresh[path] = record
+        except Exception:
+            with self.lock:
+                self._touched = None
+            raise
+
+        with self.lock:
+            touched = self._touched
+            self._touched = None
+
+            records = {}
+            for path in found:
+                if path in touched:
+                    continue
+                record = fresh.get(path) or self.records.get(path)
+                if record is not None:
+                    records[path] = record
+            for path in touched:
+                if path in self.records:
+                    records[path] = self.records[path]
+
+            removed = [path for path in known if path not in records]
+            stats = {
+                'added': sum(1 for path in records if path not in known),
+                'updated': len(fresh) - sum(1 for path in fresh if path not in known),
+                'removed': len(removed),
+            }
+
+            self.records = records
+            self.items = sorted(records.values(), key=sort_key, reverse=True)
+            self._rebuild_memberships()
+            if folders is not None:
+                self.folder_mtimes = {os.path.normpath(folder): mtime for folder, mtime in folders.items()}
+
+            self._dirty.update(path for path in fresh if path in records)
+            self._deleted.update(removed)
+            self._dirty.difference_update(removed)
+
+        self.flush(folders_changed=folders is not None)
+        return stats
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+
+    def load(self) -> int:
+        """Load the persisted index from the store. Returns the number of records."""
+        if self.store is None:
+            return 0
+
+        records = {}
+        for data in self.store.load_records():
+            if data.get('path'):
+                record = MediaRecord.from_dict(data)
+                records[record.path] = record
+        folders = self.store.load_folders()
+
+        with self.lock:
+            self.records = records
+            self.items = sorted(records.values(), key=sort_key, reverse=True)
+            self._rebuild_memberships()
+            self.folder_mtimes = folders
+            self._dirty.clear()
+            self._deleted.clear()
+        return len(records)
+
+    def flush(self, folders_changed: bool = False):
+        """
+        Write pending record changes (and optionally the folder mtimes) to the
+        store, and pass the paths removed since the last flush to on_removed.
+        """
+        if self.store is None and self.on_removed is None:
+            return
+
+        with self.lock:
+            if not (self._dirty or self._deleted or folders_changed):
+                return
+            # Copy under the lock so concurrent updates can't change records mid-write
+            changed = [dict(self.records[path]) for path in self._dirty if path in self.records] \
+                if self.store is not None else []
+            deleted = list(self._deleted)
+            folders = dict(self.folder_mtimes) if folders_changed else None
+            self._dirty.clear()
+            self._deleted.clear()
+
+        if deleted and self.on_removed is not None:
+            try:
+                self.on_removed(deleted)
+            except Exception as e:
+                print(f"🗂️ [FILE-INDEX] Error releasing removed files: {e}")
+        if self.store is None:
+            return
+
+        try:
+            self.store.save(changed, deleted, folders)
+        except Exception as e:
+            print(f"🗂️ [FILE-INDEX] Error saving index: {e}")
+            with self.lock:
+                self._dirty.update(record['path'] for record in changed)
+                self._deleted.update(deleted)
+
+    # ----------------------------------------
+    # Internal helpers (caller holds self.lock)
+    # ----------------------------------------
+
+    @staticmethod
+    def _same_file(record: Dict[str, Any], mod_time: float, size: Optional[int]) -> bool:
+        return record['mod_time'] == mod_time and record.get('size') == size
+
+    def _mark_touched(self, path: str, deleted: bool = False):
+        if self._touched is not None:
+            self._touched.add(path)
+        if deleted:
+            self._dirty.discard(path)
+            self._deleted.add(path)
+        else:
+            self._deleted.discard(path)
+            self._dirty.add(path)
+
+    def _link(self, record: Dict[str, Any]):
+        """Insert a record into the newest-first list and the membership sets"""
+        self.version += 1
+        self._changed.add('items')
+        self._add_membership(record)
+        self._update_search(record['path'], record)
+        self.items.insert(bisect_newest_first(self.items, sort_key(record), inclusive=True), record)
+
+    def _unlink(self, record: Dict[str, Any]):
+        """Remove a record from the newest-first list (by identity) and the membership sets"""
+        self.version += 1
+        self._changed.add('items')
+        self._drop_membership(record)
+        self._update_search(record['path'], None)
+        idx = bisect_newest_first(self.items, sort_key(record), inclusive=True)
+        if idx < len(self.items) and self.items[idx] is record:
+            del self.items[idx]
+            return
+        # Not where its key says (should not happen) - fall back to a scan
+        for idx, item in enumerate(self.items):
+            if item is record:
+                del self.items[idx]
+                return
+
+    def _set_flags(self, record: Dict[str, Any]) -> bool:
+        """Sync the flag sets with a record's current is_nsfw / is_content_locked values (True if one changed)"""
+        path = record['path']
+        before = {'nsfw': path in self.nsfw, 'locked': path in self.locked}
+        deltas = {}
+        for name, flag_set, flagged in (('nsfw', self.nsfw, bool(record.get('is_nsfw', False))),
+                                        ('locked', self.locked, bool(record.get('is_content_locked', False)))):
+            if flagged != before[name]:
+                (flag_set.add if flagged else flag_set.discard)(path)
+                deltas[name] = 1 if flagged else -1
+                self._changed.add(name)
+        if not deltas:
+            return False
+        after = {name: path in getattr(self, name) for name in before}
+        deltas['restricted'] = (after['nsfw'] or after['locked']) - (before['nsfw'] or before['locked'])
+        self.folders.adjust(record, **deltas)
+        return True
+
+    def _add_membership(self, record: Dict[str, Any]):
+        path = record['path']
+        subfolder = record.get('subfolder', '')
+        self.folders.add(record)
+        self._set_flags(record)
+        if ARCHIVE_FOLDER in subfolder.lower().split('/'):
+            self.archived.add(path)
+            self._changed.add('archived')
+        if record.get('media_type') == 'video':
+            self.videos.add(path)
+            self._changed.add('videos')
+
+    def _drop_membership(self, record: Dict[str, Any]):
+        path = record['path']
+        self.folders.remove(record, nsfw=path in self.nsfw, locked=path in self.locked)
+        for name in ('nsfw', 'locked', 'archived', 'videos'):
+            flag_set = getattr(self, name)
+            if path in flag_set:
+                flag_set.discard(path)
+                self._changed.add(name)
+
+    def _rebuild_memberships(self):
+        self.version += 1
+        self.nsfw, self.locked, self.archived, self.videos = set(), set(), set(), set()
+        self.folders = FolderTree()
+        for record in self.records.values():
+            self._add_membership(record)
+        self._changed.update(('items', 'nsfw', 'locked', 'archived', 'videos'))
+        self.search_index = SearchIndex()
+        self._search_stale = True
+        self._search_generation += 1
+
+    def _update_search(self, path: str, record: Optional[Dict[str, Any]]):
+        """Re-index (or, with record None, drop) a path in the search index"""
+        if self._search_stale:
+            if self._search_pending is not None:
+                self._search_pending.add(path)
+        elif record is None:
+            self.search_index.remove(path)
+        else:
+            self.search_index.add(record)
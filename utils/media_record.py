@@ -0,0 +1,190 @@
+"""
+Media Record Module
+Compact in-memory layout for file index records. A record is a __slots__
+object instead of a dict, still read and written with record['key'] /
+record.get('key') like the dicts it replaces. Folder, model and other short
+repeated strings are interned, and prompts are shared between records that
+carry the same text (files from one generation batch), so a large library
+keeps one copy of each.
+"""
+
+import os
+import sys
+from typing import Any, Dict, Iterable, Optional
+
+# Record keys, in the order they are persisted (filename is derived from path)
+RECORD_FIELDS = ('path', 'filename', 'subfolder', 'top_folder', 'mod_time', 'size', 'metadata',
+                 'is_nsfw', 'is_content_locked', 'media_type', 'embedded_loaded')
+
+# Metadata values repeated across many files: interned for the life of the process
+_INTERNED_METADATA = ('model', 'dimensions', 'sampler', 'scheduler')
+# Long metadata text shared through the text pool (released when no record uses it)
+_SHARED_METADATA = ('prompt', 'negative_prompt')
+
+# Text value -> the one copy records point to
+_text_pool: Dict[str, str] = {}
+
+
+def share_text(value: str) -> str:
+    """Return the pooled copy of a (long) text value"""
+    return _text_pool.setdefault(value, value)
+
+
+def prune_text_pool(records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Drop pooled texts none of `records` (the indexed records) uses any more
+    (deleted or re-enriched files). Returns the number of texts dropped.
+    A text dropped while a record still being built shares it only costs
+    that record its sharing, never its value.
+    """
+    used = set()
+    for record in records:
+        metadata = record.get('metadata')
+        if metadata:
+            for key in _SHARED_METADATA:
+                value = metadata.get(key)
+                if isinstance(value, str):
+                    used.add(value)
+    unused = [value for value in list(_text_pool) if value not in used]
+    for value in unused:
+        _text_pool.pop(value, None)
+    return len(unused)
+
+
+def compact_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Intern / share the repeated strings of a metadata dict (in place) and return it"""
+    if not metadata:
+        return {} if metadata is None else metadata
+    for key, value in metadata.items():
+        if not isinstance(value, str):
+            if key == 'loras' and isinstance(value, list):
+                metadata[key] = [sys.intern(lora) if isinstance(lora, str) else lora for lora in value]
+            continue
+        if key in _SHARED_METADATA:
+            metadata[key] = share_text(value)
+        elif key in _INTERNED_METADATA:
+            metadata[key] = sys.intern(value)
+    return metadata
+
+
+class MediaRecord:
+    """
+    One indexed media file. Supports the dict operations the app uses on
+    records (record['key'], record['key'] = value, get, `in`, keys/items and
+    dict(record)), so templates, routes and the index store work unchanged.
+    """
+
+    __slots__ = ('path', 'subfolder', 'top_folder', 'mod_time', 'size', 'metadata',
+                 'is_nsfw', 'is_content_locked', 'media_type', 'embedded_loaded')
+
+    def __init__(self, path: str, subfolder: str, top_folder: str, mod_time: float, size: int,
+                 metadata: Optional[Dict[str, Any]] = None, is_nsfw: bool = False,
+                 is_content_locked: bool = False, media_type: str = 'image', embedded_loaded: bool = False):
+        self.path = path
+        self.subfolder = sys.intern(subfolder)
+        self.top_folder = sys.intern(top_folder)
+        self.mod_time = mod_time
+        self.size = size
+        self.metadata = compact_metadata(metadata)
+        self.is_nsfw = is_nsfw
+        self.is_content_locked = is_content_locked
+        self.media_type = sys.intern(media_type)
+        self.embedded_loaded = embedded_loaded
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MediaRecord':
+        """Build a record from its persisted (dict) form"""
+        return cls(data['path'], data.get('subfolder', ''), data.get('top_folder', ''),
+                   data.get('mod_time', 0), data.get('size', 0), data.get('metadata'),
+                   data.get('is_nsfw', False), data.get('is_content_locked', False),
+                   data.get('media_type', 'image'), data.get('embedded_loaded', False))
+
+    # ----------------------------------------
+    # Dict-style access
+    # ----------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        if key == 'metadata':
+            value = compact_metadata(value)
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in RECORD_FIELDS:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in RECORD_FIELDS
+
+    def keys(self):
+        return RECORD_FIELDS
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in RECORD_FIELDS]
+
+    def __iter__(self):
+        return iter(RECORD_FIELDS)
+
+    def __len__(self):
+        return len(RECORD_FIELDS)
+
+    def __repr__(self):
+        return f"MediaRecord({self.path!r})"
+
+
+# ----------------------------------------
+# Memory report
+# ----------------------------------------
+
+def _deep_size(value: Any, seen: Optional[set]) -> int:
+    """
+    Size of a value and everything it holds. With a `seen` set, objects
+    already counted (shared strings, interned folders) count once. Dict keys
+    are field names every record shares, so they aren't counted.
+    """
+    if seen is not None:
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(item, seen) for item in value.values())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in value)
+    return size
+
+
+def memory_report(records: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Estimate the memory held by the index records, compared with the plain
+    dict layout (a dict per record, every string its own copy).
+    """
+    seen = set()
+    count = compact_bytes = dict_bytes = 0
+    for record in records:
+        count += 1
+        compact_bytes += sys.getsizeof(record) + sum(
+            _deep_size(getattr(record, key), seen) for key in MediaRecord.__slots__)
+        as_dict = {key: record[key] for key in RECORD_FIELDS}
+        dict_bytes += _deep_size(as_dict, None)
+
+    return {
+        'items': count,
+        'bytes': compact_bytes,
+        'bytes_per_item': round(compact_bytes / count) if count else 0,
+        'dict_bytes': dict_bytes,
+        'dict_bytes_per_item': round(dict_bytes / count) if count else 0,
+        'saved_percent': round(100 * (1 - compact_bytes / dict_bytes), 1) if dict_bytes else 0,
+        'shared_texts': len(_text_pool)
+    }
@@ -0,0 +1,78 @@
+"""
+Media Response Module
+Builds responses for original media files (full or byte-range) that hand an
+open file to the WSGI server's file wrapper, so servers with sendfile support
+send it zero-copy and the others stream it in large blocks. Validators (ETag,
+Last-Modified) come from the file index's stat data.
+"""
+
+import os
+from typing import Optional, Tuple
+
+from werkzeug.wsgi import wrap_file
+
+# Block size used when the WSGI server has no file wrapper of its own
+STREAM_BUFFER_BYTES = 256 * 1024
+
+
+def media_etag(mod_time: float, size: int) -> str:
+    """Strong ETag for a file version (changes with its mtime or size)"""
+    return f"{int(mod_time * 1_000_000):x}-{int(size):x}"
+
+
+class FileRange:
+    """
+    Read-only view of `length` bytes of an open file starting at `start`.
+    Keeps fileno()/tell() of the underlying file, so a sendfile-capable file
+    wrapper sends the range straight from the page cache, while plain
+    readers never get past the end of the range.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self._file = file
+        self._file.seek(start)
+        self._remaining = max(length, 0)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+def open_media(file_path: str):
+    """
+    Open a media file for sending. Returns (file, size, mod_time), taking size
+    and mod_time from the open file (fstat, no second path lookup), or None if
+    the file can't be opened.
+    """
+    try:
+        f = open(file_path, 'rb')
+    except OSError:
+        return None
+    try:
+        stat = os.fstat(f.fileno())
+    except OSError:
+        f.close()
+        return None
+    return f, stat.st_size, stat.st_mtime
+
+
+def media_body(environ, file, byte_range: Optional[Tuple[int, int]] = None):
+    """Response body for an open file, or for its [start, stop) byte range"""
+    if byte_range is not None:
+        start, stop = byte_range
+        file = FileRange(file, start, stop - start)
+    return wrap_file(environ, file, buffer_size=STREAM_BUFFER_BYTES)
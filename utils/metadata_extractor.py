@@ -7,23 +7,43 @@ Supports A1111-style text metadata and JSON metadata formats.
 import os
 import re
 import json
+import struct
+import threading
+from collections import OrderedDict
 from PIL import Image
 from PIL.ExifTags import TAGS
 import subprocess
 
-# Cache for extracted metadata to avoid re-reading files
-_metadata_cache = {}
+from utils.image_headers import read_headers, xmp_texts
+
+# LRU cache of extracted metadata: path -> (mtime, size, result), least recently used first.
+# Entries are only valid while the file's mtime and size match.
+_metadata_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_max_entries = 20000
+_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
 
 
 def extract_embedded_metadata(file_path):
     """
     Extract embedded metadata from an image or video file.
     Returns a dictionary with prompt, negative_prompt, seed, model, dimensions.
-    Uses caching to avoid re-reading files.
+    Uses caching to avoid re-reading files (invalidated when the file is rewritten).
     """
+    try:
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime, stat.st_size)
+    except OSError:
+        signature = None
+    
     # Check cache first
-    if file_path in _metadata_cache:
-        return _metadata_cache[file_path]
+    with _cache_lock:
+        cached = _metadata_cache.get(file_path)
+        if cached is not None and signature is not None and cached[:2] == signature:
+            _metadata_cache.move_to_end(file_path)
+            _cache_stats['hits'] += 1
+            return cached[2]
+        _cache_stats['misses'] += 1
     
     result = {
         'prompt': None,
@@ -37,22 +57,119 @@ def extract_embedded_metadata(file_path):
     try:
         ext = os.path.splitext(file_path)[1].lower()
         
-        if ext in ('.jpg', '.jpeg'):
-            result = _extract_from_jpeg(file_path)
-        elif ext == '.png':
-            result = _extract_from_png(file_path)
-        elif ext == '.webp':
-            result = _extract_from_webp(file_path)
+        if ext in ('.jpg', '.jpeg', '.png', '.webp'):
+            # Fast path reads only the file headers; Pillow handles anything it can't parse
+            result = _extract_from_headers(file_path, ext)
+            if result is None:
+                if ext == '.png':
+                    result = _extract_from_png(file_path)
+                elif ext == '.webp':
+                    result = _extract_from_webp(file_path)
+                else:
+                    result = _extract_from_jpeg(file_path)
         elif ext in ('.mp4', '.webm', '.mov', '.avi', '.mkv', '.m4v'):
             result = _extract_from_video(file_path)
     except Exception as e:
         print(f"[METADATA] Error extracting from {file_path}: {e}")
     
     # Cache the result
-    _metadata_cache[file_path] = result
+    if signature is not None:
+        with _cache_lock:
+            _metadata_cache[file_path] = signature + (result,)
+            _metadata_cache.move_to_end(file_path)
+            _evict_overflow()
     return result
 
 
+def _evict_overflow():
+    """Drop least recently used entries beyond the size limit (caller holds _cache_lock)"""
+    while len(_metadata_cache) > _cache_max_entries:
+        _metadata_cache.popitem(last=False)
+        _cache_stats['evictions'] += 1
+
+
+def _extract_from_headers(file_path, ext):
+    """
+    Extract metadata from JPEG/PNG/WebP headers (EXIF, XMP, comments, text
+    chunks) without opening the image in Pillow.
+    Returns None if the headers couldn't be parsed.
+    """
+    try:
+        headers = read_headers(file_path, ext)
+    except (ValueError, struct.error):
+        return None
+    
+    result = {'prompt': None, 'negative_prompt': None, 'seed': None, 'model': None, 'dimensions': None}
+    if headers['width'] and headers['height']:
+        result['dimensions'] = f"{headers['width']}x{headers['height']}"
+    text = headers['text']
+    
+    if ext == '.png':
+        # Same precedence as the Pillow path: A1111 'parameters', then 'Comment', then ComfyUI 'prompt'
+        if 'parameters' in text:
+            return _parse_a1111_metadata(text['parameters'], result)
+        if 'Comment' in text:
+            return _parse_metadata_text(text['Comment'], result)
+        if 'prompt' in text:
+            try:
+                return _parse_json_metadata(json.loads(text['prompt']), result)
+            except json.JSONDecodeError:
+                result['prompt'] = text['prompt']
+        return result
+    
+    candidates = []
+    if 'comment' in text:
+        candidates.append(text['comment'].decode('utf-8', errors='replace'))
+    if headers['exif']:
+        candidates.extend(_exif_texts(headers['exif']))
+    candidates.extend(xmp_texts(headers['xmp']))
+    
+    for value in candidates:
+        if value:
+            result = _parse_metadata_text(value, result)
+            if result.get('prompt'):
+                break
+    return result
+
+
+def _exif_texts(exif_bytes):
+    """Return ImageDescription, UserComment and XPComment strings from raw EXIF (TIFF) data"""
+    exif = Image.Exif()
+    try:
+        exif.load(exif_bytes)
+        exif_ifd = exif.get_ifd(0x8769)
+    except Exception:
+        return []
+    
+    texts = []
+    # 0x010E = ImageDescription, 0x9286 = UserComment, taken in the order Pillow's merged
+    # EXIF dict yields them (IFD0 then EXIF IFD, each in file order) like the Pillow path does
+    merged = dict(exif)
+    merged.update(exif_ifd)
+    for tag_id, value in merged.items():
+        if tag_id not in (0x010E, 0x9286):
+            continue
+        if isinstance(value, bytes):
+            value = _decode_user_comment(value)
+        if isinstance(value, str):
+            texts.append(value)
+    
+    # 0x9C9C = XPComment (Windows), stored as UTF-16LE bytes
+    xp_comment = exif.get(0x9C9C)
+    if isinstance(xp_comment, (bytes, tuple)):
+        texts.append(bytes(xp_comment).decode('utf-16-le', errors='replace').rstrip('\x00'))
+    return texts
+
+
+def _parse_metadata_text(value, result):
+    """Parse a metadata string as JSON (WanGP style) or, failing that, A1111 text"""
+    try:
+        json_data = json.loads(value)
+    except json.JSONDecodeError:
+        return _parse_a1111_metadata(value, result)
+    return _parse_json_metadata(json_data, result)
+
+
 def _extract_from_jpeg(file_path):
     """Extract metadata from JPEG files using EXIF UserComment, ImageDescription, or Comment"""
     result = {'prompt': None, 'negative_prompt': None, 'seed': None, 'model': None, 'dimensions': None}
@@ -577,10 +694,31 @@ def _extract_loras_from_prompt(prompt_text):
 
 def clear_metadata_cache():
     """Clear the metadata cache"""
-    global _metadata_cache
-    _metadata_cache = {}
+    with _cache_lock:
+        _metadata_cache.clear()
+
+
+def evict_metadata(file_path):
+    """Forget the cached metadata of a file (e.g. moved to NSFW/SAFE/Archive or deleted)"""
+    with _cache_lock:
+        if _metadata_cache.pop(file_path, None) is not None:
+            _cache_stats['evictions'] += 1
+
+
+def set_cache_size(max_entries):
+    """Set the maximum number of cached metadata entries"""
+    global _cache_max_entries
+    with _cache_lock:
+        _cache_max_entries = max(int(max_entries), 0)
+        _evict_overflow()
 
 
 def get_cache_size():
     """Get the number of cached metadata entries"""
     return len(_metadata_cache)
+
+
+def get_cache_stats():
+    """Get cache size, limit and hit/miss/eviction counters"""
+    with _cache_lock:
+        return dict(_cache_stats, size=len(_metadata_cache), max_entries=_cache_max_entries)
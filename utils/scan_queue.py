@@ -0,0 +1,97 @@
+"""
+Scan Queue Module
+Dispatches content scans of newly created files to a fixed pool of worker
+threads through one bounded queue, instead of a thread per file event.
+Paths that are already waiting are not queued twice, and files can be held
+back until a number of newer files have arrived (CONTENT_SCAN_OFFSET).
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+
+class ScanDispatcher:
+    """
+    Two-stage queue: `held` keeps the newest `offset` files back, `ready`
+    holds files waiting for a worker. When `ready` is full the oldest waiting
+    file is dropped (and counted), so a burst can't grow memory without bound.
+    """
+
+    def __init__(self, scan: Callable[[str], None], workers: int = 1, max_pending: int = 10000,
+                 offset: Optional[Callable[[], int]] = None):
+        self._scan = scan
+        self._offset = offset or (lambda: 0)
+        self.workers = max(int(workers), 1)
+        self.max_pending = max(int(max_pending), 1)
+
+        self._condition = threading.Condition()
+        self._held = deque()
+        self._ready = deque()
+        self._queued = set()   # paths in held or ready
+        self._threads = []
+        self._active = 0
+        self._stats = {'submitted': 0, 'coalesced': 0, 'dropped': 0, 'scanned': 0, 'failed': 0, 'peak': 0}
+
+    def submit(self, path: str):
+        """Queue a new file for scanning (released once `offset` newer files arrived)"""
+        with self._condition:
+            self._stats['submitted'] += 1
+            if path in self._queued:
+                self._stats['coalesced'] += 1
+                return
+            self._queued.add(path)
+            self._held.append(path)
+
+            offset = max(self._offset() or 0, 0)
+            released = False
+            while len(self._held) > offset:
+                self._enqueue(self._held.popleft())
+                released = True
+            if released:
+                self._start_workers()
+                self._condition.notify_all()
+
+    def _enqueue(self, path: str):
+        """Move a path to the ready queue, dropping the oldest one if full (caller holds the condition)"""
+        if len(self._ready) >= self.max_pending:
+            dropped = self._ready.popleft()
+            self._queued.discard(dropped)
+            self._stats['dropped'] += 1
+            print(f"[ContentScan] ⚠️ Scan queue full ({self.max_pending}), dropped: {dropped}")
+        self._ready.append(path)
+        self._stats['peak'] = max(self._stats['peak'], len(self._ready))
+
+    def stats(self) -> dict:
+        with self._condition:
+            return dict(self._stats, held=len(self._held), pending=len(self._ready),
+                        active=self._active, workers=self.workers)
+
+    def _start_workers(self):
+        """Start worker threads up to the configured count (caller holds the condition)"""
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, daemon=True,
+                                      name=f"content-scan-{len(self._threads)}")
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._ready:
+                    self._condition.wait()
+                path = self._ready.popleft()
+                self._queued.discard(path)
+                self._active += 1
+
+            ok = False
+            try:
+                self._scan(path)
+                ok = True
+            except Exception as e:
+                print(f"[ContentScan] ❌ Error scanning: {e}")
+            finally:
+                with self._condition:
+                    self._active -= 1
+                    self._stats['scanned' if ok else 'failed'] += 1
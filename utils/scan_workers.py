@@ -0,0 +1,164 @@
+"""
+Scan Workers Module
+Runs content scans in separate worker processes, so NudeNet inference,
+image decoding and ffmpeg handling don't compete with the web server for the
+GIL. Each worker loads the detector once; the app hands it jobs through a
+process pool and gets verdicts back in file order.
+"""
+
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from utils import content_scanner
+from utils.verdict_store import open_verdict_store
+
+# Files per job: large enough to amortize IPC, small enough to keep every worker busy
+FILES_PER_JOB_BATCHES = 4
+
+# Scanner settings last applied in this worker process
+_worker_settings = None
+
+
+def _init_worker(verdict_db_path: str):
+    """Worker process start-up: open the verdict cache and load the detector once"""
+    if verdict_db_path:
+        store = open_verdict_store(verdict_db_path)
+        if store is not None:
+            content_scanner.set_verdict_store(store)
+    content_scanner.get_detector()
+
+
+def _run_job(settings: Tuple, entries: List[Tuple[str, Optional[Dict[str, Any]]]], written: List[str],
+             inference_batch_size: int, prefetch_workers: int) -> List[bool]:
+    """Worker side of a job: scan (path, metadata) entries and return their verdicts in order"""
+    global _worker_settings
+    if settings != _worker_settings:
+        keywords, threshold, labels, safe_folders, logging_level, video_frames, whole_words = settings
+        content_scanner.set_config(keywords, threshold, labels, safe_folders,
+                                   logging_level=logging_level, video_frames=video_frames,
+                                   keyword_whole_words=whole_words)
+        _worker_settings = settings
+
+    # Files the app already saw closed by their writer needn't wait to settle here
+    for file_path in written:
+        content_scanner.mark_write_closed(file_path)
+
+    metadata = dict(entries)
+    paths = [file_path for file_path, _ in entries]
+    return [flagged for _, flagged in
+            content_scanner.scan_files(paths, metadata.get, inference_batch_size, prefetch_workers)]
+
+
+def _current_settings() -> Tuple:
+    """Snapshot of the scanner settings to send along with each job"""
+    return (list(content_scanner.NSFW_KEYWORDS), content_scanner.NUDITY_THRESHOLD,
+            list(content_scanner.NSFW_LABELS), list(content_scanner.SAFE_FOLDERS),
+            content_scanner.LOGGING_LEVEL, content_scanner.VIDEO_SCAN_FRAMES,
+            content_scanner.KEYWORD_WHOLE_WORDS)
+
+
+class ScanWorkerPool:
+    """
+    Pool of scan worker processes (started on first use). If the pool breaks
+    (e.g. a worker crashes), the affected files are scanned in-process and a
+    fresh pool is started for the next job.
+    """
+
+    def __init__(self, workers: int, verdict_db_path: str = '', prefetch_workers: int = 2):
+        self.workers = max(int(workers), 1)
+        self.verdict_db_path = verdict_db_path
+        self.prefetch_workers = max(int(prefetch_workers), 1)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs the web server and watcher threads isn't safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.verdict_db_path,)
+                )
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        """Drop a broken executor (the next job starts a new one)"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, entries, written, inference_batch_size):
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_run_job, _current_settings(), entries, written,
+                                     inference_batch_size, self.prefetch_workers)
+        except BrokenProcessPool:
+            # A worker died since the last job - start a fresh pool
+            self._reset(executor)
+            executor = self._get_executor()
+            future = executor.submit(_run_job, _current_settings(), entries, written,
+                                     inference_batch_size, self.prefetch_workers)
+        return executor, future
+
+    def _result(self, job, entries, inference_batch_size) -> List[bool]:
+        """Wait for a job; on failure scan its files in this process instead"""
+        executor, future = job
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[ContentScanner] ⚠️ Scan worker failed ({e}), scanning {len(entries)} files in-process")
+            self._reset(executor)
+            metadata = dict(entries)
+            return [flagged for _, flagged in content_scanner.scan_files(
+                [file_path for file_path, _ in entries], metadata.get, inference_batch_size, self.prefetch_workers)]
+
+    def scan_files(self, file_paths: List[str], get_metadata_func=None,
+                   inference_batch_size: int = 8) -> Generator[Tuple[str, bool], None, None]:
+        """Scan files across the worker processes, yielding (file_path, flagged) in order"""
+        job_size = max(int(inference_batch_size), 1) * FILES_PER_JOB_BATCHES
+        chunks = [file_paths[i:i + job_size] for i in range(0, len(file_paths), job_size)]
+
+        def entries_for(chunk):
+            entries = []
+            for file_path in chunk:
+                metadata = None
+                if get_metadata_func:
+                    try:
+                        metadata = get_metadata_func(file_path)
+                    except:
+                        pass
+                entries.append((file_path, metadata))
+            return entries
+
+        # Two jobs per worker in flight keeps every worker busy without queueing the whole folder
+        in_flight = deque()
+        next_chunk = 0
+        while in_flight or next_chunk < len(chunks):
+            while next_chunk < len(chunks) and len(in_flight) < self.workers * 2:
+                entries = entries_for(chunks[next_chunk])
+                in_flight.append((entries, self._submit(entries, [], inference_batch_size)))
+                next_chunk += 1
+
+            entries, job = in_flight.popleft()
+            for (file_path, _), flagged in zip(entries, self._result(job, entries, inference_batch_size)):
+                yield file_path, flagged
+
+    def check(self, file_path: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Scan a single file in a worker process (waits until the file is fully written first)"""
+        if not content_scanner.wait_until_written(file_path):
+            return False
+        entries = [(file_path, metadata)]
+        return self._result(self._submit(entries, [file_path], 1), entries, 1)[0]
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,146 @@
+"""
+Search Index Module
+Inverted token index over the searchable fields of media records (filename,
+prompt, negative prompt, model and LoRA names), kept up to date as records
+change. Queries are a list of terms that must all match (AND), each as a
+prefix of a token, so "cat sun" finds "a cat at sunset".
+"""
+
+import bisect
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Words are runs of letters/digits; underscores, punctuation and spaces separate them
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def record_tokens(record: Dict[str, Any]) -> frozenset:
+    """Set of tokens a record is indexed under"""
+    return frozenset(tokenize(' '.join(searchable_text(record))))
+
+
+def searchable_text(record: Dict[str, Any]) -> Iterable[str]:
+    """Yield the text fields of a record that are indexed for search"""
+    yield record.get('filename', '')
+    metadata = record.get('metadata') or {}
+    for field in ('prompt', 'negative_prompt', 'model'):
+        value = metadata.get(field)
+        if isinstance(value, str):
+            yield value
+    for lora in metadata.get('loras') or ():
+        if isinstance(lora, dict):
+            yield str(lora.get('name', ''))
+        else:
+            yield str(lora)
+
+
+class SearchIndex:
+    """
+    token -> paths postings plus a sorted vocabulary for prefix lookups.
+    Updates and searches take the index's own lock, so searches don't need
+    the MediaIndex lock (updates arrive under it).
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self.vocabulary: List[str] = []            # sorted, for prefix ranges
+        self._tokens_by_path: Dict[str, frozenset] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tokens_by_path)
+
+    def add(self, record: Dict[str, Any]):
+        """Index (or re-index) a record's searchable fields"""
+        path = record['path']
+        tokens = record_tokens(record)
+        with self._lock:
+            old_tokens = self._tokens_by_path.get(path, frozenset())
+            if tokens == old_tokens:
+                return
+
+            for token in old_tokens - tokens:
+                self._drop_posting(token, path)
+            for token in tokens - old_tokens:
+                paths = self.postings.get(token)
+                if paths is None:
+                    self.postings[token] = {path}
+                    bisect.insort(self.vocabulary, token)
+                else:
+                    paths.add(path)
+            self._tokens_by_path[path] = tokens
+
+    def remove(self, path: str):
+        """Drop a record from the index"""
+        with self._lock:
+            for token in self._tokens_by_path.pop(path, ()):
+                self._drop_posting(token, path)
+
+    def clear(self):
+        with self._lock:
+            self.postings = {}
+            self.vocabulary = []
+            self._tokens_by_path = {}
+
+    def rebuild(self, records: Iterable[Dict[str, Any]]):
+        """Index a whole set of records from scratch (sorts the vocabulary once)"""
+        postings = {}
+        tokens_by_path = {}
+        for record in records:
+            path = record['path']
+            tokens = tokens_by_path[path] = record_tokens(record)
+            for token in tokens:
+                paths = postings.get(token)
+                if paths is None:
+                    postings[token] = {path}
+                else:
+                    paths.add(path)
+        vocabulary = sorted(postings)
+        with self._lock:
+            self.postings = postings
+            self._tokens_by_path = tokens_by_path
+            self.vocabulary = vocabulary
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """
+        Return the paths matching every term of the query (each term as a
+        token prefix). Returns None if the query has no searchable terms.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+
+        result = None
+        with self._lock:
+            # Rarest-looking terms (longest) first, so the intersection shrinks quickly
+            for term in sorted(set(terms), key=len, reverse=True):
+                matches = self._prefix_matches(term)
+                result = matches if result is None else result & matches
+                if not result:
+                    return set()
+        return result
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        # Every token starting with prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', start)
+        if end - start == 1:
+            return set(self.postings[self.vocabulary[start]])
+        return set().union(*[self.postings[token] for token in self.vocabulary[start:end]])
+
+    def _drop_posting(self, token: str, path: str):
+        paths = self.postings.get(token)
+        if paths is None:
+            return
+        paths.discard(path)
+        if not paths:
+            del self.postings[token]
+            idx = bisect.bisect_left(self.vocabulary, token)
+            if idx < len(self.vocabulary) and self.vocabulary[idx] == token:
+                del self.vocabulary[idx]
@@ -0,0 +1,176 @@
+"""
+Thumbnail Cache Module
+Generates resized JPEG/WebP derivatives of images with Pillow and keeps them
+in an on-disk cache keyed by source path, mtime, file size and target size.
+The least recently used thumbnails are evicted once the cache grows past its
+byte budget.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+# Output formats: config value -> (Pillow format, file extension, mimetype)
+THUMBNAIL_FORMATS = {
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+    'webp': ('WEBP', '.webp', 'image/webp'),
+}
+
+# Part of the cache key: bump when thumbnails are rendered differently, so cached ones are redone
+RENDER_VERSION = 2
+
+# Background transparent images are flattened onto for JPEG output
+JPEG_BACKGROUND = (255, 255, 255)
+
+
+def parse_size(value: str) -> Optional[Tuple[int, int]]:
+    """Parse a 'WIDTHxHEIGHT' string such as '200x200'. Returns None if invalid."""
+    try:
+        width, height = str(value).lower().split('x', 1)
+        width, height = int(width), int(height)
+    except ValueError:
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return width, height
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """RGB copy of an image, with transparent areas composited onto JPEG_BACKGROUND (not black)"""
+    if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, JPEG_BACKGROUND)
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+class ThumbnailCache:
+    """On-disk LRU cache of resized images"""
+
+    def __init__(self, cache_dir: str, max_bytes: int, image_format: str = 'jpeg', quality: int = 82):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.format, self.extension, self.mimetype = THUMBNAIL_FORMATS.get(
+            image_format.lower(), THUMBNAIL_FORMATS['jpeg'])
+        self.quality = quality
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # cache filename -> bytes, least recently used first
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Rebuild the LRU order from the files already on disk (oldest access first)"""
+        existing = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.extension):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            existing.append((stat.st_atime, name, stat.st_size))
+
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+    def get(self, source_path: str, mod_time: float, file_size: int, size: Tuple[int, int]) -> Optional[str]:
+        """
+        Return the path of a cached thumbnail for source_path, generating it
+        if needed. Returns None if the image can't be decoded.
+        """
+        key = f"{source_path}|{mod_time}|{file_size}|{size[0]}x{size[1]}|v{RENDER_VERSION}"
+        name = hashlib.sha1(key.encode('utf-8', errors='replace')).hexdigest() + self.extension
+        cache_path = os.path.join(self.cache_dir, name)
+
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                hit = True
+            else:
+                hit = False
+
+        if hit:
+            try:
+                # Persist the access time so the LRU order survives restarts.
+                # mtime is left alone, it feeds the ETag browsers revalidate with.
+                stat = os.stat(cache_path)
+                os.utime(cache_path, (time.time(), stat.st_mtime))
+                return cache_path
+            except OSError:
+                # Removed behind our back - forget it and regenerate
+                with self._lock:
+                    self._total_bytes -= self._entries.pop(name, 0)
+
+        if not self._generate(source_path, cache_path, size):
+            return None
+
+        try:
+            written = os.path.getsize(cache_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            self._total_bytes += written - self._entries.pop(name, 0)
+            self._entries[name] = written
+            self._evict()
+        return cache_path
+
+    def _generate(self, source_path: str, cache_path: str, size: Tuple[int, int]) -> bool:
+        """Decode, resize and write one thumbnail (atomically, via a temp file)"""
+        temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        try:
+            with Image.open(source_path) as img:
+                # Let the JPEG decoder downscale while decoding (much faster for large files)
+                img.draft('RGB', size)
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail(size, Image.LANCZOS)
+
+                if self.format == 'JPEG' and img.mode != 'RGB':
+                    img = _flatten(img)
+                elif img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+
+                img.save(temp_path, self.format, quality=self.quality)
+            os.replace(temp_path, cache_path)
+            return True
+        except Exception as e:
+            print(f"[THUMBNAIL] Error generating thumbnail for {source_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+
+    def _evict(self):
+        """
+        Remove least recently used thumbnails until under budget (caller holds
+        lock). The most recent entry is always kept, since it is about to be served.
+        """
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'files': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,155 @@
+"""
+Verdict Store Module
+Persists NudeNet detections to a local SQLite database keyed by file content
+hash and detector version, so re-scans skip files that were already run
+through the detector. Raw detections (labels and scores) are stored rather
+than yes/no verdicts, so a changed NUDITY_THRESHOLD or NSFW_LABELS is applied
+to cached results without running inference again.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+SCHEMA_VERSION = '1'
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def detector_version() -> str:
+    """Identify the installed detector, so cached detections from another model are ignored"""
+    try:
+        from importlib.metadata import version
+        return f"nudenet-{version('nudenet')}"
+    except Exception:
+        return 'nudenet-unknown'
+
+
+class VerdictStore:
+    """SQLite cache of detections by content hash, plus a path -> hash memo for unchanged files"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS verdicts (
+                content_hash TEXT NOT NULL,
+                detector TEXT NOT NULL,
+                detections TEXT NOT NULL,
+                threshold REAL,
+                labels TEXT,
+                PRIMARY KEY (content_hash, detector)
+            );
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+        ''')
+        self.hits = 0
+        self.misses = 0
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if not row or row[0] != SCHEMA_VERSION:
+            with self._conn:
+                self._conn.execute('DELETE FROM verdicts')
+                self._conn.execute('DELETE FROM file_hashes')
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                                   (SCHEMA_VERSION,))
+
+    def content_hash(self, file_path: str) -> Optional[str]:
+        """
+        SHA-1 of the file contents. Reuses the stored hash while the file's
+        size and mtime are unchanged. Returns None if the file can't be read.
+        """
+        file_path = os.path.normpath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute('SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?',
+                                     (file_path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = hashlib.sha1()
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        content_hash = digest.hexdigest()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)',
+                (file_path, stat.st_size, stat.st_mtime_ns, content_hash))
+        return content_hash
+
+    def forget(self, paths: Iterable[str]) -> int:
+        """Drop the stored hashes of files that were deleted or moved away. Returns the rows removed."""
+        rows = [(os.path.normpath(path),) for path in paths]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany('DELETE FROM file_hashes WHERE path = ?', rows)
+        return cursor.rowcount
+
+    def get(self, content_hash: str, detector: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached detections for a content hash, or None if it was never scanned"""
+        with self._lock:
+            row = self._conn.execute('SELECT detections FROM verdicts WHERE content_hash = ? AND detector = ?',
+                                     (content_hash, detector)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put(self, content_hash: str, detector: str, detections: Iterable[Dict[str, Any]],
+            threshold: float, labels: Iterable[str]):
+        """Store detections, along with the threshold and label set they were first judged by"""
+        compact = [{'class': d.get('class', ''), 'score': float(d.get('score', 0))} for d in detections]
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO verdicts (content_hash, detector, detections, threshold, labels) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (content_hash, detector, json.dumps(compact), threshold, ','.join(labels)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._conn.execute('SELECT COUNT(*) FROM verdicts').fetchone()[0]
+            files = self._conn.execute('SELECT COUNT(*) FROM file_hashes').fetchone()[0]
+            return {'verdicts': count, 'files': files, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_verdict_store(db_path: str) -> Optional[VerdictStore]:
+    """
+    Open (or create) the verdict database. Returns None if it can't be
+    opened - scans then simply run without the cache.
+    """
+    try:
+        return VerdictStore(db_path)
+    except Exception as e:
+        print(f"[ContentScanner] Could not open scan cache {db_path}: {e}")
+        return None